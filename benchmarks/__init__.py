@@ -0,0 +1 @@
+"""Throughput benchmarks with synthetic corpora and a fake LibreOffice backend."""
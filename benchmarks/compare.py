@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Compares two benchmark result files and flags regressions.
+
+    python -m benchmarks.compare baseline.json candidate.json [--threshold 10]
+
+Exits with status 1 if any metric got worse by more than the threshold.
+"""
+
+import sys
+import json
+import argparse
+
+# Metrics compared, with True where a higher value is better
+METRICS = (
+    ('files_per_second', True),
+    ('time_to_first_output', False),
+    ('latency.p50', False),
+    ('latency.p95', False),
+    ('latency.p99', False),
+    ('peak_rss_bytes', False),
+    ('peak_children_rss_bytes', False),
+    ('peak_scratch_bytes', False),
+)
+
+def _value(result, metric):
+    """Look up a possibly nested metric such as 'latency.p95'."""
+    for key in metric.split('.'):
+        if not isinstance(result, dict):
+            return None
+        result = result.get(key)
+    return result
+
+def compare(baseline, candidate, threshold):
+    """
+    Print a comparison of two benchmark reports.
+
+    Args:
+        baseline (dict): Report of the reference run.
+        candidate (dict): Report of the run being checked.
+        threshold (float): Percentage change counted as a regression.
+
+    Returns:
+        list: (corpus, metric, change in percent) of every regression.
+    """
+    regressions = []
+    base_results = {r['corpus']: r for r in baseline['results']}
+
+    print(f"Baseline:  {baseline.get('commit') or '?'}")
+    print(f"Candidate: {candidate.get('commit') or '?'}\n")
+    for result in candidate['results']:
+        name = result['corpus']
+        base = base_results.get(name)
+        if base is None or 'error' in base or 'error' in result:
+            print(f"{name}: not comparable\n")
+            continue
+
+        print(f"{name}:")
+        for metric, higher_is_better in METRICS:
+            old, new = _value(base, metric), _value(result, metric)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old * 100 if old else 0.0
+            worse = -change if higher_is_better else change
+            flag = ''
+            if worse > threshold:
+                flag = '  REGRESSION'
+                regressions.append((name, metric, change))
+            print(f"  {metric:<26} {old:>14.3f} -> {new:>14.3f}  {change:+7.1f}%{flag}")
+        print()
+    return regressions
+
+def main(argv=None):
+    """Compare two result files given on the command line."""
+    parser = argparse.ArgumentParser(description="Compare two doc2pdf benchmark results.")
+    parser.add_argument('baseline', help="Result JSON of the reference commit")
+    parser.add_argument('candidate', help="Result JSON of the commit being checked")
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help="Percent change counted as a regression (default: 10)")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(args.candidate, 'r', encoding='utf-8') as f:
+        candidate = json.load(f)
+
+    regressions = compare(baseline, candidate, args.threshold)
+    if regressions:
+        print(f"{len(regressions)} regression(s) above {args.threshold:g}%.")
+        return 1
+    print("No regressions.")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
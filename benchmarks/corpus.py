@@ -0,0 +1,122 @@
+"""Generates synthetic input corpora for the benchmarks."""
+
+import io
+import os
+import random
+import zipfile
+
+# Corpus shapes: (file count, min size, max size, directory depth, fan-out, zipped)
+CORPORA = {
+    'flat': (500, 20 * 1024, 200 * 1024, 0, 1, False),
+    'nested': (500, 20 * 1024, 200 * 1024, 6, 3, False),
+    'tiny': (5000, 1024, 4 * 1024, 2, 8, False),
+    'huge': (6, 10 * 1024 * 1024, 30 * 1024 * 1024, 0, 1, False),
+    'zip': (3000, 2 * 1024, 32 * 1024, 3, 5, True),
+}
+
+# Share of generated files that are copied instead of converted
+OTHER_FILE_RATIO = 0.2
+
+_WORDS = (
+    'lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor '
+    'incididunt ut labore et dolore magna aliqua enim ad minim veniam quis nostrud '
+    'exercitation ullamco laboris nisi aliquip ex ea commodo consequat'
+).split()
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+
+_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/>'
+    '</Relationships>'
+)
+
+def _document_xml(rng, size):
+    """Build a Word document body of roughly the given size in bytes."""
+    paragraphs = []
+    written = 0
+    while written < size:
+        text = ' '.join(rng.choices(_WORDS, k=80))
+        paragraph = f'<w:p><w:r><w:t>{text}</w:t></w:r></w:p>'
+        paragraphs.append(paragraph)
+        written += len(paragraph)
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f'<w:body>{"".join(paragraphs)}</w:body></w:document>'
+    )
+
+def make_docx(rng, size):
+    """
+    Build a minimal valid .docx file that real LibreOffice can open.
+
+    Members are stored uncompressed so the file size is close to the target.
+
+    Args:
+        rng (random.Random): Source of randomness for the text.
+        size (int): Approximate file size in bytes.
+
+    Returns:
+        bytes: The .docx file contents.
+    """
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as docx:
+        docx.writestr('[Content_Types].xml', _CONTENT_TYPES)
+        docx.writestr('_rels/.rels', _RELS)
+        docx.writestr('word/document.xml', _document_xml(rng, size))
+    return buffer.getvalue()
+
+def _relative_paths(rng, count, depth, fanout):
+    """Yield (relative path, is_document) for every file of a corpus."""
+    for index in range(count):
+        parts = [f"dir{rng.randrange(fanout)}" for _ in range(depth)]
+        is_document = rng.random() >= OTHER_FILE_RATIO
+        name = f"file{index:05d}.docx" if is_document else f"file{index:05d}.png"
+        yield os.path.join(*parts, name), is_document
+
+def generate_corpus(name, target_dir, scale=1.0, seed=0):
+    """
+    Generate a synthetic corpus, reproducibly for a given seed.
+
+    Args:
+        name (str): Corpus shape, one of CORPORA.
+        target_dir (str): Directory to create the corpus in.
+        scale (float, optional): Multiplier for the number of files.
+        seed (int, optional): Random seed.
+
+    Returns:
+        str: Path to pass as input (the corpus directory, or the zip file).
+    """
+    count, min_size, max_size, depth, fanout, zipped = CORPORA[name]
+    count = max(1, int(count * scale))
+    rng = random.Random(f"{name}:{seed}")
+    os.makedirs(target_dir, exist_ok=True)
+
+    if zipped:
+        zip_path = os.path.join(target_dir, f"{name}.zip")
+        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for rel_path, is_document in _relative_paths(rng, count, depth, fanout):
+                size = rng.randint(min_size, max_size)
+                data = make_docx(rng, size) if is_document else rng.randbytes(size)
+                archive.writestr(rel_path.replace(os.sep, '/'), data)
+        return zip_path
+
+    corpus_dir = os.path.join(target_dir, name)
+    for rel_path, is_document in _relative_paths(rng, count, depth, fanout):
+        path = os.path.join(corpus_dir, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        size = rng.randint(min_size, max_size)
+        with open(path, 'wb') as f:
+            f.write(make_docx(rng, size) if is_document else rng.randbytes(size))
+    return corpus_dir
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Stand-in for the 'libreoffice' executable with tunable latency and failures.
+
+Accepts the command lines doc2pdf uses ('--version', '--terminate_after_init'
+and '--convert-to pdf --outdir DIR FILE...') and writes a small placeholder
+PDF for every input. Behaviour is configured through environment variables:
+
+    FAKE_SOFFICE_STARTUP       Seconds of process startup (default 0.3)
+    FAKE_SOFFICE_LATENCY       Seconds per converted file (default 0.05)
+    FAKE_SOFFICE_PER_MB        Extra seconds per MB of input (default 0.05)
+    FAKE_SOFFICE_JITTER        Latency distribution: none, uniform or lognormal (default lognormal)
+    FAKE_SOFFICE_SIGMA         Spread of the lognormal distribution (default 0.5)
+    FAKE_SOFFICE_FAILURE_RATE  Share of files that can't be loaded (default 0)
+    FAKE_SOFFICE_CRASH_RATE    Share of processes that exit with an error (default 0)
+    FAKE_SOFFICE_HANG_RATE     Share of files that hang the process (default 0)
+    FAKE_SOFFICE_SEED          Seed; the same file always behaves the same (default 0)
+"""
+
+import os
+import sys
+import time
+import random
+
+def _setting(name, default):
+    """Read a numeric setting from the environment."""
+    return float(os.environ.get(f"FAKE_SOFFICE_{name}", default))
+
+def _latency(rng, base):
+    """Draw a latency around base seconds from the configured distribution."""
+    jitter = os.environ.get('FAKE_SOFFICE_JITTER', 'lognormal')
+    if jitter == 'uniform':
+        return rng.uniform(0, 2 * base)
+    if jitter == 'lognormal':
+        sigma = _setting('SIGMA', 0.5)
+        # Mean of the distribution stays at base
+        return base * rng.lognormvariate(-sigma * sigma / 2, sigma)
+    return base
+
+def main(args):
+    """Emulate one LibreOffice invocation."""
+    if '--version' in args:
+        print("LibreOffice 0.0.0.0 (fake soffice for benchmarks)")
+        return 0
+    if any(arg.startswith('--accept') for arg in args):
+        print("Error: the fake soffice can't serve UNO connections", file=sys.stderr)
+        return 1
+
+    seed = os.environ.get('FAKE_SOFFICE_SEED', '0')
+    time.sleep(_setting('STARTUP', 0.3))
+    if '--terminate_after_init' in args:
+        return 0
+
+    outdir = '.'
+    files = []
+    arguments = iter(args)
+    for arg in arguments:
+        if arg == '--outdir':
+            outdir = next(arguments)
+        elif arg == '--convert-to':
+            next(arguments)
+        elif not arg.startswith('-'):
+            files.append(arg)
+
+    process_rng = random.Random(f"{seed}:{' '.join(sorted(files))}")
+    if process_rng.random() < _setting('CRASH_RATE', 0):
+        print("Fatal error: fake soffice crashed", file=sys.stderr)
+        return 81
+
+    for path in files:
+        name = os.path.basename(path)
+        rng = random.Random(f"{seed}:{name}")
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            print(f"Error: source file could not be loaded: {path}", file=sys.stderr)
+            continue
+
+        if rng.random() < _setting('HANG_RATE', 0):
+            time.sleep(10 ** 6)
+        time.sleep(_latency(rng, _setting('LATENCY', 0.05) + _setting('PER_MB', 0.05) * size / (1024 * 1024)))
+        if rng.random() < _setting('FAILURE_RATE', 0):
+            print(f"Error: source file could not be loaded: {path}", file=sys.stderr)
+            continue
+
+        output_path = os.path.join(outdir, os.path.splitext(name)[0] + '.pdf')
+        with open(output_path, 'w') as f:
+            f.write(f"%PDF-1.4\n% fake conversion of {name}\n%%EOF\n")
+        print(f"convert {path} -> {output_path} using filter : writer_pdf_Export")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
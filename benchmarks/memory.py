@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark for discovered work items.
+
+Builds the work list of a synthetic tree (or scans a real directory) and
+reports the bytes each item costs, next to the three-key file info dicts
+the items replaced. Run from the repository root:
+
+    python -m benchmarks.memory --files 1000000
+    python -m benchmarks.memory --directory /mnt/share/documents
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+from file_utils.work_item import WorkItem
+from file_utils.directory_handler import iter_files_from_directory
+
+ROOT = os.path.join(os.sep, 'mnt', 'share', 'documents')
+
+def _synthetic_tree(files, per_dir, depth):
+    """Yield (rel_dir, name) for a tree of the given shape; one string per directory."""
+    directories = max(1, files // per_dir)
+    for number in range(directories):
+        rel_dir = os.path.join(*[f"level{level}-{number % (10 + level)}" for level in range(depth)],
+                               f"dir{number}")
+        for index in range(min(per_dir, files - number * per_dir)):
+            yield rel_dir, f"report-{number}-{index}.docx"
+
+def _measure(build):
+    """Return (items, bytes allocated, seconds) for a function building a list of items."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    items = build()
+    seconds = time.perf_counter() - started
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(items), allocated, seconds
+
+def _report(name, count, allocated, seconds):
+    """Return one result entry."""
+    return {
+        'representation': name,
+        'items': count,
+        'bytes_per_item': round(allocated / count, 1) if count else None,
+        'total_mb': round(allocated / (1024 * 1024), 1),
+        'seconds': round(seconds, 3),
+    }
+
+def measure_synthetic(files, per_dir, depth):
+    """
+    Compare file info dicts and WorkItems for a synthetic tree.
+
+    Args:
+        files (int): Number of files.
+        per_dir (int): Files per directory.
+        depth (int): Directory levels above each leaf directory.
+
+    Returns:
+        list: One result per representation.
+    """
+    def build_dicts():
+        return [
+            {'path': os.path.join(ROOT, rel_dir, name), 'source': os.path.basename(ROOT),
+             'internal_path': os.path.join(rel_dir, name)}
+            for rel_dir, name in _synthetic_tree(files, per_dir, depth)
+        ]
+
+    def build_items():
+        source = os.path.basename(ROOT)
+        return [
+            WorkItem.in_directory(ROOT, source, rel_dir, name)
+            for rel_dir, name in _synthetic_tree(files, per_dir, depth)
+        ]
+
+    return [
+        _report('dict', *_measure(build_dicts)),
+        _report('WorkItem', *_measure(build_items)),
+    ]
+
+def measure_directory(directory):
+    """
+    Measure the WorkItems of a real directory scan.
+
+    Args:
+        directory (str): Directory to scan.
+
+    Returns:
+        list: One result.
+    """
+    return [_report('WorkItem (scan)', *_measure(lambda: list(iter_files_from_directory(directory))))]
+
+def parse_args(argv):
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="Measure the memory used per discovered file.")
+    parser.add_argument('--files', type=int, default=200000, help="Files in the synthetic tree")
+    parser.add_argument('--per-dir', type=int, default=50, help="Files per directory")
+    parser.add_argument('--depth', type=int, default=4, help="Directory levels above each leaf")
+    parser.add_argument('--directory', help="Scan this directory instead of a synthetic tree")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Run the benchmark and print the results."""
+    args = parse_args(argv)
+    if args.directory:
+        results = measure_directory(args.directory)
+    else:
+        results = measure_synthetic(args.files, args.per_dir, args.depth)
+
+    for result in results:
+        print(f"{result['representation']:>16}: {result['bytes_per_item']} bytes/item, "
+              f"{result['total_mb']} MB for {result['items']} items, built in {result['seconds']:.2f}s")
+    print(json.dumps(results, indent=2))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
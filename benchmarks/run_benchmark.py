@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for doc2pdf.
+
+Generates synthetic corpora, converts each with the full pipeline in a fresh
+process and writes the metrics as JSON, for comparing commits with
+benchmarks/compare.py. Run from the repository root:
+
+    python -m benchmarks.run_benchmark --corpus all --output bench.json
+    python -m benchmarks.run_benchmark --corpus huge --backend real
+"""
+
+import os
+import sys
+import json
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime, timezone
+import settings
+from .corpus import CORPORA, generate_corpus
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKE_SOFFICE = os.path.join(REPO_ROOT, 'benchmarks', 'fake_soffice.py')
+
+# Settings recorded with every result, since they change the numbers
+RECORDED_SETTINGS = (
+    'USE_MULTITHREADING', 'MAX_WORKERS', 'ISOLATE_LIBREOFFICE_PROFILES',
+    'BATCH_CONVERSIONS', 'BATCH_MAX_FILES', 'STREAM_ZIP_EXTRACTION',
+    'SCRATCH_SPACE_BUDGET', 'PIPELINE_MODE', 'COST_AWARE_SCHEDULING',
+    'ADAPTIVE_CONCURRENCY', 'CONVERSION_CACHE_ENABLED', 'INCREMENTAL_MODE',
+    'FILE_PLACEMENT', 'DEDUPLICATE_INPUTS'
+)
+
+def _git_commit():
+    """Return the current commit hash, or None outside a git checkout."""
+    try:
+        result = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO_ROOT,
+                                check=True, capture_output=True, text=True)
+        return result.stdout.strip()
+    except (subprocess.CalledProcessError, OSError):
+        return None
+
+def _install_fake_soffice(bin_dir):
+    """Create a 'libreoffice' command in bin_dir that runs the fake soffice."""
+    os.makedirs(bin_dir, exist_ok=True)
+    command = os.path.join(bin_dir, 'libreoffice')
+    with open(command, 'w') as f:
+        f.write(f'#!/bin/sh\nexec "{sys.executable}" "{FAKE_SOFFICE}" "$@"\n')
+    os.chmod(command, 0o755)
+
+def _fake_environment(args):
+    """Return the FAKE_SOFFICE_* variables for the chosen backend parameters."""
+    return {
+        'FAKE_SOFFICE_STARTUP': str(args.startup),
+        'FAKE_SOFFICE_LATENCY': str(args.latency),
+        'FAKE_SOFFICE_PER_MB': str(args.per_mb),
+        'FAKE_SOFFICE_JITTER': args.jitter,
+        'FAKE_SOFFICE_FAILURE_RATE': str(args.failure_rate),
+        'FAKE_SOFFICE_CRASH_RATE': str(args.crash_rate),
+        'FAKE_SOFFICE_HANG_RATE': str(args.hang_rate),
+        'FAKE_SOFFICE_SEED': str(args.seed),
+    }
+
+def run_corpus(name, args, work_dir):
+    """
+    Generate one corpus and convert it in a separate process.
+
+    Args:
+        name (str): Corpus name.
+        args (argparse.Namespace): Command-line options.
+        work_dir (str): Scratch directory for this benchmark run.
+
+    Returns:
+        dict: Metrics of the run, or an 'error' entry if it failed.
+    """
+    corpus_root = args.corpus_dir or os.path.join(work_dir, 'corpora')
+    marker = os.path.join(corpus_root, f".{name}-{args.scale}-{args.seed}.done")
+    if os.path.exists(marker):
+        with open(marker) as f:
+            input_path = f.read().strip()
+    else:
+        print(f"Generating '{name}' corpus...")
+        input_path = generate_corpus(name, corpus_root, args.scale, args.seed)
+        with open(marker, 'w') as f:
+            f.write(input_path)
+
+    env = dict(os.environ)
+    if args.backend == 'fake':
+        bin_dir = os.path.join(work_dir, 'bin')
+        _install_fake_soffice(bin_dir)
+        env['PATH'] = bin_dir + os.pathsep + env.get('PATH', '')
+        env.update(_fake_environment(args))
+    if not args.keep_home:
+        # Start without learned cost models, quarantine lists or caches
+        env['HOME'] = tempfile.mkdtemp(prefix='home-', dir=work_dir)
+
+    output_dir = os.path.join(work_dir, 'output', name)
+    metrics_file = os.path.join(work_dir, f"{name}-metrics.json")
+    log_file = os.path.join(work_dir, f"{name}.log")
+    print(f"Converting '{name}' corpus ({args.backend} backend)...")
+    with open(log_file, 'w') as log:
+        result = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.runner', input_path, output_dir, metrics_file],
+            cwd=REPO_ROOT, env=env, stdout=log, stderr=subprocess.STDOUT
+        )
+
+    if result.returncode != 0 or not os.path.exists(metrics_file):
+        print(f"Benchmark of '{name}' failed, see {log_file}")
+        return {'corpus': name, 'error': f"exit code {result.returncode}", 'log': log_file}
+
+    with open(metrics_file, 'r', encoding='utf-8') as f:
+        metrics = json.load(f)
+    shutil.rmtree(output_dir, ignore_errors=True)
+
+    latency = metrics['latency']
+    print(f"  {metrics['files']} files in {metrics['wall_seconds']:.2f}s "
+          f"({metrics['files_per_second']:.1f} files/s), "
+          f"p50 {latency['p50'] or 0:.2f}s, p95 {latency['p95'] or 0:.2f}s, p99 {latency['p99'] or 0:.2f}s, "
+          f"first output after {metrics['time_to_first_output'] or 0:.2f}s")
+    return {'corpus': name, **metrics}
+
+def parse_args(argv):
+    """Parse command-line options."""
+    parser = argparse.ArgumentParser(description="Benchmark doc2pdf conversion throughput.")
+    parser.add_argument('--corpus', action='append', choices=sorted(CORPORA) + ['all'],
+                        help="Corpus to run (repeatable, default: all)")
+    parser.add_argument('--backend', choices=('fake', 'real'), default='fake',
+                        help="Fake soffice stub or the installed LibreOffice (default: fake)")
+    parser.add_argument('--scale', type=float, default=1.0, help="Multiplier for corpus file counts")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for corpora and the fake backend")
+    parser.add_argument('--corpus-dir', help="Keep generated corpora here and reuse them")
+    parser.add_argument('--keep-home', action='store_true',
+                        help="Use the real home directory (learned costs, quarantine, cache)")
+    parser.add_argument('--output', help="Write the results to this JSON file")
+    fake = parser.add_argument_group('fake backend')
+    fake.add_argument('--startup', type=float, default=0.3, help="Process startup seconds")
+    fake.add_argument('--latency', type=float, default=0.05, help="Mean seconds per file")
+    fake.add_argument('--per-mb', type=float, default=0.05, help="Extra seconds per MB of input")
+    fake.add_argument('--jitter', choices=('none', 'uniform', 'lognormal'), default='lognormal',
+                      help="Latency distribution")
+    fake.add_argument('--failure-rate', type=float, default=0.0, help="Share of files that fail")
+    fake.add_argument('--crash-rate', type=float, default=0.0, help="Share of processes that crash")
+    fake.add_argument('--hang-rate', type=float, default=0.0, help="Share of files that hang")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Run the benchmarks and report the results."""
+    args = parse_args(argv)
+    corpora = args.corpus or ['all']
+    if 'all' in corpora:
+        corpora = list(CORPORA)
+
+    if args.backend == 'real' and not shutil.which('libreoffice'):
+        print("Error: 'libreoffice' not found; use --backend fake.")
+        return 1
+
+    work_dir = tempfile.mkdtemp(prefix='doc2pdf-bench-')
+    try:
+        results = [run_corpus(name, args, work_dir) for name in corpora]
+    except BaseException:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        raise
+
+    # Keep the logs of failed runs for inspection
+    failed = any('error' in result for result in results)
+    if not failed:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        'commit': _git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'host': {'python': platform.python_version(), 'platform': platform.platform(),
+                 'cpu_count': os.cpu_count()},
+        'backend': {'name': args.backend, 'scale': args.scale, 'seed': args.seed,
+                    **({k.lower(): v for k, v in _fake_environment(args).items()}
+                       if args.backend == 'fake' else {})},
+        'settings': {name: getattr(settings, name, None) for name in RECORDED_SETTINGS},
+        'results': results,
+    }
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+    else:
+        print(json.dumps(report, indent=2))
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
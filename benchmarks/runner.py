@@ -0,0 +1,186 @@
+"""
+Runs one benchmark: converts an input with the full pipeline and records metrics.
+
+Started by run_benchmark.py in a fresh process (so settings, caches and
+LibreOffice state don't leak between runs):
+
+    python -m benchmarks.runner INPUT OUTPUT_DIR METRICS_FILE
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import resource
+import threading
+from converters import get_converter
+from conversion import ConversionPipeline
+from file_utils.input_collector import iter_input_files, new_input_counts
+from settings import PIPELINE_MODE
+from utils.concurrency_controller import child_rss
+
+# Seconds between resource usage samples
+SAMPLE_INTERVAL = 0.1
+
+def percentile(values, fraction):
+    """
+    Return a percentile of a list of numbers (nearest rank).
+
+    Args:
+        values (list): The numbers.
+        fraction (float): Percentile as a fraction, e.g. 0.95.
+
+    Returns:
+        float: The percentile, or None for an empty list.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+def _own_rss():
+    """Return the resident memory of this process in bytes."""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return 0
+
+class InstrumentedPipeline(ConversionPipeline):
+    """Conversion pipeline that records when each file was discovered and finished."""
+
+    def __init__(self, *args, **kwargs):
+        """Initialize the pipeline; arguments are passed to ConversionPipeline."""
+        super().__init__(*args, **kwargs)
+        self.started = None
+        self.first_output = None
+        self.latencies = []
+        self._discovered_at = {}
+        self._timing_lock = threading.Lock()
+
+    def timed(self, file_infos):
+        """Yield the file infos, noting when each one was discovered."""
+        for file_info in file_infos:
+            self._discovered_at[id(file_info)] = time.monotonic()
+            yield file_info
+
+    def _on_complete(self, file_infos, output_dir, converter):
+        """Record the latency of every finished file."""
+        now = time.monotonic()
+        with self._timing_lock:
+            if self.first_output is None:
+                self.first_output = now - self.started
+            for file_info in file_infos:
+                discovered = self._discovered_at.pop(id(file_info), None)
+                if discovered is not None:
+                    self.latencies.append(now - discovered)
+        super()._on_complete(file_infos, output_dir, converter)
+
+class ResourceMonitor:
+    """Samples memory and scratch space usage in the background."""
+
+    def __init__(self, pipeline):
+        """
+        Initialize the monitor.
+
+        Args:
+            pipeline (ConversionPipeline): Pipeline whose scratch space is watched.
+        """
+        self.pipeline = pipeline
+        self.peak_rss = 0
+        self.peak_child_rss = 0
+        self.peak_scratch = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        """Start sampling."""
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling and take a final sample."""
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+    def _run(self):
+        """Sample until stopped."""
+        while not self._stop.wait(SAMPLE_INTERVAL):
+            self._sample()
+
+    def _sample(self):
+        """Update the peaks from the current usage."""
+        self.peak_rss = max(self.peak_rss, _own_rss())
+        self.peak_child_rss = max(self.peak_child_rss, child_rss()[0])
+        stager = self.pipeline._stager
+        if stager is not None:
+            self.peak_scratch = max(self.peak_scratch, stager.budget.peak)
+
+def _count_outputs(output_dir):
+    """Return (PDF count, copied file count) in an output tree."""
+    pdfs, copies = 0, 0
+    for _, _, files in os.walk(output_dir):
+        for name in files:
+            if name.lower().endswith('.pdf'):
+                pdfs += 1
+            else:
+                copies += 1
+    return pdfs, copies
+
+def run(input_path, output_dir, converter_name='libreoffice'):
+    """
+    Convert an input and measure the run.
+
+    Args:
+        input_path (str): File, zip or directory to convert.
+        output_dir (str): Directory to write the output to.
+        converter_name (str, optional): Converter to use.
+
+    Returns:
+        dict: The metrics of the run.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    pipeline = InstrumentedPipeline(output_dir, get_converter(converter_name))
+    monitor = ResourceMonitor(pipeline)
+
+    file_infos = iter_input_files([input_path], new_input_counts())
+    pipeline.started = time.monotonic()
+    monitor.start()
+    if PIPELINE_MODE:
+        processed = pipeline.run(pipeline.timed(file_infos))
+    else:
+        # Phased mode: everything is discovered before conversion starts
+        processed = pipeline.run(list(pipeline.timed(file_infos)))
+    wall = time.monotonic() - pipeline.started
+    monitor.stop()
+
+    pdfs, copies = _count_outputs(output_dir)
+    latencies = pipeline.latencies
+    return {
+        'files': pipeline.discovered,
+        'processed': processed,
+        'pdfs': pdfs,
+        'copies': copies,
+        'wall_seconds': wall,
+        'files_per_second': pipeline.discovered / wall if wall else None,
+        'time_to_first_output': pipeline.first_output,
+        'latency': {
+            'mean': sum(latencies) / len(latencies) if latencies else None,
+            'p50': percentile(latencies, 0.50),
+            'p95': percentile(latencies, 0.95),
+            'p99': percentile(latencies, 0.99),
+            'max': max(latencies) if latencies else None,
+        },
+        'peak_rss_bytes': max(monitor.peak_rss, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024),
+        'peak_children_rss_bytes': monitor.peak_child_rss,
+        'largest_child_rss_bytes': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * 1024,
+        'peak_scratch_bytes': monitor.peak_scratch,
+    }
+
+if __name__ == '__main__':
+    input_path, output_dir, metrics_file = sys.argv[1:4]
+    metrics = run(input_path, output_dir, os.environ.get('DOCUMENT_CONVERTER', 'libreoffice'))
+    with open(metrics_file, 'w', encoding='utf-8') as f:
+        json.dump(metrics, f, indent=2)
@@ -2,8 +2,43 @@
 """Utility to check threading configuration."""
 
 import os
-from settings import USE_MULTITHREADING, MAX_WORKERS
-from utils.thread_manager import get_max_workers
+import sys
+import json
+import time
+from datetime import datetime
+from settings import USE_MULTITHREADING, MAX_WORKERS, ADAPTIVE_CONCURRENCY
+from utils.thread_manager import get_max_workers, get_static_workers, get_concurrency_controller
+from utils.concurrency_controller import status_files, child_rss
+
+def _format_bytes(value):
+    """Format a byte count in MB, or '?' if unknown."""
+    return '?' if value is None else f"{value / (1024 * 1024):.0f} MB"
+
+def _running_statuses():
+    """Return the statuses published by running conversions (one per process)."""
+    statuses = []
+    for path in status_files():
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                status = json.load(f)
+        except (OSError, ValueError):
+            continue
+        try:
+            os.kill(status['pid'], 0)
+        except ProcessLookupError:
+            # Left behind by a conversion that was killed
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            continue
+        except PermissionError:
+            # Running as another user
+            pass
+        except (OSError, KeyError, TypeError):
+            continue
+        statuses.append(status)
+    return statuses
 
 def check_threading_config():
     """Display information about the threading configuration."""
@@ -11,8 +46,53 @@ def check_threading_config():
     print(f"Multithreading enabled: {USE_MULTITHREADING}")
     print(f"MAX_WORKERS setting:    {MAX_WORKERS}")
     print(f"CPU cores available:    {os.cpu_count()}")
+    print(f"Static worker count:    {get_static_workers()}")
+    print(f"Adaptive concurrency:   {ADAPTIVE_CONCURRENCY}")
     print(f"Actual worker threads:  {get_max_workers()}")
     print("-----------------------------\n")
 
+    if ADAPTIVE_CONCURRENCY:
+        check_controller()
+
+def check_controller():
+    """Display the concurrency controller's current readings and decisions."""
+    controller = get_concurrency_controller()
+    sample = controller.sample()
+    load = '?' if sample['load'] is None else f"{sample['load']:.2f}"
+
+    print("--- Concurrency Controller ---")
+    print(f"Memory available:       {_format_bytes(sample['mem_available'])} of {_format_bytes(sample['mem_total'])}")
+    print(f"Load per CPU core:      {load}")
+
+    statuses = _running_statuses()
+    if not statuses:
+        # No conversion running: show what a new run would start with
+        new_limit, reason = controller.decide(sample)
+        print(f"Floor / ceiling:        {controller.floor} / {controller.ceiling}")
+        print(f"Starting limit:         {controller.limit}")
+        print(f"Next decision:          {new_limit} ({reason or 'no change'})")
+    for status in statuses:
+        rss, processes = child_rss(status['pid'])
+        print(f"Running conversion:     pid {status['pid']}")
+        print(f"LibreOffice memory:     {_format_bytes(rss)} in {processes} process(es)")
+        print(f"Floor / ceiling:        {status['floor']} / {status['ceiling']}")
+        print(f"Current limit:          {status['limit']} ({status['in_flight']} converting)")
+        print("Recent decisions:")
+        for decision in status['decisions'] or []:
+            when = datetime.fromtimestamp(decision['time']).strftime('%H:%M:%S')
+            print(f"  {when}  {decision['from']} -> {decision['to']}: {decision['reason']}")
+        if not status['decisions']:
+            print("  (none yet)")
+    print("-----------------------------\n")
+
 if __name__ == "__main__":
-    check_threading_config()
\ No newline at end of file
+    check_threading_config()
+
+    # --watch keeps following a running conversion
+    if '--watch' in sys.argv[1:] and ADAPTIVE_CONCURRENCY:
+        try:
+            while True:
+                time.sleep(2)
+                check_controller()
+        except KeyboardInterrupt:
+            pass
@@ -1,5 +1,8 @@
 """Document conversion logic."""
 
 from .structure_handler import convert_with_structure
+from .pipeline import ConversionPipeline
+from .scheduler import TaskScheduler
+from .job_manager import JobManager, get_job_manager
 
-__all__ = ['convert_with_structure']
\ No newline at end of file
+__all__ = ['convert_with_structure', 'ConversionPipeline', 'TaskScheduler', 'JobManager', 'get_job_manager']
\ No newline at end of file
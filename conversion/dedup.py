@@ -0,0 +1,187 @@
+"""Detects identical input documents so each one is converted only once per run."""
+
+import os
+import threading
+from file_utils.file_hash import hash_file, hash_zip_member
+from file_utils.archive_handler import archive_suffix
+from file_utils.placement import place_file
+from utils import metrics, events
+from .scheduler import get_output_dir
+
+class _Group:
+    """Inputs with the same content: one primary that is converted, and its duplicates."""
+    
+    def __init__(self, primary):
+        """
+        Initialize the group.
+        
+        Args:
+            primary (dict): File info of the input that is converted.
+        """
+        self.primary = primary
+        self.followers = []
+        self.done = False
+        self.output_path = None
+
+class Deduplicator:
+    """
+    Converts each distinct document once and places its output for every copy.
+    
+    Inputs are bucketed by size first; a file is only hashed once a second
+    file of the same size shows up, so inputs with a unique size are never read.
+    Duplicates are not queued for conversion: when their primary finishes, its
+    PDF (or fallback copy) is linked or copied into their output directories.
+    """
+    
+    def __init__(self, base_output_folder, on_placed=None):
+        """
+        Initialize the deduplicator.
+        
+        Args:
+            base_output_folder (str): Base directory for output files.
+            on_placed (function, optional): Called as on_placed(file_info, output_path)
+                for every duplicate whose output was placed.
+        """
+        self.base_output_folder = base_output_folder
+        self.on_placed = on_placed
+        self.duplicates = 0
+        self.placed = 0
+        self.saved_bytes = 0
+        self._lock = threading.Lock()
+        self._by_size = {}      # size -> group of the unhashed first file, or None once hashed
+        self._by_digest = {}    # digest -> _Group
+        self._primaries = {}    # id(file info) -> _Group
+    
+    def claim(self, file_info):
+        """
+        Check whether a file duplicates one seen earlier in the run.
+        
+        Args:
+            file_info (dict): File info of a discovered (and staged) input.
+        
+        Returns:
+            bool: True if the file is a duplicate and must not be converted;
+                its output is placed once the primary has been processed.
+        """
+        size = _size(file_info)
+        if size is None:
+            return False
+        
+        with self._lock:
+            if size not in self._by_size:
+                # First file of this size: nothing to compare with, don't hash
+                group = _Group(file_info)
+                self._by_size[size] = group
+                self._primaries[id(file_info)] = group
+                return False
+            earlier = self._by_size[size]
+            self._by_size[size] = None
+        
+        if earlier is not None:
+            # A second file of this size showed up, so the first one needs a hash too
+            earlier_digest = _digest(earlier.primary)
+            if earlier_digest is not None:
+                with self._lock:
+                    self._by_digest.setdefault(earlier_digest, earlier)
+        
+        digest = _digest(file_info)
+        if digest is None:
+            return False
+        
+        with self._lock:
+            group = self._by_digest.get(digest)
+            if group is None:
+                group = _Group(file_info)
+                self._by_digest[digest] = group
+                self._primaries[id(file_info)] = group
+                return False
+            
+            self.duplicates += 1
+            self.saved_bytes += size
+            metrics.count('files', outcome='duplicate')
+            if not group.done:
+                group.followers.append(file_info)
+                return True
+        
+        self._place(group, file_info)
+        return True
+    
+    def complete(self, file_infos, outputs):
+        """
+        Place the outputs of duplicates whose primary was just processed.
+        
+        Args:
+            file_infos (list): File infos processed together.
+            outputs (dict): Output path (PDF or copy) of each processed file by
+                id(file info); missing or None if it produced no output.
+        """
+        for file_info in file_infos:
+            with self._lock:
+                group = self._primaries.pop(id(file_info), None)
+                if group is None:
+                    continue
+                group.output_path = outputs.get(id(file_info))
+                group.done = True
+                followers, group.followers = group.followers, []
+            
+            for follower in followers:
+                self._place(group, follower)
+    
+    def _place(self, group, file_info):
+        """Link or copy a primary's output into a duplicate's output directory."""
+        name = _display_path(file_info)
+        source = group.output_path
+        if source is None:
+            events.publish(events.FAILED, name,
+                           message=f"identical to '{_display_path(group.primary)}', which could not be processed")
+            return
+        
+        output_dir = get_output_dir(file_info, self.base_output_folder)
+        base_name = os.path.basename(name)
+        if source.lower().endswith('.pdf') and not base_name.lower().endswith('.pdf'):
+            base_name = os.path.splitext(base_name)[0] + '.pdf'
+        dest = os.path.join(output_dir, base_name)
+        
+        try:
+            if os.path.abspath(dest) != os.path.abspath(source):
+                os.makedirs(output_dir, exist_ok=True)
+                place_file(source, dest)
+        except OSError as e:
+            events.publish(events.FAILED, name, message=f"could not place duplicate output: {e}")
+            return
+        
+        with self._lock:
+            self.placed += 1
+        events.publish(events.FINISHED, name, outcome=events.DUPLICATE, size=_size(file_info))
+        if self.on_placed is not None:
+            self.on_placed(file_info, dest)
+
+def _display_path(file_info):
+    """Return the path an input is known by, also after a staged member was released."""
+    return file_info['path'] or file_info['internal_path']
+
+def _size(file_info):
+    """Return an input's size in bytes, or None if it can't be read."""
+    if file_info.get('size') is not None:
+        return file_info['size']
+    try:
+        return os.path.getsize(file_info['path'])
+    except (OSError, TypeError):
+        return None
+
+def _digest(file_info):
+    """Hash an input's content, reading zip members from the archive once released."""
+    try:
+        if file_info['path']:
+            return hash_file(file_info['path'])
+    except OSError:
+        # Released (deleted) while hashing; fall back to the archive if there is one
+        pass
+    try:
+        # Members of nested archives and tar files can't be reread cheaply
+        if (file_info.get('archive') and not file_info.get('container')
+                and archive_suffix(file_info['archive']) == '.zip'):
+            return hash_zip_member(file_info['archive'], file_info['member'])
+    except (OSError, KeyError, RuntimeError):
+        pass
+    return None
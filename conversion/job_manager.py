@@ -0,0 +1,301 @@
+"""Runs conversion jobs in the background on a pool shared by all users of the process."""
+
+import os
+import time
+import itertools
+import threading
+from settings import (
+    GUI_POOL_SIZE,
+    GUI_MAX_RUNNING_JOBS,
+    GUI_MAX_JOBS_PER_USER,
+    GUI_SMALL_JOB_FILES,
+    GUI_SMALL_JOB_BYTES,
+    GUI_ARTIFACT_TTL,
+    ADAPTIVE_CONCURRENCY
+)
+from utils import events
+from utils.events import ProgressTracker
+from utils.thread_manager import get_static_workers, get_concurrency_controller
+from utils.concurrency_controller import ConcurrencyController
+from .structure_handler import convert_with_structure
+
+# Job states
+QUEUED = 'queued'
+RUNNING = 'running'
+FINISHED = 'finished'
+FAILED = 'failed'
+
+class Job:
+    """A batch of files submitted by one user."""
+    
+    def __init__(self, job_id, owner, files_to_convert, output_folder, converter_factory, on_finish,
+                 sink=None):
+        """
+        Initialize the job.
+        
+        Args:
+            job_id (int): Unique id of the job.
+            owner (str): Id of the user (session) that submitted it.
+            files_to_convert (list): File info dictionaries to convert.
+            output_folder (str): Base directory for the job's output.
+            converter_factory (function): Factory function that returns a converter instance.
+            on_finish (function): Called as on_finish(job) on the job's thread after
+                converting (also after a failure); its return value becomes job.result.
+            sink (OutputSink, optional): Receives each output file while the job runs;
+                on_finish closes it.
+        """
+        self.id = job_id
+        self.owner = owner
+        self.files_to_convert = files_to_convert
+        self.output_folder = output_folder
+        self.converter_factory = converter_factory
+        self.on_finish = on_finish
+        self.sink = sink
+        self.total = len(files_to_convert)
+        self.size = sum(_size(f) for f in files_to_convert)
+        self.small = self.total <= GUI_SMALL_JOB_FILES and self.size <= GUI_SMALL_JOB_BYTES
+        self.state = QUEUED
+        self.tracker = ProgressTracker(scope=('job', job_id))
+        self.processed = 0
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+
+class JobManager:
+    """
+    Queues conversion jobs from every user and runs them on shared workers.
+    
+    At most GUI_MAX_RUNNING_JOBS jobs run at once, plus one fast-lane runner
+    that only takes small jobs, so a handful of files never waits behind a
+    huge upload. A user has at most GUI_MAX_JOBS_PER_USER jobs running; their
+    further jobs wait while other users' jobs go ahead. All running jobs share
+    one limit on concurrent conversions, so the number of LibreOffice
+    processes is bounded by the pool, not by the number of users.
+    """
+    
+    def __init__(self, result_ttl=GUI_ARTIFACT_TTL):
+        """
+        Initialize the manager; runner threads start with the first job.
+        
+        Args:
+            result_ttl (int, optional): Seconds a finished job is kept before it is forgotten.
+        """
+        self.result_ttl = result_ttl
+        if ADAPTIVE_CONCURRENCY:
+            self.controller = get_concurrency_controller()
+        else:
+            size = GUI_POOL_SIZE if GUI_POOL_SIZE > 0 else get_static_workers()
+            self.controller = ConcurrencyController(size, size, size)
+        self._jobs = {}
+        self._queued = []
+        self._running_by_owner = {}
+        self._ids = itertools.count(1)
+        self._condition = threading.Condition()
+        self._runners = []
+    
+    def submit(self, owner, files_to_convert, output_folder, converter_factory, on_finish=None,
+               sink=None):
+        """
+        Queue a job.
+        
+        Args:
+            owner (str): Id of the submitting user (session).
+            files_to_convert (list): File info dictionaries to convert.
+            output_folder (str): Base directory for the job's output.
+            converter_factory (function): Factory function that returns a converter instance.
+            on_finish (function, optional): See Job.
+            sink (OutputSink, optional): See Job.
+        
+        Returns:
+            Job: The queued job.
+        """
+        with self._condition:
+            self._expire()
+            job = Job(next(self._ids), owner, files_to_convert, output_folder, converter_factory,
+                      on_finish, sink)
+            self._jobs[job.id] = job
+            self._queued.append(job)
+            self._start_runners()
+            self._condition.notify_all()
+        return job
+    
+    def get(self, job_id):
+        """Return a job by id, or None if it is unknown or expired."""
+        with self._condition:
+            return self._jobs.get(job_id)
+    
+    def forget(self, job_id):
+        """
+        Drop a finished job, or cancel a job that hasn't started yet.
+        
+        Args:
+            job_id (str): ID of the job.
+        
+        Returns:
+            bool: True if the job was dropped, False if it is running or unknown.
+        """
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None or job.state == RUNNING:
+                return False
+            if job.state == QUEUED:
+                self._queued.remove(job)
+            del self._jobs[job_id]
+            return True
+    
+    def cancel(self, job_id):
+        """
+        Cancel a job that hasn't started yet.
+        
+        Args:
+            job_id (str): ID of the job.
+        
+        Returns:
+            bool: True if the job was cancelled, False if it has started or is unknown.
+        """
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None or job.state != QUEUED:
+                return False
+            self._queued.remove(job)
+            del self._jobs[job_id]
+            return True
+    
+    def position(self, job):
+        """
+        Return how many jobs will start before a queued job (0 = next).
+        
+        Args:
+            job (Job): A queued job.
+        
+        Returns:
+            int: Number of jobs ahead of it in its lane.
+        """
+        with self._condition:
+            ahead = 0
+            for queued in self._queued:
+                if queued is job:
+                    return ahead
+                if queued.small or not job.small:
+                    ahead += 1
+            return 0
+    
+    def active_jobs(self):
+        """Return the jobs that are queued or running."""
+        with self._condition:
+            return [job for job in self._jobs.values() if job.finished is None]
+    
+    def status(self):
+        """Return the number of queued and running jobs and the conversion limit."""
+        with self._condition:
+            running = sum(self._running_by_owner.values())
+            return {'queued': len(self._queued), 'running': running,
+                    'conversion_slots': self.controller.limit, 'converting': self.controller.in_flight}
+    
+    def _start_runners(self):
+        """Start the runner threads (condition held)."""
+        if self._runners:
+            return
+        lanes = [False] * max(1, GUI_MAX_RUNNING_JOBS) + [True]
+        for number, fast_lane in enumerate(lanes, 1):
+            runner = threading.Thread(target=self._run, args=(fast_lane,), daemon=True,
+                                      name=f"job-runner-{'fast' if fast_lane else number}")
+            runner.start()
+            self._runners.append(runner)
+    
+    def _next_job(self, fast_lane):
+        """Take the first job this runner may start, or None (condition held)."""
+        for job in self._queued:
+            if fast_lane and not job.small:
+                continue
+            if self._running_by_owner.get(job.owner, 0) >= max(1, GUI_MAX_JOBS_PER_USER):
+                continue
+            self._queued.remove(job)
+            self._running_by_owner[job.owner] = self._running_by_owner.get(job.owner, 0) + 1
+            job.state = RUNNING
+            job.started = time.time()
+            return job
+        return None
+    
+    def _run(self, fast_lane):
+        """Run jobs until the process exits."""
+        while True:
+            with self._condition:
+                job = self._next_job(fast_lane)
+                while job is None:
+                    self._condition.wait()
+                    job = self._next_job(fast_lane)
+            
+            self._execute(job)
+            
+            with self._condition:
+                self._running_by_owner[job.owner] -= 1
+                if not self._running_by_owner[job.owner]:
+                    del self._running_by_owner[job.owner]
+                # A slot for this user (or a runner) became free
+                self._condition.notify_all()
+    
+    def _execute(self, job):
+        """Convert a job's files, reporting progress through the job's tracker."""
+        events.set_scope(job.tracker.scope)
+        events.bus.subscribe(job.tracker)
+        try:
+            job.tracker.started = time.monotonic()
+            job.processed = convert_with_structure(job.files_to_convert, job.output_folder,
+                                                   job.converter_factory, controller=self.controller,
+                                                   sink=job.sink)
+        except Exception as e:
+            job.error = e
+        finally:
+            events.bus.unsubscribe(job.tracker)
+            events.set_scope(None)
+        
+        if job.on_finish is not None:
+            try:
+                job.result = job.on_finish(job)
+            except Exception as e:
+                job.error = job.error or e
+        job.files_to_convert = None
+        job.finished = time.time()
+        job.state = FAILED if job.error is not None else FINISHED
+    
+    def _expire(self):
+        """Forget finished jobs older than the result TTL (condition held)."""
+        cutoff = time.time() - self.result_ttl
+        for job_id, job in list(self._jobs.items()):
+            if job.finished is not None and job.finished < cutoff:
+                del self._jobs[job_id]
+
+def _size(file_info):
+    """Return an input's size in bytes (0 if unknown)."""
+    if file_info.get('size') is not None:
+        return file_info['size']
+    try:
+        return os.path.getsize(file_info['path'])
+    except (OSError, TypeError):
+        return 0
+
+_manager = None
+_manager_lock = threading.Lock()
+
+def get_job_manager(result_ttl=GUI_ARTIFACT_TTL):
+    """
+    Return the process-wide job manager, creating it on first use.
+    
+    Streamlit runs every browser session in the same process, so all sessions
+    share this manager and its conversion pool.
+    
+    Args:
+        result_ttl (int, optional): Seconds finished jobs are kept; only used
+            when the manager is created.
+    
+    Returns:
+        JobManager: The shared manager.
+    """
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager(result_ttl)
+        return _manager
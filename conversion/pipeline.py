@@ -0,0 +1,322 @@
+"""Runs file discovery and conversion concurrently through a bounded work queue."""
+
+import os
+import time
+from settings import (
+    CONVERTIBLE_EXTENSIONS,
+    SCRATCH_SPACE_BUDGET,
+    INCREMENTAL_MODE,
+    INCREMENTAL_USE_HASH,
+    INCREMENTAL_DELETE_STALE,
+    DEDUPLICATE_INPUTS,
+    JOURNAL_ENABLED
+)
+from file_utils.zip_handler import ZipStager, ScratchBudget
+from file_utils.manifest import Manifest, get_manifest_key
+from file_utils.journal import Journal
+from utils import metrics, events
+from .scheduler import TaskScheduler
+from .dedup import Deduplicator
+
+def find_output(path, output_dir, converter):
+    """
+    Return the output produced for a file (PDF or copy).
+    
+    Args:
+        path (str): Path to the input file.
+        output_dir (str): Directory the output was written to.
+        converter (DocumentConverter): Converter that processed the file.
+    
+    Returns:
+        str: Path to the output file, or None if there is none.
+    """
+    if os.path.splitext(path)[1].lower() in CONVERTIBLE_EXTENSIONS:
+        pdf_path = converter.get_output_path(path)
+        if os.path.exists(pdf_path):
+            return pdf_path
+    copied_path = os.path.join(output_dir, os.path.basename(path))
+    return copied_path if os.path.exists(copied_path) else None
+
+def _signature(path):
+    """Return what identifies a file on disk, or None if it is missing."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+def _timed_discovery(file_infos):
+    """Yield file infos, recording how long each one took to find."""
+    iterator = iter(file_infos)
+    while True:
+        started = time.monotonic()
+        file_info = next(iterator, None)
+        if file_info is None:
+            return
+        metrics.record('discover', time.monotonic() - started, source=file_info['source'])
+        yield file_info
+
+class ConversionPipeline:
+    """
+    Converts files while they are still being discovered.
+    
+    The caller's iterable of file infos (for example a directory walk) is
+    consumed on the current thread: unchanged files are skipped in incremental
+    mode, zip members are extracted, and each file is handed to a run-wide
+    TaskScheduler. The scheduler queue and the scratch space budget provide
+    back-pressure, so memory and disk use stay bounded.
+    
+    With JOURNAL_ENABLED, every task's state is journaled next to the output
+    folder. A resumed pipeline skips the tasks an interrupted run finished.
+    
+    With an output sink, every output (including those of skipped files) is
+    handed to it as soon as it exists, e.g. to build the download archive
+    while conversion is still running.
+    """
+    
+    def __init__(self, base_output_folder, converter_factory, num_workers=None, controller=None,
+                 resume=False, sink=None):
+        """
+        Initialize the pipeline.
+        
+        Args:
+            base_output_folder (str): Base directory for output files.
+            converter_factory (function): Factory function that returns a converter instance.
+            num_workers (int, optional): Number of conversion workers. Defaults to
+                get_max_workers(), or 1 if multithreading is disabled.
+            controller (ConcurrencyController, optional): Limit on concurrent conversions
+                shared with other pipelines (see TaskScheduler).
+            resume (bool, optional): Continue the journal of an interrupted run in
+                this output folder instead of starting a new one.
+            sink (OutputSink, optional): Receives each output file; the caller closes it.
+        """
+        self.base_output_folder = base_output_folder
+        self.converter_factory = converter_factory
+        self.scheduler = TaskScheduler(base_output_folder, converter_factory,
+                                       num_workers, on_complete=self._on_complete,
+                                       controller=controller, on_start=self._on_start)
+        self.discovered = 0
+        self.skipped = 0
+        self.duplicate_bytes = 0
+        self.resume = resume
+        self.resumed = 0
+        self.sink = sink
+        self.journal = None
+        self._keys = {}
+        self._previous = {}
+        self._stager = None
+        self._manifest = None
+        self._converter_version = None
+        self._dedup = None
+        self._seen_keys = set()
+        self._sources = set()
+    
+    def run(self, file_infos):
+        """
+        Convert all files produced by the given iterable.
+        
+        Args:
+            file_infos (iterable): File info dictionaries, consumed lazily.
+        
+        Returns:
+            int: Total number of files successfully processed.
+        """
+        if INCREMENTAL_MODE:
+            self._manifest = Manifest(self.base_output_folder, use_hash=INCREMENTAL_USE_HASH)
+            self._converter_version = self.converter_factory(self.base_output_folder).get_version()
+        self._open_journal()
+        self._stager = ZipStager(ScratchBudget(SCRATCH_SPACE_BUDGET))
+        if DEDUPLICATE_INPUTS:
+            self._dedup = Deduplicator(self.base_output_folder, on_placed=self._on_duplicate_placed)
+        
+        if metrics.enabled:
+            file_infos = _timed_discovery(file_infos)
+        
+        self.scheduler.start()
+        try:
+            self._produce(file_infos)
+            if self.journal is not None:
+                self.journal.discovery_complete()
+        finally:
+            self.scheduler.join()
+            self._stager.close()
+            if self.journal is not None:
+                self.journal.close()
+            metrics.flush()
+        
+        # Only once the workers are done: they record outputs in the manifest
+        if self._manifest is not None and INCREMENTAL_DELETE_STALE:
+            self._remove_stale()
+        
+        if self.resumed:
+            print(f"Resumed run: {self.resumed} file(s) finished earlier were skipped.")
+        
+        if self._manifest is not None:
+            print(f"Incremental run: {self.skipped} unchanged file(s) skipped.")
+            self._manifest.save()
+        
+        if self._dedup is not None and self._dedup.duplicates:
+            self.duplicate_bytes = self._dedup.saved_bytes
+            print(f"Duplicates: {self._dedup.duplicates} identical document(s) "
+                  f"({self._dedup.saved_bytes / (1024 * 1024):.1f} MB) not converted again.")
+            return self.scheduler.processed + self._dedup.placed
+        return self.scheduler.processed
+    
+    def unfinished(self):
+        """
+        Return the files the interrupted run being resumed didn't finish.
+        
+        Returns:
+            list: File info dictionaries to pass to run(), or an empty list
+                if there is no journal.
+        """
+        self._open_journal()
+        if self.journal is None:
+            return []
+        if not self.journal.previous_discovery_complete:
+            print("Warning: The interrupted run hadn't found all its inputs yet; "
+                  "pass the same inputs again to resume the rest.")
+        return self.journal.unfinished()
+    
+    def _open_journal(self):
+        """Open the journal of the output folder, once."""
+        if JOURNAL_ENABLED and self.journal is None:
+            self.journal = Journal(self.base_output_folder, resume=self.resume)
+            if self.journal.reclaimed:
+                print(f"Reclaimed {self.journal.reclaimed} file(s) left running by an interrupted run.")
+    
+    def _produce(self, file_infos):
+        """Feed discovered files to the scheduler."""
+        for file_info in file_infos:
+            self.discovered += 1
+            key = None
+            
+            if self._manifest is not None:
+                # Before any skip, so files finished earlier aren't taken for deleted ones
+                key = get_manifest_key(file_info)
+                self._seen_keys.add(key)
+                self._sources.add(file_info['source'])
+            
+            if self.journal is not None:
+                key = key or get_manifest_key(file_info)
+                if self.journal.is_done(key):
+                    # Finished by the interrupted run this one resumes
+                    self.resumed += 1
+                    self._add_output(self.journal.get_output_path(key))
+                    events.publish(events.FINISHED, file_info['path'] or file_info['internal_path'],
+                                   outcome=events.UNCHANGED)
+                    continue
+            
+            if self._manifest is not None:
+                if self._manifest.is_unchanged(key, file_info, self._converter_version):
+                    self.skipped += 1
+                    self._add_output(self._manifest.get_output_path(key))
+                    metrics.count('files', outcome='unchanged')
+                    events.publish(events.FINISHED, file_info['path'] or file_info['internal_path'],
+                                   outcome=events.UNCHANGED)
+                    continue
+            
+            if self.journal is not None:
+                self.journal.pending(key, file_info)
+            
+            # Blocks while the scratch space budget is used up
+            if file_info.get('archive') and not self._stager.stage(file_info):
+                continue
+            
+            # Identical documents are converted once; the output is placed for the others
+            if (self._dedup is not None
+                    and os.path.splitext(file_info['path'])[1].lower() in CONVERTIBLE_EXTENSIONS
+                    and self._dedup.claim(file_info)):
+                if file_info.get('archive'):
+                    self._stager.release(file_info)
+                continue
+            
+            if self.journal is not None:
+                # Staged members get a new path, so remember the key by identity
+                self._keys[id(file_info)] = key
+            
+            if self._manifest is not None:
+                # The earlier output is only replaced once the new one exists
+                previous_path = self._manifest.get_output_path(key)
+                if previous_path is not None:
+                    self._previous[id(file_info)] = (previous_path, _signature(previous_path))
+            
+            # Blocks while the scheduler queue is full
+            self.scheduler.submit(file_info)
+    
+    def _remove_stale(self):
+        """Delete the outputs of files that disappeared from the sources scanned this run."""
+        stale_keys = self._manifest.stale_keys(self._sources, self._seen_keys)
+        for key in stale_keys:
+            self._manifest.remove_output(key)
+        if stale_keys:
+            print(f"Removed {len(stale_keys)} output(s) of deleted input file(s).")
+    
+    def _add_output(self, output_path):
+        """Hand an output file to the sink, if there is one."""
+        if self.sink is not None and output_path is not None:
+            self.sink.add(output_path, os.path.relpath(output_path, self.base_output_folder))
+    
+    def _on_duplicate_placed(self, file_info, output_path):
+        """Record the output placed for a duplicate in the manifest, journal and sink."""
+        self._add_output(output_path)
+        if self.journal is not None:
+            self.journal.finished(get_manifest_key(file_info), output_path)
+        if self._manifest is not None:
+            self._manifest.record(get_manifest_key(file_info), file_info,
+                                  output_path, self._converter_version)
+    
+    def _on_start(self, file_infos):
+        """Journal files as running."""
+        if self.journal is not None:
+            self.journal.running([self._keys[id(f)] for f in file_infos])
+    
+    def _on_complete(self, file_infos, output_dir, converter):
+        """Record processed files in the manifest, journal and sink, place duplicates and delete staged zip members."""
+        try:
+            outputs = {}
+            if converter is not None and (self._manifest is not None or self._dedup is not None
+                                          or self.journal is not None or self.sink is not None):
+                for file_info in file_infos:
+                    outputs[id(file_info)] = self._find_output(file_info, output_dir, converter)
+                    self._add_output(outputs[id(file_info)])
+            
+            if self.journal is not None:
+                for file_info in file_infos:
+                    self.journal.finished(self._keys.pop(id(file_info)), outputs.get(id(file_info)))
+            
+            if self._dedup is not None:
+                self._dedup.complete(file_infos, outputs)
+            if self._manifest is not None:
+                for file_info in file_infos:
+                    output_path = outputs.get(id(file_info))
+                    if output_path:
+                        self._manifest.record(get_manifest_key(file_info), file_info,
+                                              output_path, self._converter_version)
+        finally:
+            for file_info in file_infos:
+                self._previous.pop(id(file_info), None)
+                if file_info.get('archive'):
+                    self._stager.release(file_info)
+    
+    def _find_output(self, file_info, output_dir, converter):
+        """
+        Return the output produced for a file, replacing the one of an earlier run.
+        
+        A changed file's earlier output is kept while it is reconverted. If the
+        conversion wrote nothing new, it isn't taken for this run's output; once
+        there is a new output elsewhere (e.g. a copy after a failed conversion),
+        the earlier one is deleted.
+        """
+        output_path = find_output(file_info['path'], output_dir, converter)
+        previous = self._previous.pop(id(file_info), None)
+        if previous is None:
+            return output_path
+        
+        previous_path, previous_signature = previous
+        if output_path == previous_path and _signature(output_path) == previous_signature:
+            copied_path = os.path.join(output_dir, os.path.basename(file_info['path']))
+            output_path = copied_path if copied_path != previous_path and os.path.exists(copied_path) else None
+        if output_path is not None and output_path != previous_path and os.path.isfile(previous_path):
+            os.remove(previous_path)
+        return output_path
@@ -0,0 +1,252 @@
+"""Run-wide task scheduler serving every output directory from one worker pool."""
+
+import os
+import time
+import queue
+import functools
+import itertools
+import threading
+from settings import (
+    PIPELINE_QUEUE_SIZE,
+    USE_MULTITHREADING,
+    BATCH_CONVERSIONS,
+    BATCH_MAX_FILES,
+    COST_AWARE_SCHEDULING,
+    LONG_JOB_SECONDS,
+    ADAPTIVE_CONCURRENCY
+)
+from utils.thread_manager import get_max_workers, mark_worker_thread, get_concurrency_controller
+from utils.cost_model import get_cost_model
+from utils import metrics, events
+
+# Queue marker telling a worker that no more tasks will be submitted
+_DONE = object()
+
+# Markers sort after every real task
+_DONE_PRIORITY = float('inf')
+
+def get_output_dir(file_info, base_output_folder):
+    """
+    Return the directory a file's output is written to, mirroring its source structure.
+    
+    Args:
+        file_info (WorkItem): File info with 'source' and 'internal_path'.
+        base_output_folder (str): Base directory for output files.
+    
+    Returns:
+        str: The output directory for the file.
+    """
+    return _output_dir(base_output_folder, file_info.source, file_info.internal_dir)
+
+@functools.lru_cache(maxsize=4096)
+def _output_dir(base_output_folder, source, internal_dir):
+    """Join an output directory once per directory; files of a directory share the string."""
+    if source == 'direct':
+        return base_output_folder
+    source_folder = os.path.join(base_output_folder, source)
+    return os.path.join(source_folder, internal_dir) if internal_dir else source_folder
+
+class TaskScheduler:
+    """
+    Converts files from any number of sources and directories with one pool.
+    
+    Every file is a task on a single bounded queue, regardless of which source
+    or output directory it belongs to, and a fixed set of worker threads serves
+    the queue for the whole run. Workers take a fair share of the waiting tasks
+    at once so files of the same directory can still be converted in batches.
+    
+    With COST_AWARE_SCHEDULING, files predicted to take longer than
+    LONG_JOB_SECONDS jump the queue, longest first, so a huge file found late
+    does not become the tail of the run. Shorter files keep their order. Each
+    group of files handed to a converter is timed to teach the cost model.
+    
+    With ADAPTIVE_CONCURRENCY, a worker takes a slot from the concurrency
+    controller for each task it takes, so only as many conversions run as the
+    host currently has room for. A controller can also be passed in, so that
+    several schedulers running at once share one limit.
+    """
+    
+    def __init__(self, base_output_folder, converter_factory, num_workers=None, on_complete=None,
+                 controller=None, on_start=None):
+        """
+        Initialize the scheduler. Workers are started by start().
+        
+        Args:
+            base_output_folder (str): Base directory for output files.
+            converter_factory (function): Factory function that returns a converter instance.
+            num_workers (int, optional): Number of worker threads. Defaults to
+                get_max_workers(), or 1 if multithreading is disabled.
+            on_complete (function, optional): Called as on_complete(file_infos, output_dir, converter)
+                after each group of files has been processed (converter is None if it failed).
+            controller (ConcurrencyController, optional): Shared limit on concurrent
+                conversions. Defaults to the process-wide controller with ADAPTIVE_CONCURRENCY.
+            on_start (function, optional): Called as on_start(file_infos) right before a
+                group of files is handed to a converter.
+        """
+        if num_workers is None:
+            num_workers = get_max_workers() if USE_MULTITHREADING else 1
+        
+        self.base_output_folder = base_output_folder
+        self.converter_factory = converter_factory
+        self.num_workers = num_workers
+        self.on_complete = on_complete
+        self.on_start = on_start
+        self.processed = 0
+        self._queue = queue.PriorityQueue(maxsize=PIPELINE_QUEUE_SIZE)
+        self._sequence = itertools.count()
+        self._cost_model = get_cost_model() if COST_AWARE_SCHEDULING else None
+        if controller is None and ADAPTIVE_CONCURRENCY and num_workers > 1:
+            controller = get_concurrency_controller()
+        self._controller = controller
+        self._scope = None
+        self._workers = []
+        self._lock = threading.Lock()
+    
+    def start(self):
+        """Start the worker threads."""
+        # Workers publish their events in the scope of the thread that started them
+        self._scope = events.get_scope()
+        if self._controller is not None:
+            self._controller.publish()
+            print(f"Starting {self.num_workers} worker threads, "
+                  f"{self._controller.limit} converting at first (adaptive).")
+        else:
+            print(f"Starting {self.num_workers} worker threads.")
+        self._workers = [
+            threading.Thread(target=self._work, daemon=True)
+            for _ in range(self.num_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+    
+    def submit(self, file_info):
+        """
+        Queue a file for processing, blocking while the queue is full.
+        
+        Args:
+            file_info (dict): File info with 'path', 'source' and 'internal_path'.
+        """
+        priority = 0
+        if self._cost_model is not None:
+            cost = self._cost_model.predict(file_info['path'], file_info.get('size'))
+            if cost >= LONG_JOB_SECONDS:
+                priority = -cost
+        self._queue.put((priority, next(self._sequence), time.monotonic(), file_info))
+        events.publish(events.QUEUED, file_info['path'], size=file_info.get('size'))
+    
+    def join(self):
+        """
+        Wait for all submitted files to be processed and stop the workers.
+        
+        Returns:
+            int: Total number of files successfully processed.
+        """
+        # One marker per worker; each worker stops after taking one
+        for _ in self._workers:
+            self._queue.put((_DONE_PRIORITY, next(self._sequence), 0, _DONE))
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+        
+        if self._cost_model is not None:
+            self._cost_model.save()
+        return self.processed
+    
+    def _work(self):
+        """Take tasks off the queue and process them until told to stop."""
+        mark_worker_thread()
+        events.set_scope(self._scope)
+        
+        while True:
+            _, _, submitted, file_info = self._queue.get()
+            if file_info is _DONE:
+                return
+            # Only once there is a task: an idle worker holding a slot would
+            # count as converting, and keep other runs from converting
+            if self._controller is not None:
+                self._controller.acquire()
+            
+            metrics.record('queue_wait', time.monotonic() - submitted)
+            batch = [file_info]
+            stop = False
+            if BATCH_CONVERSIONS:
+                # Take a fair share of whatever else is waiting, for batched conversion
+                workers = self._controller.limit if self._controller is not None else self.num_workers
+                limit = min(BATCH_MAX_FILES, max(1, self._queue.qsize() // workers))
+                while len(batch) < limit:
+                    try:
+                        _, _, submitted, next_info = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if next_info is _DONE:
+                        stop = True
+                        break
+                    metrics.record('queue_wait', time.monotonic() - submitted)
+                    batch.append(next_info)
+            
+            try:
+                self._run_batch(batch)
+            except Exception as e:
+                # A dead worker would leave submit() and join() blocked on the queue
+                for file_info in batch:
+                    events.publish(events.FAILED, file_info['path'] or file_info['internal_path'],
+                                   message=f"error processing files: {e}")
+            if stop:
+                return
+    
+    def _run_batch(self, batch):
+        """Process a batch, holding the conversion slot taken for it until it is done."""
+        if self._controller is None:
+            self._process_batch(batch)
+            return
+        
+        started = time.monotonic()
+        predicted = None
+        try:
+            # Predict up front: staged zip members lose their path once processed
+            predicted = self._predict(batch)
+            self._process_batch(batch)
+        finally:
+            self._controller.release(time.monotonic() - started, predicted)
+    
+    def _predict(self, file_infos):
+        """Return the predicted seconds for processing a batch of files."""
+        model = self._cost_model or get_cost_model()
+        return sum(model.predict(f['path'] or f['internal_path'], f.get('size')) for f in file_infos)
+    
+    def _process_batch(self, file_infos):
+        """Convert a batch of files, grouped by output directory."""
+        by_dir = {}
+        for file_info in file_infos:
+            output_dir = get_output_dir(file_info, self.base_output_folder)
+            by_dir.setdefault(output_dir, []).append(file_info)
+        
+        for output_dir, dir_files in by_dir.items():
+            converter = None
+            try:
+                os.makedirs(output_dir, exist_ok=True)
+                converter = self.converter_factory(output_dir)
+                if self.on_start is not None:
+                    self.on_start(dir_files)
+                # Sized up front: staged zip members lose their path once processed
+                sized = [(f['path'] or f['internal_path'], f.get('size') or 0) for f in dir_files]
+                started = time.monotonic()
+                with metrics.span('process', files=len(dir_files)):
+                    processed = converter.process([f['path'] for f in dir_files])
+                if self._cost_model is not None:
+                    self._cost_model.observe_group(sized, time.monotonic() - started)
+                with self._lock:
+                    self.processed += processed
+            except Exception as e:
+                for file_info in dir_files:
+                    events.publish(events.FAILED, file_info['path'], message=f"error processing files: {e}")
+                converter = None
+            finally:
+                if self.on_complete is not None:
+                    try:
+                        self.on_complete(dir_files, output_dir, converter)
+                    except Exception as e:
+                        # Keep going with the batch's other directories
+                        for file_info in dir_files:
+                            events.publish(events.FAILED, file_info['path'] or file_info['internal_path'],
+                                           message=f"error recording results: {e}")
@@ -1,62 +1,66 @@
 """Handles conversion while preserving source structure."""
 
-import os
-from settings import COPY_NON_CONVERTIBLE_FILES
+from settings import COPY_NON_CONVERTIBLE_FILES, COST_AWARE_SCHEDULING, LONG_JOB_SECONDS
+from utils.cost_model import get_cost_model, format_duration
+from utils import events
+from .pipeline import ConversionPipeline
 
-def convert_with_structure(files_to_convert, base_output_folder, converter_factory):
+def convert_with_structure(files_to_convert, base_output_folder, converter_factory, controller=None,
+                           sink=None):
     """
     Convert files while preserving their source and internal structure.
     
+    All files, from every source and directory, are served by one run-wide
+    worker pool rather than one pool per directory.
+    
     Args:
-        files_to_convert (list): List of file info dictionaries.
+        files_to_convert (list): List of WorkItems.
         base_output_folder (str): Base directory for output files.
         converter_factory (function): Factory function that returns a converter instance.
+        controller (ConcurrencyController, optional): Limit on concurrent conversions
+            shared with other runs in this process.
+        sink (OutputSink, optional): Receives each output file as soon as it is written.
         
     Returns:
         int: Total number of files successfully processed.
     """
-    # Process files based on their source
+    # Group by source, then output directory, in one pass so neighbouring
+    # files can be batched; both keys are interned strings of the items
     by_source = {}
     for file_info in files_to_convert:
-        source = file_info['source']
-        if source not in by_source:
-            by_source[source] = []
-        by_source[source].append(file_info)
+        by_dir = by_source.get(file_info.source)
+        if by_dir is None:
+            by_dir = by_source[file_info.source] = {}
+        dir_files = by_dir.get(file_info.internal_dir)
+        if dir_files is None:
+            dir_files = by_dir[file_info.internal_dir] = []
+        dir_files.append(file_info)
     
-    total_processed = 0
     action = "Processing" if COPY_NON_CONVERTIBLE_FILES else "Converting"
     
-    # Convert files, organizing by source
-    for source, files in by_source.items():
+    # Order tasks by output directory
+    ordered = []
+    for source, by_dir in by_source.items():
+        count = sum(len(dir_files) for dir_files in by_dir.values())
         if source == 'direct':
-            # Direct files go to the base output folder
-            print(f"\n{action} {len(files)} directly specified file(s)...")
-            converter = converter_factory(base_output_folder)
-            paths = [f['path'] for f in files]
-            total_processed += converter.process(paths)
+            print(f"{action} {count} directly specified file(s)...")
         else:
-            # Process files from zip archives or directories
-            print(f"\n{action} {len(files)} file(s) from source: {source}")
-            
-            # Create subfolder for this source
-            source_folder = os.path.join(base_output_folder, source)
-            os.makedirs(source_folder, exist_ok=True)
-            
-            # Group files by directory to minimize converter instantiations
-            by_dir = {}
-            for file_info in files:
-                internal_dir = os.path.dirname(file_info['internal_path'])
-                output_dir = os.path.join(source_folder, internal_dir) if internal_dir else source_folder
-                if output_dir not in by_dir:
-                    by_dir[output_dir] = []
-                by_dir[output_dir].append(file_info)
-            
-            # Process each directory
-            for output_dir, dir_files in by_dir.items():
-                os.makedirs(output_dir, exist_ok=True)
-                converter = converter_factory(output_dir)
-                paths = [f['path'] for f in dir_files]
-                processed = converter.process(paths)
-                total_processed += processed
+            print(f"{action} {count} file(s) from source: {source}")
+        for dir_files in by_dir.values():
+            ordered.extend(dir_files)
+    
+    pipeline = ConversionPipeline(base_output_folder, converter_factory, controller=controller, sink=sink)
+    
+    if COST_AWARE_SCHEDULING:
+        # Submit long jobs first (the scheduler queue is bounded, so order matters)
+        model = get_cost_model()
+        costs = {
+            id(f): model.predict(f['path'] or f['internal_path'], f.get('size'))
+            for f in ordered
+        }
+        estimate = model.estimate_duration(list(costs.values()), pipeline.scheduler.num_workers)
+        print(f"Estimated processing time: ~{format_duration(estimate)}")
+        ordered.sort(key=lambda f: -costs[id(f)] if costs[id(f)] >= LONG_JOB_SECONDS else 0)
     
-    return total_processed
\ No newline at end of file
+    events.publish(events.PLANNED, count=len(ordered))
+    return pipeline.run(ordered)
@@ -1,10 +1,21 @@
 """Base class for document converters."""
 
+import os
 from abc import ABC, abstractmethod
 
+class ConversionError(Exception):
+    """Raised when a converter backend fails to convert a file."""
+    
+    def __init__(self, message, stderr=None):
+        super().__init__(message)
+        self.stderr = stderr or message
+
 class DocumentConverter(ABC):
     """Abstract base class for document converters."""
     
+    # Options that change the produced PDF (part of the conversion cache key)
+    export_options = 'pdf'
+    
     def __init__(self, output_folder):
         """
         Initialize the document converter.
@@ -14,6 +25,28 @@ class DocumentConverter(ABC):
         """
         self.output_folder = output_folder
     
+    def get_output_path(self, path):
+        """
+        Return the path the converted PDF for a file is written to.
+        
+        Args:
+            path (str): Path to the input file.
+            
+        Returns:
+            str: Path of the PDF in the output folder.
+        """
+        file_name = os.path.splitext(os.path.basename(path))[0] + ".pdf"
+        return os.path.join(self.output_folder, file_name)
+    
+    def get_version(self):
+        """
+        Return a string identifying the conversion backend and its version.
+        
+        Returns:
+            str: Version string, empty if unknown.
+        """
+        return ''
+    
     @abstractmethod
     def process(self, file_paths):
         """
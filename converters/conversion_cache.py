@@ -0,0 +1,271 @@
+"""Content-addressed on-disk cache of converted PDFs."""
+
+import os
+import hashlib
+import shutil
+import tempfile
+import threading
+from .base_converter import DocumentConverter
+from file_utils.file_hash import hash_file
+from file_utils.placement import place_file
+from utils import metrics, events
+from settings import (
+    CONVERTIBLE_EXTENSIONS,
+    CONVERSION_CACHE_DIR,
+    CONVERSION_CACHE_MAX_BYTES
+)
+
+# Counters for the run summary, shared by every caching converter
+_stats = {'hits': 0, 'misses': 0, 'stored': 0, 'evicted': 0}
+_stats_lock = threading.Lock()
+
+def _count(name, amount=1):
+    """Increment one of the cache counters."""
+    with _stats_lock:
+        _stats[name] += amount
+
+def get_cache_stats():
+    """
+    Return the cache counters for the current run.
+
+    Returns:
+        dict: Number of cache 'hits', 'misses', 'stored' and 'evicted' entries.
+    """
+    with _stats_lock:
+        return dict(_stats)
+
+class ConversionCache:
+    """
+    Stores PDFs under the hash of their input and conversion settings.
+
+    Entries are published atomically (write to a temp file, then rename), so
+    several processes, or hosts sharing a mount, can use the same directory.
+    An entry's modification time records its last use for LRU eviction, so
+    hits are served as clones or copies that don't share the entry's inode.
+    """
+
+    def __init__(self, cache_dir, max_bytes):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir (str): Directory holding the cache entries.
+            max_bytes (int): Size budget; least recently used entries are evicted beyond it.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._size = None
+        self._lock = threading.Lock()
+
+    def make_key(self, path, converter_name, converter_version, export_options):
+        """
+        Hash a file's content together with everything that affects its PDF.
+
+        Args:
+            path (str): Path to the input file.
+            converter_name (str): Name of the converter.
+            converter_version (str): Version of the conversion backend.
+            export_options (str): Export options used for the conversion.
+
+        Returns:
+            str: Hex digest identifying the conversion result.
+        """
+        identity = f"{converter_name}\0{converter_version}\0{export_options}\0{hash_file(path)}"
+        return hashlib.sha256(identity.encode()).hexdigest()
+
+    def _entry_path(self, key):
+        """Return the path of the cache entry for a key."""
+        return os.path.join(self.cache_dir, key[:2], key + ".pdf")
+
+    def fetch(self, key, dest_path):
+        """
+        Place a cached PDF at the destination path if the key is cached.
+
+        The PDF is cloned where the filesystem supports it (reflink) and
+        copied otherwise, never hard-linked: a shared inode would let the
+        LRU timestamp change the output's modification time, and editing
+        the output change the cached PDF.
+
+        Args:
+            key (str): Cache key from make_key().
+            dest_path (str): Where the PDF should be placed.
+
+        Returns:
+            bool: True on a cache hit, False otherwise.
+        """
+        entry = self._entry_path(key)
+        try:
+            # Mark the entry as recently used
+            os.utime(entry)
+        except OSError:
+            return False
+
+        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+        try:
+            place_file(entry, dest_path, 'reflink')
+            return True
+        except OSError:
+            # Entry evicted in the meantime
+            return False
+
+    def store(self, key, pdf_path):
+        """
+        Publish a freshly converted PDF under the given key.
+
+        Args:
+            key (str): Cache key from make_key().
+            pdf_path (str): Path of the converted PDF.
+        """
+        entry = self._entry_path(key)
+        if os.path.exists(entry):
+            return
+
+        entry_dir = os.path.dirname(entry)
+        os.makedirs(entry_dir, exist_ok=True)
+
+        fd, temp_path = tempfile.mkstemp(dir=entry_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as out, open(pdf_path, 'rb') as src:
+                shutil.copyfileobj(src, out)
+            os.replace(temp_path, entry)
+        except OSError:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+
+        _count('stored')
+        with self._lock:
+            if self._size is not None:
+                self._size += os.path.getsize(entry)
+            if self._size is None or self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Remove least recently used entries until the cache fits its budget."""
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith('.pdf'):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(root, name))
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, os.path.join(root, name)))
+
+        total = sum(size for _, size, _ in entries)
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                _count('evicted')
+            except OSError:
+                # Already removed by another process
+                pass
+            total -= size
+
+        self._size = total
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_cache():
+    """
+    Return the process-wide conversion cache.
+
+    Returns:
+        ConversionCache: The shared cache instance.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ConversionCache(CONVERSION_CACHE_DIR, CONVERSION_CACHE_MAX_BYTES)
+        return _cache
+
+class CachingConverter(DocumentConverter):
+    """Serves conversions from the cache and forwards misses to another converter."""
+
+    def __init__(self, converter, converter_name):
+        """
+        Initialize the caching converter.
+
+        Args:
+            converter (DocumentConverter): Converter used for cache misses.
+            converter_name (str): Name of the wrapped converter (part of the cache key).
+        """
+        super().__init__(converter.output_folder)
+        self.converter = converter
+        self.converter_name = converter_name
+        self.cache = get_cache()
+
+    def get_output_path(self, path):
+        """Return the PDF path used by the wrapped converter."""
+        return self.converter.get_output_path(path)
+
+    def get_version(self):
+        """Return the wrapped converter's version."""
+        return self.converter.get_version()
+
+    def process(self, file_paths):
+        """
+        Convert documents, reusing cached PDFs where possible.
+
+        Args:
+            file_paths (list): List of file paths to convert.
+
+        Returns:
+            int: Number of files successfully converted (including cache hits).
+        """
+        hits = 0
+        misses = []
+        keys = {}
+
+        for path in file_paths:
+            if os.path.splitext(path)[1].lower() not in CONVERTIBLE_EXTENSIONS:
+                misses.append(path)
+                continue
+
+            try:
+                key = self.cache.make_key(path, self.converter_name, self.get_version(),
+                                          self.converter.export_options)
+            except OSError:
+                misses.append(path)
+                continue
+
+            with metrics.span('cache_fetch'):
+                hit = self.cache.fetch(key, self.get_output_path(path))
+            if hit:
+                metrics.count('files', ext=os.path.splitext(path)[1].lower(), outcome='cached')
+                events.publish(events.CACHED, path)
+                hits += 1
+            else:
+                keys[path] = (key, self._output_signature(path))
+                misses.append(path)
+
+        _count('hits', hits)
+        _count('misses', len(keys))
+
+        processed = self.converter.process(misses) if misses else 0
+
+        # Cache every PDF that was actually produced by this run
+        for path, (key, signature_before) in keys.items():
+            signature = self._output_signature(path)
+            if signature is not None and signature != signature_before:
+                self.cache.store(key, self.get_output_path(path))
+
+        return hits + processed
+
+    def _output_signature(self, path):
+        """
+        Return what identifies the PDF for a file on disk, or None if missing.
+
+        The inode and size are compared too, so a new PDF is recognised on
+        filesystems with coarse modification times.
+        """
+        try:
+            stat = os.stat(self.get_output_path(path))
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
@@ -2,6 +2,9 @@
 
 from .base_converter import DocumentConverter
 from .libreoffice_converter import LibreOfficeConverter
+from .libreoffice_pool import PooledLibreOfficeConverter
+from .conversion_cache import CachingConverter
+from settings import CONVERSION_CACHE_ENABLED
 
 def get_converter(converter_name='libreoffice'):
     """
@@ -14,13 +17,21 @@ def get_converter(converter_name='libreoffice'):
         function: A factory function that creates and returns a converter instance.
     """
     converters = {
-        'libreoffice': lambda output_folder: LibreOfficeConverter(output_folder)
+        'libreoffice': lambda output_folder: LibreOfficeConverter(output_folder),
+        'libreoffice-pool': lambda output_folder: PooledLibreOfficeConverter(output_folder)
         # Add more converters here as they're implemented
     }
     
-    factory = converters.get(converter_name.lower())
+    converter_name = converter_name.lower()
+    factory = converters.get(converter_name)
     if not factory:
         print(f"Warning: Converter '{converter_name}' not found. Using LibreOffice converter.")
-        factory = converters['libreoffice']
+        converter_name = 'libreoffice'
+        factory = converters[converter_name]
+    
+    if CONVERSION_CACHE_ENABLED:
+        # Put the conversion cache in front of the selected converter
+        inner_factory = factory
+        factory = lambda output_folder: CachingConverter(inner_factory(output_folder), converter_name)
     
     return factory
\ No newline at end of file
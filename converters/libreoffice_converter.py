@@ -1,21 +1,69 @@
 """LibreOffice implementation of document converter."""
 
 import os
+import time
 import subprocess
-import shutil
 import concurrent.futures
-from .base_converter import DocumentConverter
+from functools import lru_cache
+from .base_converter import DocumentConverter, ConversionError
 from settings import (
     COPY_NON_CONVERTIBLE_FILES, 
     CONVERTIBLE_EXTENSIONS, 
     ADDITIONAL_COPY_EXTENSIONS,
-    USE_MULTITHREADING
+    USE_MULTITHREADING,
+    ISOLATE_LIBREOFFICE_PROFILES,
+    BATCH_CONVERSIONS,
+    BATCH_MAX_FILES,
+    BATCH_MAX_BYTES,
+    CONVERSION_RETRIES,
+    CONVERSION_RETRY_DELAY
 )
+from .libreoffice_profiles import acquire_profile, profile_url
+from .libreoffice_watchdog import run_libreoffice, get_conversion_timeout, ConversionTimeout
+from .quarantine import get_quarantine
+from file_utils.placement import place_file
 from utils.thread_manager import process_files_in_parallel
+from utils import metrics, events
+
+def _failure_reason(error):
+    """Return a short failure reason for the metrics."""
+    if isinstance(error, ConversionTimeout):
+        return 'timeout'
+    if isinstance(error, subprocess.CalledProcessError):
+        return f"exit_code_{error.returncode}"
+    return 'conversion_error'
+
+def _file_bytes(paths):
+    """Return the total size of files, for the metrics."""
+    total = 0
+    for path in paths:
+        try:
+            total += os.path.getsize(path)
+        except OSError:
+            pass
+    return total
+
+@lru_cache(maxsize=None)
+def get_libreoffice_version():
+    """
+    Return the output of 'libreoffice --version', queried once per run.
+    
+    Returns:
+        str: The version string, or empty if LibreOffice could not be run.
+    """
+    try:
+        result = subprocess.run(['libreoffice', '--version'], 
+                               check=True, capture_output=True, text=True)
+        return result.stdout.strip()
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return ''
 
 class LibreOfficeConverter(DocumentConverter):
     """Convert documents to PDF using LibreOffice."""
     
+    # Whether several files may be converted by one LibreOffice invocation
+    batch_conversions = BATCH_CONVERSIONS
+    
     def process(self, file_paths):
         """
         Convert documents to PDF using LibreOffice.
@@ -32,11 +80,8 @@ class LibreOfficeConverter(DocumentConverter):
         total_files = len(file_paths)
         successful_conversions = 0
         
-        # Check if libreoffice is installed before proceeding
-        try:
-            subprocess.run(['libreoffice', '--version'], 
-                          check=True, capture_output=True, text=True)
-        except (subprocess.CalledProcessError, FileNotFoundError):
+        # Check if libreoffice is installed before proceeding (probed once, then cached)
+        if not get_libreoffice_version():
             print("Error: 'libreoffice' command not found or failed. Please ensure LibreOffice is installed.")
             # If configured, copy the files instead
             if COPY_NON_CONVERTIBLE_FILES:
@@ -70,8 +115,15 @@ class LibreOfficeConverter(DocumentConverter):
             elif COPY_NON_CONVERTIBLE_FILES and self._should_copy_file(file_ext):
                 non_convertible_files.append(path)
         
-        # Process convertible files in parallel
-        if convertible_files:
+        # Process convertible files in parallel, several per process if batching
+        if convertible_files and self.batch_conversions:
+            results = process_files_in_parallel(
+                self._make_batches(convertible_files),
+                self._convert_batch
+            )
+            
+            successful += sum(results.values())
+        elif convertible_files:
             results = process_files_in_parallel(
                 convertible_files, 
                 self._convert_single_file
@@ -94,10 +146,22 @@ class LibreOfficeConverter(DocumentConverter):
         """Process files sequentially (original method)."""
         successful = 0
         
-        for idx, path in enumerate(file_paths, 1):
+        if self.batch_conversions:
+            # Convert documents in batches, then handle the remaining files below
+            convertible_files = [
+                path for path in file_paths
+                if os.path.splitext(path)[1].lower() in CONVERTIBLE_EXTENSIONS
+                and os.path.exists(path)
+            ]
+            for batch in self._make_batches(convertible_files):
+                successful += self._convert_batch(batch)
+            converted = set(convertible_files)
+            file_paths = [path for path in file_paths if path not in converted]
+        
+        for path in file_paths:
             # Check if the path still exists
             if not os.path.exists(path):
-                print(f"Skipping missing file: {path}")
+                events.publish(events.FAILED, path, message="file is missing")
                 continue
                 
             file_name = os.path.basename(path)
@@ -105,8 +169,6 @@ class LibreOfficeConverter(DocumentConverter):
             
             # Check if this is a convertible file or one to just copy
             if file_ext in CONVERTIBLE_EXTENSIONS:
-                print(f"({idx}/{len(file_paths)}) Converting '{file_name}'...")
-                
                 if self._convert_single_file(path):
                     successful += 1
                     
@@ -128,35 +190,274 @@ class LibreOfficeConverter(DocumentConverter):
             bool: True if conversion was successful, False otherwise.
         """
         file_name = os.path.basename(path)
+        quarantine = get_quarantine()
+        
+        # Documents that keep hanging or crashing LibreOffice aren't tried again
+        if quarantine.is_quarantined(path):
+            metrics.count('files', ext=os.path.splitext(file_name)[1].lower(), outcome='quarantined')
+            if COPY_NON_CONVERTIBLE_FILES:
+                return self._copy_single_file(path, "quarantined")
+            events.publish(events.FAILED, path, message="skipped, file is quarantined")
+            return False
         
         try:
             # Ensure output directory exists
             os.makedirs(self.output_folder, exist_ok=True)
             
-            # Run LibreOffice in headless mode to convert the file
-            result = subprocess.run(
-                ['libreoffice', '--headless', '--convert-to', 'pdf', 
-                 '--outdir', self.output_folder, path],
-                check=True, capture_output=True, text=True
-            )
-            
-            output_file = os.path.splitext(file_name)[0] + ".pdf"
-            print(f"Successfully converted to '{output_file}'")
+            events.publish(events.STARTED, path)
+            started = time.monotonic()
+            self._run_conversion_with_retries(path)
+            quarantine.record_success(path)
+            metrics.count('files', ext=os.path.splitext(file_name)[1].lower(), outcome='converted')
+            events.publish(events.FINISHED, path, outcome=events.CONVERTED,
+                           size=_file_bytes([path]) if events.bus.active else None,
+                           seconds=time.monotonic() - started)
             return True
             
-        except subprocess.CalledProcessError as e:
-            print(f"Error converting file: {file_name}")
-            if e.stderr:
-                print(f"Error details: {e.stderr.strip()}")
+        except (subprocess.CalledProcessError, ConversionError) as e:
+            return self._conversion_failed(path, e)
             
-            # If configured, copy files that failed to convert
-            if COPY_NON_CONVERTIBLE_FILES:
-                return self._copy_single_file(path, "failed conversion")
+        except Exception as e:
+            events.publish(events.FAILED, path, message=f"unexpected error: {e}")
             return False
+    
+    def _conversion_failed(self, path, error):
+        """
+        Record a failed conversion, copying the file instead if configured.
+        
+        Args:
+            path (str): Path to the file that failed to convert.
+            error (Exception): The CalledProcessError or ConversionError raised.
             
+        Returns:
+            bool: True if the file was copied instead, False otherwise.
+        """
+        stderr = getattr(error, 'stderr', None)
+        details = f"conversion failed: {stderr.strip()}" if stderr else f"conversion failed: {error}"
+        metrics.count('files', ext=os.path.splitext(path)[1].lower(), outcome='failed')
+        metrics.count('failures', reason=_failure_reason(error))
+        if get_quarantine().record_failure(path):
+            details += "; failed repeatedly and is quarantined, it won't be converted again"
+        
+        # If configured, copy files that failed to convert
+        if COPY_NON_CONVERTIBLE_FILES:
+            events.publish(events.MESSAGE, path, message=details)
+            return self._copy_single_file(path, "failed conversion")
+        events.publish(events.FAILED, path, message=details)
+        return False
+    
+    def _run_conversion_with_retries(self, path):
+        """
+        Convert a file, retrying with exponential backoff if LibreOffice fails.
+        
+        Timeouts are not retried: a document that hung once is likely to hang again.
+        
+        Args:
+            path (str): Path to the file to convert.
+            
+        Raises:
+            subprocess.CalledProcessError: If the last attempt failed.
+            ConversionError: If the conversion failed or timed out.
+        """
+        for attempt in range(CONVERSION_RETRIES + 1):
+            try:
+                self._run_conversion(path)
+                return
+            except ConversionTimeout:
+                raise
+            except (subprocess.CalledProcessError, ConversionError):
+                if attempt >= CONVERSION_RETRIES:
+                    raise
+            
+            delay = CONVERSION_RETRY_DELAY * 2 ** attempt
+            events.publish(events.MESSAGE, path, message=f"conversion failed, retrying in {delay:g}s")
+            time.sleep(delay)
+    
+    def get_version(self):
+        """Return the installed LibreOffice version string."""
+        return get_libreoffice_version()
+    
+    def _convert_batch(self, batch):
+        """
+        Convert several files with a single LibreOffice process.
+        
+        Success is judged per file from the PDFs that were actually written
+        (earlier outputs are removed first, so a PDF that exists afterwards
+        is new). Files that would produce the same PDF can't be told apart
+        in one process, so all but the first of them are converted on their
+        own afterwards, overwriting rather than removing the PDF just
+        written. If LibreOffice hung, the files are converted in order, so
+        the first one without output is the one it hung on: that file fails
+        like a timed-out single conversion, without being tried again, and
+        the files after it are converted as a new batch. Files without output
+        after a crash are retried one at a time.
+        
+        Args:
+            batch (tuple): Paths of the files to convert together.
+            
+        Returns:
+            int: Number of files successfully converted (or copied on failure).
+        """
+        if len(batch) == 1:
+            return 1 if self._convert_single_file(batch[0]) else 0
+        
+        first, later, outputs = [], [], set()
+        for path in batch:
+            output_path = self.get_output_path(path)
+            (later if output_path in outputs else first).append(path)
+            outputs.add(output_path)
+        if later:
+            successful = self._convert_batch(tuple(first))
+            for path in later:
+                if self._convert_single_file(path):
+                    successful += 1
+            return successful
+        
+        os.makedirs(self.output_folder, exist_ok=True)
+        for path in batch:
+            self._remove_output(path)
+        publishing = events.bus.active
+        if publishing:
+            for path in batch:
+                events.publish(events.STARTED, path)
+        
+        started = time.monotonic()
+        timeout = None
+        try:
+            self._run_libreoffice(list(batch))
+        except ConversionTimeout as e:
+            timeout = e
+        except subprocess.CalledProcessError:
+            # Judged per file below
+            pass
         except Exception as e:
-            print(f"Unexpected error converting {file_name}: {str(e)}")
-            return False
+            events.publish(events.MESSAGE, message=f"Unexpected error converting batch of {len(batch)} file(s): {e}")
+        elapsed = time.monotonic() - started
+        
+        successful = 0
+        for index, path in enumerate(batch):
+            if os.path.exists(self.get_output_path(path)):
+                metrics.count('files', ext=os.path.splitext(path)[1].lower(), outcome='converted')
+                if publishing:
+                    events.publish(events.FINISHED, path, outcome=events.CONVERTED,
+                                   size=_file_bytes([path]), seconds=elapsed)
+                successful += 1
+            elif timeout is not None:
+                # The file LibreOffice hung on; a second full time limit wouldn't help
+                if self._conversion_failed(path, timeout):
+                    successful += 1
+                return successful + self._convert_batch(batch[index + 1:])
+            else:
+                # Retry on its own so one bad file doesn't fail the whole batch
+                if self._convert_single_file(path):
+                    successful += 1
+        
+        return successful
+    
+    def _make_batches(self, file_paths):
+        """
+        Pack files into batches bounded by BATCH_MAX_FILES and BATCH_MAX_BYTES.
+        
+        Files that would produce the same PDF name always share a batch, so
+        they are converted one after the other (see _convert_batch()) rather
+        than by batches running in parallel, which could remove each other's
+        PDFs. Quarantined files get a batch of their own so they don't hold
+        up the others.
+        
+        Args:
+            file_paths (list): Paths of the files to convert.
+            
+        Returns:
+            list: Tuples of file paths, one per LibreOffice invocation.
+        """
+        batches = []
+        current, current_bytes = [], 0
+        batch_by_output = {}
+        quarantine = get_quarantine()
+        
+        for path in file_paths:
+            if quarantine.is_quarantined(path):
+                batches.append([path])
+                continue
+            
+            output_path = self.get_output_path(path)
+            if output_path in batch_by_output:
+                # Converted on its own after the other file; not part of the LibreOffice batch
+                batch_by_output[output_path].append(path)
+                continue
+            
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                size = 0
+            
+            if current and (len(current) >= BATCH_MAX_FILES
+                            or current_bytes + size > BATCH_MAX_BYTES):
+                batches.append(current)
+                current, current_bytes = [], 0
+            
+            current.append(path)
+            current_bytes += size
+            batch_by_output[output_path] = current
+        
+        if current:
+            batches.append(current)
+        return [tuple(batch) for batch in batches]
+    
+    def _remove_output(self, path):
+        """Remove an earlier PDF for a file, if there is one."""
+        try:
+            os.remove(self.get_output_path(path))
+        except FileNotFoundError:
+            pass
+    
+    def _run_conversion(self, path):
+        """
+        Run LibreOffice in headless mode to convert a file into the output folder.
+        
+        Args:
+            path (str): Path to the file to convert.
+            
+        Raises:
+            subprocess.CalledProcessError: If LibreOffice exits with an error.
+        """
+        self._run_libreoffice([path])
+    
+    def _run_libreoffice(self, paths):
+        """
+        Run one headless LibreOffice process converting the given files.
+        
+        The process is killed if it runs longer than a time limit scaled to
+        the number and size of the files.
+        
+        Args:
+            paths (list): Paths of the files to convert.
+            
+        Raises:
+            subprocess.CalledProcessError: If LibreOffice exits with an error.
+            ConversionTimeout: If LibreOffice did not finish in time.
+        """
+        timeout = get_conversion_timeout(paths)
+        convert_span = metrics.span('convert', files=len(paths),
+                                    bytes=_file_bytes(paths) if metrics.enabled else 0,
+                                    ext=os.path.splitext(paths[0])[1].lower())
+        
+        if not ISOLATE_LIBREOFFICE_PROFILES:
+            with convert_span:
+                run_libreoffice(
+                    ['libreoffice', '--headless', '--convert-to', 'pdf', 
+                     '--outdir', self.output_folder] + paths,
+                    timeout
+                )
+            return
+        
+        # Give each concurrent process its own profile to avoid lock contention
+        with acquire_profile() as profile_dir, convert_span:
+            run_libreoffice(
+                ['libreoffice', profile_url(profile_dir), '--headless', 
+                 '--convert-to', 'pdf', '--outdir', self.output_folder] + paths,
+                timeout, marker=profile_url(profile_dir)
+            )
     
     def _copy_single_file(self, path, reason="non-convertible"):
         """
@@ -176,11 +477,19 @@ class LibreOfficeConverter(DocumentConverter):
             os.makedirs(self.output_folder, exist_ok=True)
             
             dest_path = os.path.join(self.output_folder, file_name)
-            shutil.copy2(path, dest_path)
-            print(f"Copied {reason} file '{file_name}' to output directory")
+            file_ext = os.path.splitext(file_name)[1].lower()
+            size = _file_bytes([path]) if metrics.enabled or events.bus.active else 0
+            started = time.monotonic()
+            with metrics.span('copy', bytes=size, ext=file_ext) as copy_span:
+                # Linked or cloned where the filesystems allow it, copied otherwise
+                copy_span.set(method=place_file(path, dest_path))
+            metrics.count('files', ext=file_ext, outcome='copied', reason=reason)
+            events.publish(events.FINISHED, path, size=size, seconds=time.monotonic() - started,
+                           outcome=events.COPIED if reason == "non-convertible" else events.FALLBACK)
             return True
         except Exception as e:
-            print(f"Error copying file '{file_name}': {e}")
+            events.publish(events.FAILED, path, message=f"could not copy: {e}")
+            metrics.count('failures', reason='copy_error')
             return False
     
     def _copy_files_batch(self, file_paths):
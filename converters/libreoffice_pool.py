@@ -0,0 +1,346 @@
+"""Pool of long-lived headless LibreOffice instances driven over UNO."""
+
+import os
+import atexit
+import queue
+import socket
+import subprocess
+import threading
+import time
+from .base_converter import ConversionError
+from .libreoffice_converter import LibreOfficeConverter, _file_bytes
+from .libreoffice_profiles import new_profile_dir, profile_url
+from .libreoffice_watchdog import get_conversion_timeout, kill_process_tree, ConversionTimeout
+from settings import (
+    LIBREOFFICE_POOL_SIZE,
+    LIBREOFFICE_POOL_MAX_JOBS,
+    LIBREOFFICE_POOL_START_TIMEOUT
+)
+from utils.thread_manager import get_max_workers
+from utils import metrics, events
+
+# The UNO bridge ships with LibreOffice (python3-uno) and is optional
+try:
+    import uno
+    from com.sun.star.beans import PropertyValue
+except ImportError:
+    uno = None
+
+# PDF export filter for each kind of document LibreOffice can load
+_PDF_FILTERS = (
+    ('com.sun.star.presentation.PresentationDocument', 'impress_pdf_Export'),
+    ('com.sun.star.drawing.DrawingDocument', 'draw_pdf_Export'),
+    ('com.sun.star.sheet.SpreadsheetDocument', 'calc_pdf_Export'),
+    ('com.sun.star.text.TextDocument', 'writer_pdf_Export'),
+)
+
+# Seconds a stopping instance gets to exit before it is killed
+_STOP_TIMEOUT = 10
+
+def _find_free_port():
+    """Ask the OS for a free local TCP port."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def _property(name, value):
+    """Build a UNO PropertyValue."""
+    prop = PropertyValue()
+    prop.Name = name
+    prop.Value = value
+    return prop
+
+class LibreOfficeWorker:
+    """A single headless LibreOffice instance listening on a local socket."""
+
+    def __init__(self, worker_id, max_jobs=0):
+        """
+        Initialize the worker. The instance is not started until start() is called.
+
+        Args:
+            worker_id (int): Identifier of this worker within the pool.
+            max_jobs (int, optional): Recycle the instance after this many jobs (0 = never).
+        """
+        self.worker_id = worker_id
+        self.max_jobs = max_jobs
+        self.jobs_done = 0
+        self.port = None
+        self.process = None
+        self.desktop = None
+        self.profile_dir = None
+        self.timed_out = False
+
+    def start(self):
+        """Launch the LibreOffice process and connect to it."""
+        self.port = _find_free_port()
+        if self.profile_dir is None:
+            # The profile stays pinned to this worker across restarts
+            self.profile_dir = new_profile_dir()
+        connection = f"socket,host=127.0.0.1,port={self.port};urp;StarOffice.ComponentContext"
+
+        self.process = subprocess.Popen(
+            ['libreoffice', '--headless', '--invisible', '--nologo', '--norestore',
+             '--nodefault', '--nolockcheck',
+             profile_url(self.profile_dir),
+             f"--accept={connection}"],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            start_new_session=True
+        )
+
+        local_context = uno.getComponentContext()
+        resolver = local_context.ServiceManager.createInstanceWithContext(
+            'com.sun.star.bridge.UnoUrlResolver', local_context)
+
+        deadline = time.monotonic() + LIBREOFFICE_POOL_START_TIMEOUT
+        while True:
+            if self.process.poll() is not None:
+                self.stop()
+                raise ConversionError(f"LibreOffice instance {self.worker_id} exited during startup")
+            try:
+                context = resolver.resolve(f"uno:{connection}")
+                break
+            except Exception:
+                if time.monotonic() > deadline:
+                    self.stop()
+                    raise ConversionError(f"Timed out starting LibreOffice instance {self.worker_id}")
+                time.sleep(0.25)
+
+        self.desktop = context.ServiceManager.createInstanceWithContext(
+            'com.sun.star.frame.Desktop', context)
+        self.jobs_done = 0
+
+    def is_alive(self):
+        """
+        Check that the process is running and still answers over UNO.
+
+        Returns:
+            bool: True if the instance is healthy, False otherwise.
+        """
+        if self.process is None or self.process.poll() is not None or self.desktop is None:
+            return False
+        try:
+            self.desktop.getFrames()
+            return True
+        except Exception:
+            return False
+
+    def convert(self, path, output_folder):
+        """
+        Convert a single file to PDF in the given output folder.
+
+        Args:
+            path (str): Path to the file to convert.
+            output_folder (str): Folder where the PDF will be written.
+
+        Raises:
+            ConversionError: If the document could not be loaded or exported.
+            ConversionTimeout: If the instance hung and was killed.
+        """
+        if not self.is_alive():
+            self.restart()
+
+        # Kill the instance if the document hangs it; the UNO call then fails
+        timeout = get_conversion_timeout([path])
+        watchdog = threading.Timer(timeout, self._kill) if timeout else None
+        self.timed_out = False
+        if watchdog is not None:
+            watchdog.daemon = True
+            watchdog.start()
+        try:
+            self._convert(path, output_folder)
+        except ConversionError as e:
+            if self.timed_out:
+                raise ConversionTimeout(
+                    f"LibreOffice did not finish within {timeout:.0f} seconds and was stopped", e.stderr)
+            raise
+        finally:
+            if watchdog is not None:
+                watchdog.cancel()
+
+    def _convert(self, path, output_folder):
+        """Load a document and export it as PDF."""
+        file_name = os.path.basename(path)
+        output_path = os.path.join(output_folder, os.path.splitext(file_name)[0] + ".pdf")
+
+        try:
+            document = self.desktop.loadComponentFromURL(
+                uno.systemPathToFileUrl(os.path.abspath(path)), '_blank', 0,
+                (_property('Hidden', True), _property('ReadOnly', True)))
+        except Exception as e:
+            self._after_failure()
+            raise ConversionError(f"Could not load '{file_name}': {e}")
+
+        if document is None:
+            self._after_job()
+            raise ConversionError(f"LibreOffice could not open '{file_name}'")
+
+        try:
+            filter_name = next(
+                (name for service, name in _PDF_FILTERS if document.supportsService(service)),
+                'writer_pdf_Export')
+            document.storeToURL(
+                uno.systemPathToFileUrl(os.path.abspath(output_path)),
+                (_property('FilterName', filter_name),))
+        except Exception as e:
+            self._after_failure()
+            raise ConversionError(f"Could not export '{file_name}': {e}")
+        finally:
+            try:
+                document.close(True)
+            except Exception:
+                pass
+
+        self._after_job()
+
+    def _kill(self):
+        """Kill a hung instance, including any soffice.bin left behind."""
+        self.timed_out = True
+        process = self.process
+        if process is not None:
+            events.publish(events.MESSAGE,
+                           message=f"LibreOffice instance {self.worker_id} timed out, killing it...")
+            kill_process_tree(process, profile_url(self.profile_dir))
+
+    def restart(self):
+        """Stop the current instance (if any) and start a fresh one."""
+        self.stop()
+        self.start()
+
+    def stop(self):
+        """Terminate the LibreOffice process, killing it if it doesn't exit in time."""
+        deadline = time.monotonic() + _STOP_TIMEOUT
+        if self.desktop is not None:
+            # terminate() never returns if the instance is hung
+            terminator = threading.Thread(target=_terminate, args=(self.desktop,), daemon=True)
+            terminator.start()
+            terminator.join(_STOP_TIMEOUT)
+            self.desktop = None
+
+        if self.process is not None:
+            try:
+                self.process.wait(timeout=max(0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                kill_process_tree(self.process, profile_url(self.profile_dir))
+                self.process.wait()
+            self.process = None
+
+    def _after_job(self):
+        """Count a finished job and recycle the instance when it reaches its limit."""
+        self.jobs_done += 1
+        if self.max_jobs and self.jobs_done >= self.max_jobs:
+            self.stop()
+
+    def _after_failure(self):
+        """Drop an instance that stopped responding so the next job restarts it."""
+        if not self.is_alive():
+            self.stop()
+        else:
+            self._after_job()
+
+def _terminate(desktop):
+    """Ask a LibreOffice instance to exit."""
+    try:
+        desktop.terminate()
+    except Exception:
+        pass
+
+class LibreOfficePool:
+    """Hands out idle LibreOffice workers to converter threads."""
+
+    def __init__(self, size, max_jobs=0):
+        """
+        Initialize the pool. Workers are started on first use.
+
+        Args:
+            size (int): Number of LibreOffice instances to run.
+            max_jobs (int, optional): Jobs per instance before it is recycled (0 = never).
+        """
+        self.size = size
+        self._workers = [LibreOfficeWorker(i, max_jobs) for i in range(size)]
+        self._idle = queue.Queue()
+        for worker in self._workers:
+            self._idle.put(worker)
+
+    def convert(self, path, output_folder):
+        """
+        Convert a file on the next idle worker, blocking until one is available.
+
+        Args:
+            path (str): Path to the file to convert.
+            output_folder (str): Folder where the PDF will be written.
+
+        Raises:
+            ConversionError: If the conversion failed.
+        """
+        worker = self._idle.get()
+        try:
+            worker.convert(path, output_folder)
+        finally:
+            self._idle.put(worker)
+
+    def shutdown(self):
+        """Stop every LibreOffice instance in the pool."""
+        for worker in self._workers:
+            worker.stop()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """
+    Return the process-wide LibreOffice pool, creating it on first use.
+
+    Returns:
+        LibreOfficePool: The shared pool, or None if the UNO bridge is unavailable.
+    """
+    global _pool
+    if uno is None:
+        return None
+
+    with _pool_lock:
+        if _pool is None:
+            size = LIBREOFFICE_POOL_SIZE if LIBREOFFICE_POOL_SIZE > 0 else get_max_workers()
+            print(f"Starting LibreOffice pool with {size} instance(s).")
+            _pool = LibreOfficePool(size, LIBREOFFICE_POOL_MAX_JOBS)
+        return _pool
+
+def shutdown_pool():
+    """Stop the shared LibreOffice pool if it was started."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
+
+# Make sure no LibreOffice instances outlive the program
+atexit.register(shutdown_pool)
+
+class PooledLibreOfficeConverter(LibreOfficeConverter):
+    """Convert documents to PDF using a pool of persistent LibreOffice instances."""
+
+    # Pooled instances are already running, so there is no startup to amortize
+    batch_conversions = False
+
+    _warned_no_uno = False
+
+    def _run_conversion(self, path):
+        """
+        Convert a file using the shared pool, falling back to a one-off
+        LibreOffice process when the UNO bridge is not installed.
+
+        Args:
+            path (str): Path to the file to convert.
+
+        Raises:
+            ConversionError: If the pooled conversion failed.
+        """
+        pool = get_pool()
+        if pool is None:
+            if not PooledLibreOfficeConverter._warned_no_uno:
+                PooledLibreOfficeConverter._warned_no_uno = True
+                print("Warning: Python UNO bridge not available. Using one LibreOffice process per file.")
+            return super()._run_conversion(path)
+
+        with metrics.span('convert', files=1, bytes=_file_bytes([path]) if metrics.enabled else 0,
+                          ext=os.path.splitext(path)[1].lower()):
+            pool.convert(path, self.output_folder)
@@ -0,0 +1,93 @@
+"""Per-worker LibreOffice user profiles so instances can run side by side."""
+
+import os
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from file_utils.temp_dir_manager import register_temp_dir_for_cleanup
+
+_profiles_root = None
+_template_dir = None
+_idle_slots = queue.Queue()
+_slot_count = 0
+_lock = threading.Lock()
+
+def profile_url(profile_dir):
+    """
+    Build the -env:UserInstallation argument for a profile directory.
+
+    Args:
+        profile_dir (str): Path to the profile directory.
+
+    Returns:
+        str: Command-line argument selecting that profile.
+    """
+    return f"-env:UserInstallation={Path(os.path.abspath(profile_dir)).as_uri()}"
+
+def _ensure_template():
+    """Create the profile root and a pre-warmed template profile (once per run)."""
+    global _profiles_root, _template_dir
+
+    if _profiles_root is not None:
+        return
+
+    _profiles_root = tempfile.mkdtemp(prefix="doc2pdf-profiles-")
+    register_temp_dir_for_cleanup(_profiles_root)
+
+    template = os.path.join(_profiles_root, 'template')
+    try:
+        # Let LibreOffice build its profile once; every slot starts from a copy
+        subprocess.run(
+            ['libreoffice', '--headless', '--norestore', profile_url(template),
+             '--terminate_after_init'],
+            check=True, capture_output=True, timeout=120
+        )
+        _template_dir = template
+    except (subprocess.SubprocessError, OSError):
+        # Slots start empty and LibreOffice initializes them on first launch
+        _template_dir = None
+
+def new_profile_dir():
+    """
+    Create a new isolated profile directory seeded from the template.
+
+    Returns:
+        str: Path to the new profile directory.
+    """
+    global _slot_count
+
+    with _lock:
+        _ensure_template()
+        _slot_count += 1
+        profile_dir = os.path.join(_profiles_root, f"slot-{_slot_count}")
+
+    if _template_dir and os.path.isdir(_template_dir):
+        shutil.copytree(_template_dir, profile_dir, symlinks=True)
+    else:
+        os.makedirs(profile_dir, exist_ok=True)
+    return profile_dir
+
+@contextmanager
+def acquire_profile():
+    """
+    Borrow a profile directory that no other running conversion is using.
+
+    Slots are created on demand and reused for the rest of the run, so each
+    worker thread ends up pinned to a warm profile of its own.
+
+    Yields:
+        str: Path to the profile directory.
+    """
+    try:
+        profile_dir = _idle_slots.get_nowait()
+    except queue.Empty:
+        profile_dir = new_profile_dir()
+
+    try:
+        yield profile_dir
+    finally:
+        _idle_slots.put(profile_dir)
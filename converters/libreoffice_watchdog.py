@@ -0,0 +1,145 @@
+"""Time limits for LibreOffice processes and cleanup of hung instances."""
+
+import os
+import signal
+import subprocess
+from settings import (
+    CONVERSION_TIMEOUT_BASE,
+    CONVERSION_TIMEOUT_PER_FILE,
+    CONVERSION_TIMEOUT_PER_MB,
+    CONVERSION_TIMEOUT_MAX
+)
+from .base_converter import ConversionError
+
+class ConversionTimeout(ConversionError):
+    """Raised when LibreOffice did not finish a conversion within its time limit."""
+
+def get_conversion_timeout(paths):
+    """
+    Return the time limit for converting files in one LibreOffice process.
+    
+    The limit grows with the number of files and their total size, so large
+    documents get more time while a hung small file is detected quickly.
+    
+    Args:
+        paths (list): Paths of the files converted together.
+    
+    Returns:
+        float: Seconds to wait, or None if timeouts are disabled.
+    """
+    if CONVERSION_TIMEOUT_BASE <= 0:
+        return None
+    
+    total_bytes = 0
+    for path in paths:
+        try:
+            total_bytes += os.path.getsize(path)
+        except OSError:
+            pass
+    
+    timeout = (CONVERSION_TIMEOUT_BASE
+               + CONVERSION_TIMEOUT_PER_FILE * (len(paths) - 1)
+               + CONVERSION_TIMEOUT_PER_MB * total_bytes / (1024 * 1024))
+    if CONVERSION_TIMEOUT_MAX > 0:
+        timeout = min(timeout, CONVERSION_TIMEOUT_MAX)
+    return timeout
+
+def _find_soffice_processes(session_id, marker=None):
+    """
+    Find LibreOffice processes in a session, or whose command line contains a marker.
+    
+    soffice.bin can outlive the launcher script it was started from, so
+    killing the launcher alone may leave it running with the document open.
+    Uses /proc and finds nothing on systems without it.
+    """
+    pids = []
+    try:
+        entries = os.listdir('/proc')
+    except OSError:
+        return pids
+    
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", 'r') as f:
+                stat = f.read()
+            with open(f"/proc/{entry}/cmdline", 'rb') as f:
+                cmdline = f.read().decode('utf-8', 'replace').replace('\0', ' ')
+        except OSError:
+            continue
+        
+        # The command name is in parentheses and may itself contain spaces
+        name = stat[stat.find('(') + 1:stat.rfind(')')]
+        fields = stat[stat.rfind(')') + 2:].split()
+        if not name.startswith('soffice') and 'soffice' not in cmdline:
+            continue
+        if int(fields[3]) == session_id or (marker and marker in cmdline):
+            pids.append(int(entry))
+    return pids
+
+def kill_process_tree(process, marker=None):
+    """
+    Kill a LibreOffice process, its process group and any orphaned soffice.bin.
+    
+    Args:
+        process (subprocess.Popen): Process started with start_new_session=True.
+        marker (str, optional): Command-line argument unique to this instance
+            (such as its profile URL) used to find processes that left the group.
+    """
+    if os.name != 'posix':
+        process.kill()
+        return
+    
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+    
+    for pid in _find_soffice_processes(process.pid, marker):
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+def run_libreoffice(args, timeout=None, marker=None):
+    """
+    Run a LibreOffice command, killing it if it exceeds its time limit.
+    
+    Args:
+        args (list): Command line to run.
+        timeout (float, optional): Seconds to wait before the process is killed.
+        marker (str, optional): Command-line argument unique to this instance,
+            used to find orphaned processes when it has to be killed.
+    
+    Returns:
+        subprocess.CompletedProcess: The finished process with its output.
+    
+    Raises:
+        subprocess.CalledProcessError: If LibreOffice exits with an error.
+        ConversionTimeout: If LibreOffice did not finish in time.
+    """
+    process = subprocess.Popen(
+        args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+        start_new_session=(os.name == 'posix')
+    )
+    
+    try:
+        stdout, stderr = process.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        kill_process_tree(process, marker)
+        try:
+            stdout, stderr = process.communicate(timeout=10)
+        except subprocess.TimeoutExpired:
+            stderr = ''
+        raise ConversionTimeout(
+            f"LibreOffice did not finish within {timeout:.0f} seconds and was stopped", stderr)
+    except BaseException:
+        # Interrupted (e.g. Ctrl+C): don't leave the process behind
+        kill_process_tree(process, marker)
+        process.wait()
+        raise
+    
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, args, stdout, stderr)
+    return subprocess.CompletedProcess(args, process.returncode, stdout, stderr)
@@ -0,0 +1,126 @@
+"""Remembers documents that repeatedly hang or crash LibreOffice."""
+
+import os
+import json
+import tempfile
+import threading
+from settings import QUARANTINE_AFTER_FAILURES, QUARANTINE_FILE
+
+class Quarantine:
+    """
+    Counts conversion failures per document across runs.
+    
+    Documents are identified by name, size and modification time, so an
+    extracted copy of the same zip member is recognized again. Once a document
+    has failed QUARANTINE_AFTER_FAILURES times it is no longer sent to
+    LibreOffice; it takes the copy-on-failure path straight away.
+    """
+    
+    def __init__(self, path, max_failures):
+        """
+        Load the quarantine list from disk, or start an empty one.
+        
+        Args:
+            path (str): JSON file the list is persisted to.
+            max_failures (int): Failures before a document is quarantined (0 = never).
+        """
+        self.path = path
+        self.max_failures = max_failures
+        self._failures = {}
+        self._lock = threading.Lock()
+        
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self._failures = json.load(f).get('failures', {})
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"Warning: Ignoring unreadable quarantine list '{path}': {e}")
+    
+    def _key(self, path):
+        """Return the identity of a document, or None if it can't be read."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    
+    def is_quarantined(self, path):
+        """
+        Check whether a document has failed too often to be converted again.
+        
+        Args:
+            path (str): Path to the document.
+        
+        Returns:
+            bool: True if the document should not be converted.
+        """
+        if self.max_failures <= 0 or not self._failures:
+            return False
+        key = self._key(path)
+        with self._lock:
+            return self._failures.get(key, 0) >= self.max_failures
+    
+    def record_failure(self, path):
+        """
+        Count a failed conversion of a document.
+        
+        Args:
+            path (str): Path to the document.
+        
+        Returns:
+            bool: True if the document is quarantined as a result.
+        """
+        key = self._key(path)
+        if self.max_failures <= 0 or key is None:
+            return False
+        with self._lock:
+            self._failures[key] = self._failures.get(key, 0) + 1
+            quarantined = self._failures[key] >= self.max_failures
+        self.save()
+        return quarantined
+    
+    def record_success(self, path):
+        """
+        Forget earlier failures of a document that has now converted.
+        
+        Args:
+            path (str): Path to the document.
+        """
+        if not self._failures:
+            return
+        key = self._key(path)
+        with self._lock:
+            if self._failures.pop(key, None) is None:
+                return
+        self.save()
+    
+    def save(self):
+        """Write the list to disk atomically."""
+        with self._lock:
+            data = {'failures': dict(self._failures)}
+        try:
+            directory = os.path.dirname(self.path) or '.'
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"Warning: Could not save quarantine list '{self.path}': {e}")
+
+_quarantine = None
+_quarantine_lock = threading.Lock()
+
+def get_quarantine():
+    """
+    Return the process-wide quarantine list, loading it on first use.
+    
+    Returns:
+        Quarantine: The shared list.
+    """
+    global _quarantine
+    with _quarantine_lock:
+        if _quarantine is None:
+            _quarantine = Quarantine(QUARANTINE_FILE, QUARANTINE_AFTER_FAILURES)
+        return _quarantine
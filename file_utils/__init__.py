@@ -3,6 +3,10 @@
 from .input_collector import get_input_files
 from .directory_handler import setup_output_directory, get_files_from_directory
 from .zip_handler import extract_zip
+from .archive_handler import list_archive_members
+from .work_item import WorkItem
+from .output_sink import OutputSink, DirectorySink, ZipSink, TarSink, open_output_sink
 
 __all__ = ['get_input_files', 'setup_output_directory', 
-           'get_files_from_directory', 'extract_zip']
\ No newline at end of file
+           'get_files_from_directory', 'extract_zip', 'list_archive_members', 'WorkItem',
+           'OutputSink', 'DirectorySink', 'ZipSink', 'TarSink', 'open_output_sink']
\ No newline at end of file
@@ -0,0 +1,365 @@
+"""Reads zip and tar archives, including archives nested inside them."""
+
+import os
+import time
+import tarfile
+import zipfile
+from collections import namedtuple
+from .scanner import get_default_matcher
+from .work_item import WorkItem
+from settings import (
+    CONVERTIBLE_EXTENSIONS,
+    COPY_NON_CONVERTIBLE_FILES,
+    ADDITIONAL_COPY_EXTENSIONS,
+    ARCHIVE_EXTENSIONS,
+    ARCHIVE_MAX_DEPTH,
+    ARCHIVE_MAX_TOTAL_BYTES,
+    ARCHIVE_MAX_RATIO
+)
+
+# One file in an archive. 'stored' means its bytes can be read in place
+# (not compressed), so a nested archive doesn't need to be unpacked first.
+ArchiveMember = namedtuple('ArchiveMember', 'name size compressed_size mtime_ns crc stored')
+
+# Errors raised for damaged or unsupported archives
+ARCHIVE_ERRORS = (zipfile.BadZipFile, zipfile.LargeZipFile, tarfile.TarError, EOFError)
+
+def archive_suffix(name):
+    """
+    Return the archive extension of a file name.
+    
+    Args:
+        name (str): File name or path.
+    
+    Returns:
+        str: The longest matching entry of ARCHIVE_EXTENSIONS ('.tar.gz'
+            rather than '.gz'), or None if the file isn't an archive.
+    """
+    lower = name.lower()
+    matches = [suffix for suffix in ARCHIVE_EXTENSIONS if lower.endswith(suffix)]
+    return max(matches, key=len) if matches else None
+
+def archive_stem(name):
+    """Return a file name without its archive extension ('docs.tar.gz' -> 'docs')."""
+    suffix = archive_suffix(name)
+    return name[:-len(suffix)] if suffix else os.path.splitext(name)[0]
+
+def open_archive(source, name):
+    """
+    Open an archive for reading.
+    
+    Args:
+        source (str or file): Path of the archive, or a seekable file object
+            with its content (e.g. a member of another archive).
+        name (str): File name of the archive; its extension selects the format.
+    
+    Returns:
+        ZipReader or TarReader: The open archive.
+    """
+    suffix = archive_suffix(name)
+    if suffix == '.zip':
+        return ZipReader(source)
+    return TarReader(source, compressed=suffix != '.tar')
+
+class ZipReader:
+    """Lists and opens the members of a zip file."""
+    
+    def __init__(self, source):
+        """
+        Open the zip file.
+        
+        Args:
+            source (str or file): Path or seekable file object.
+        """
+        self._zip = zipfile.ZipFile(source, 'r')
+        self._source = source
+        # Members are compressed one by one, not the archive as a whole
+        self.compressed = False
+    
+    def members(self):
+        """Yield an ArchiveMember for every file (not directory) in the archive."""
+        for info in self._zip.infolist():
+            if not info.is_dir():
+                yield self._member(info)
+    
+    def member(self, name):
+        """Return the ArchiveMember with the given name."""
+        return self._member(self._zip.getinfo(name))
+    
+    def open(self, name):
+        """Return a readable, seekable file object for a member."""
+        return self._zip.open(name)
+    
+    def close(self):
+        """Close the archive and the stream it was read from."""
+        self._zip.close()
+        if not isinstance(self._source, str):
+            self._source.close()
+    
+    @staticmethod
+    def _member(info):
+        return ArchiveMember(info.filename, info.file_size, info.compress_size,
+                             _member_mtime_ns(info), info.CRC,
+                             info.compress_type == zipfile.ZIP_STORED)
+
+class TarReader:
+    """Lists and opens the regular files of a tar archive (optionally gzip/bzip2/xz compressed)."""
+    
+    def __init__(self, source, compressed):
+        """
+        Open the tar archive.
+        
+        Args:
+            source (str or file): Path or seekable file object.
+            compressed (bool): Whether the tar stream is compressed, which makes
+                reading a member in place expensive.
+        """
+        if isinstance(source, str):
+            self._tar = tarfile.open(source, 'r:*')
+        else:
+            self._tar = tarfile.open(fileobj=source, mode='r:*')
+        self._source = source
+        self.compressed = compressed
+        self._infos = {}
+    
+    def members(self):
+        """Yield an ArchiveMember for every regular file; links and devices are skipped."""
+        for info in self._tar:
+            if info.isfile():
+                self._infos[info.name] = info
+                yield self._member(info)
+    
+    def member(self, name):
+        """Return the ArchiveMember with the given name."""
+        return self._member(self._info(name))
+    
+    def open(self, name):
+        """Return a readable file object for a member."""
+        return self._tar.extractfile(self._info(name))
+    
+    def close(self):
+        """Close the archive and the stream it was read from."""
+        self._tar.close()
+        if not isinstance(self._source, str):
+            self._source.close()
+    
+    def _info(self, name):
+        info = self._infos.get(name)
+        if info is None:
+            info = self._infos[name] = self._tar.getmember(name)
+        return info
+    
+    def _member(self, info):
+        # Tar headers have no checksum of the content
+        return ArchiveMember(info.name, info.size, info.size, int(info.mtime) * 1_000_000_000,
+                             None, not self.compressed)
+
+def list_archive_members(path, source_name=None):
+    """
+    Lists the archive members that will be converted or copied, without extracting them.
+    
+    Archives inside the archive are opened too, up to ARCHIVE_MAX_DEPTH levels,
+    by reading them from their parent's stream; their members are listed
+    below a folder named after the nested archive ('exports/2023.zip' ->
+    'exports/2023/...'). The returned file infos have no 'path' yet; they
+    carry the 'archive', the chain of nested archive members ('container')
+    and the 'member' they come from, and are extracted on demand with
+    ZipStager.
+    
+    Args:
+        path (str): Path to the archive.
+        source_name (str, optional): The name to use as the source. Defaults to
+            the archive's file name.
+    
+    Returns:
+        list: WorkItems with 'path' (None), 'source', 'internal_path', 'archive',
+            'container', 'member', 'size', 'mtime_ns' and 'crc'.
+    """
+    file_infos = []
+    
+    if source_name is None:
+        source_name = os.path.basename(path)
+    
+    try:
+        reader = open_archive(path, path)
+        try:
+            file_infos.extend(_list_members(reader, path, (), '', source_name, 0,
+                                            _ExpansionLimit(path), None, os.path.getsize(path)))
+        finally:
+            reader.close()
+        
+        if file_infos:
+            print(f"Found {len(file_infos)} file(s) in '{source_name}'.")
+        else:
+            print(f"No supported files found in '{source_name}'.")
+    except ARCHIVE_ERRORS:
+        print(f"Error: '{path}' is not a valid archive or is corrupted.")
+    except Exception as e:
+        print(f"An error occurred while processing archive '{path}': {e}")
+    
+    return file_infos
+
+def _list_members(reader, archive, container, prefix, source_name, depth, limit, name, packed_size):
+    """
+    Yield the WorkItems of one (possibly nested) archive, recursing into nested archives.
+    
+    name is the archive's path within the top-level archive (None for the
+    top-level archive itself) and packed_size its size as a file.
+    """
+    expanded = 0
+    for member in reader.members():
+        if reader.compressed:
+            # A compressed tar has no per-member compressed sizes; judge the stream so far
+            expanded += member.size
+            if not limit.admit_stream(expanded, packed_size, name):
+                return
+        
+        internal_path = _safe_member_path(member.name)
+        if internal_path is None:
+            continue
+        internal_path = os.path.join(prefix, internal_path)
+        if not limit.admit(member, internal_path):
+            if limit.exhausted:
+                return
+            continue
+        
+        if (depth < ARCHIVE_MAX_DEPTH and archive_suffix(internal_path)
+                and get_default_matcher().accepts_path(internal_path.replace(os.sep, '/'))):
+            nested_prefix = archive_stem(internal_path)
+            stream = reader.open(member.name)
+            try:
+                nested = open_archive(stream, internal_path)
+            except ARCHIVE_ERRORS:
+                stream.close()
+                print(f"Warning: Nested archive '{internal_path}' in '{archive}' is not valid; "
+                      f"treating it as a file.")
+            else:
+                try:
+                    yield from _list_members(nested, archive, container + (member.name,),
+                                             nested_prefix, source_name, depth + 1, limit,
+                                             internal_path, member.size)
+                finally:
+                    nested.close()
+                continue
+        
+        # Only files count against the total: a nested archive's members are counted instead
+        if not limit.charge(member):
+            return
+        
+        if _should_stage(internal_path):
+            yield WorkItem.in_archive(archive, member.name, source_name, internal_path,
+                                      member.size, member.mtime_ns, member.crc,
+                                      container=container or None)
+
+class _ExpansionLimit:
+    """
+    Zip-bomb protection: bounds the bytes one top-level archive expands to.
+    
+    Zip members are checked against ARCHIVE_MAX_RATIO one by one. Tar members
+    have no compressed size of their own, so a compressed tar stream is
+    checked as a whole instead (see admit_stream()).
+    """
+    
+    def __init__(self, path):
+        """
+        Initialize the limit.
+        
+        Args:
+            path (str): Path of the top-level archive, for warnings.
+        """
+        self.path = path
+        self.total = 0
+        self.exhausted = False
+    
+    def admit(self, member, internal_path):
+        """
+        Check a member's compression ratio.
+        
+        Args:
+            member (ArchiveMember): Member about to be listed or opened.
+            internal_path (str): Its path within the top-level archive.
+        
+        Returns:
+            bool: False if the member must be skipped; once the total is used
+                up (exhausted), no further members are admitted.
+        """
+        if self.exhausted:
+            return False
+        if (ARCHIVE_MAX_RATIO and member.compressed_size
+                and member.size > member.compressed_size * ARCHIVE_MAX_RATIO):
+            print(f"Warning: Skipping '{internal_path}' in '{self.path}': compressed "
+                  f"{member.size // member.compressed_size}:1, more than the limit of {ARCHIVE_MAX_RATIO}:1.")
+            return False
+        return True
+    
+    def charge(self, member):
+        """
+        Count a file against the total.
+        
+        Args:
+            member (ArchiveMember): A member listed as a file (not opened as an archive).
+        
+        Returns:
+            bool: False once the total is used up; no further members are admitted.
+        """
+        if ARCHIVE_MAX_TOTAL_BYTES and self.total + member.size > ARCHIVE_MAX_TOTAL_BYTES:
+            print(f"Warning: '{self.path}' expands to more than {ARCHIVE_MAX_TOTAL_BYTES} bytes; "
+                  f"its remaining members are skipped.")
+            self.exhausted = True
+            return False
+        self.total += member.size
+        return True
+    
+    def admit_stream(self, expanded, packed_size, name=None):
+        """
+        Check the compression ratio of a compressed tar stream read so far.
+        
+        Args:
+            expanded (int): Uncompressed bytes of the members read so far.
+            packed_size (int): Size of the compressed archive.
+            name (str, optional): Path of a nested archive within the top-level one.
+        
+        Returns:
+            bool: False if the rest of the archive must be skipped.
+        """
+        if not ARCHIVE_MAX_RATIO or not packed_size or expanded <= packed_size * ARCHIVE_MAX_RATIO:
+            return True
+        where = f"'{name}' in '{self.path}'" if name else f"'{self.path}'"
+        print(f"Warning: {where} is compressed more than {ARCHIVE_MAX_RATIO}:1; "
+              f"its remaining members are skipped.")
+        return False
+
+def _safe_member_path(name):
+    """Return a member's relative path, or None for directories and unsafe names."""
+    if name.endswith('/'):
+        return None
+    
+    internal_path = os.path.normpath(name.replace('\\', '/'))
+    # Never write outside the staging area (absolute paths, '..' components)
+    if os.path.isabs(internal_path) or internal_path.split(os.sep)[0] in ('..', '.'):
+        return None
+    if internal_path.split(os.sep)[0] == '__MACOSX':
+        return None
+    return internal_path
+
+def _should_stage(internal_path):
+    """Decide whether an archive member will be converted or copied at all."""
+    file_name = os.path.basename(internal_path)
+    
+    # Filter out temporary and lock files, and apply the scan rules
+    if not get_default_matcher().accepts_path(internal_path.replace(os.sep, '/')):
+        return False
+    
+    file_ext = os.path.splitext(file_name)[1].lower()
+    if file_ext in CONVERTIBLE_EXTENSIONS:
+        return True
+    if not COPY_NON_CONVERTIBLE_FILES:
+        return False
+    return not ADDITIONAL_COPY_EXTENSIONS or file_ext in ADDITIONAL_COPY_EXTENSIONS
+
+def _member_mtime_ns(member):
+    """Return a zip member's timestamp in nanoseconds since the epoch."""
+    try:
+        return int(time.mktime(member.date_time + (0, 0, -1)) * 1_000_000_000)
+    except (OverflowError, ValueError):
+        return 0
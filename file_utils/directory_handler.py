@@ -3,6 +3,8 @@
 import os
 import os.path
 from settings import CONVERTIBLE_EXTENSIONS, COPY_NON_CONVERTIBLE_FILES
+from .scanner import scan_directory
+from .work_item import WorkItem
 
 def setup_output_directory(base_dir):
     """
@@ -27,41 +29,42 @@ def get_files_from_directory(input_dir, source_name=None):
         source_name (str, optional): The name to use as the source. Defaults to directory name.
         
     Returns:
-        list: A list of dictionaries, each containing 'path', 'source', and 'internal_path'.
+        list: WorkItems with 'path', 'source', and 'internal_path'.
     """
-    input_file_infos = []
+    return list(iter_files_from_directory(input_dir, source_name))
+
+def iter_files_from_directory(input_dir, source_name=None):
+    """
+    Yields supported files in the given directory and its subdirectories as they are found.
+    
+    Subtrees are scanned concurrently (see scan_directory), so files are not
+    yielded in directory order. Temporary files, EXCLUDED_FILE_PATTERNS and
+    the SCAN_* include, exclude and prune rules are applied while scanning.
     
+    Args:
+        input_dir (str): The directory to search in.
+        source_name (str, optional): The name to use as the source. Defaults to directory name.
+        
+    Yields:
+        WorkItem: File info with 'path', 'source', 'internal_path', and the
+            'size' and 'mtime_ns' seen while scanning.
+    """
     # Default source name is the directory name itself
     if source_name is None:
         source_name = os.path.basename(input_dir)
     
-    for root, _, files in os.walk(input_dir):
-        # Calculate the relative path from the input_dir
-        rel_path = os.path.relpath(root, input_dir) if root != input_dir else ""
+    for entry, internal_dir in scan_directory(input_dir):
+        # Decide which files to include based on settings; copying
+        # non-convertible files includes every file that isn't excluded
+        if not COPY_NON_CONVERTIBLE_FILES and os.path.splitext(entry.name)[1].lower() not in CONVERTIBLE_EXTENSIONS:
+            continue
         
-        for file in files:
-            # Filter out temporary and lock files
-            if file.startswith('~$') or file.startswith('._'):
-                continue
-                
-            file_ext = os.path.splitext(file)[1].lower()
-            
-            # Decide which files to include based on settings
-            include_file = file_ext in CONVERTIBLE_EXTENSIONS
-            
-            # Include non-convertible files if configured
-            if COPY_NON_CONVERTIBLE_FILES and not include_file:
-                # Include all files that aren't system/temp files
-                include_file = True
-            
-            if include_file:
-                # Store full file path and source information with internal path
-                file_path = os.path.join(root, file)
-                internal_path = os.path.join(rel_path, file) if rel_path != "." else file
-                input_file_infos.append({
-                    'path': file_path, 
-                    'source': source_name,
-                    'internal_path': internal_path
-                })
-
-    return input_file_infos
\ No newline at end of file
+        try:
+            # Cached by the entry, or one stat shared by every later stage
+            stat = entry.stat()
+            size, mtime_ns = stat.st_size, stat.st_mtime_ns
+        except OSError:
+            size = mtime_ns = None
+        
+        # The path is stored relative to the (shared) input directory
+        yield WorkItem.in_directory(input_dir, source_name, internal_dir, entry.name, size, mtime_ns)
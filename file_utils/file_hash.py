@@ -0,0 +1,39 @@
+"""Content hashing of input files."""
+
+import hashlib
+import zipfile
+
+_CHUNK_SIZE = 1024 * 1024
+
+def hash_file(path):
+    """
+    Compute the SHA-256 digest of a file's content.
+    
+    Args:
+        path (str): Path to the file.
+    
+    Returns:
+        str: Hex digest of the file content.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def hash_zip_member(archive, member):
+    """
+    Compute the SHA-256 digest of a zip member's content without extracting it.
+    
+    Args:
+        archive (str): Path to the zip file.
+        member (str): Name of the member in the archive.
+    
+    Returns:
+        str: Hex digest of the member content.
+    """
+    digest = hashlib.sha256()
+    with zipfile.ZipFile(archive, 'r') as zip_ref, zip_ref.open(member) as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
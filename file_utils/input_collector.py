@@ -1,26 +1,54 @@
 """Handles the collection of input files from user."""
 
 import os
-from .directory_handler import get_files_from_directory
+from .directory_handler import iter_files_from_directory
 from .zip_handler import extract_zip
-from settings import CONVERTIBLE_EXTENSIONS, COPY_NON_CONVERTIBLE_FILES
+from .archive_handler import list_archive_members, archive_suffix, archive_stem
+from .work_item import WorkItem
+from settings import CONVERTIBLE_EXTENSIONS, COPY_NON_CONVERTIBLE_FILES, STREAM_ZIP_EXTRACTION
 
-def get_input_files():
+def new_input_counts():
     """
-    Prompts the user for input file paths and returns a list of valid files with source info.
+    Returns a fresh dictionary for counting user inputs.
     
     Returns:
-        list: A list of dictionaries, each containing 'path', 'source', and 'internal_path'.
+        dict: Counts of 'convertible', 'non_convertible', 'zip', 'dir' and 'invalid'
+            inputs; 'missing' counts the invalid paths that don't exist.
     """
-    input_file_infos = []
-    # Initialize counts for user inputs
-    counts = {
+    return {
         'convertible': 0,
         'non_convertible': 0, 
         'zip': 0, 
         'dir': 0, 
-        'invalid': 0
+        'invalid': 0,
+        'missing': 0
     }
+
+def get_input_files():
+    """
+    Prompts the user for input file paths and returns a list of valid files with source info.
+    
+    Returns:
+        list: A list of dictionaries, each containing 'path', 'source', and 'internal_path'.
+    """
+    # Initialize counts for user inputs
+    counts = new_input_counts()
+    input_file_infos = list(iter_input_files(get_input_paths(counts), counts))
+    
+    print_input_summary(counts)
+    return input_file_infos
+
+def get_input_paths(counts):
+    """
+    Prompts the user for paths of files, zip files or directories.
+    
+    Args:
+        counts (dict): Input counts; invalid paths are counted here.
+        
+    Returns:
+        list: The valid paths in the order they were entered.
+    """
+    paths = []
     
     print("Enter the paths of document files, zip files, or directories.")
     print("Type 'd' when finished.")
@@ -30,69 +58,139 @@ def get_input_files():
         if path.lower() == 'd':
             break
 
+        if os.path.isfile(path) or os.path.isdir(path):
+            paths.append(path)
+        else:
+            print(f"Invalid input: '{path}' is not a valid file or directory.")
+            counts['invalid'] += 1
+
+    return paths
+
+def iter_input_files(paths, counts):
+    """
+    Yields the files found in the given inputs as they are discovered.
+    
+    Args:
+        paths (iterable): Paths of files, zip files or directories.
+        counts (dict): Input counts to update.
+        
+    Yields:
+        dict: File info containing 'path', 'source', and 'internal_path'.
+    """
+    for path in paths:
         if os.path.isfile(path):
-            _process_file(path, input_file_infos, counts)
+            yield from _iter_file(path, counts)
         elif os.path.isdir(path):
-            _process_directory(path, input_file_infos, counts)
+            yield from _iter_directory(path, counts)
         else:
             print(f"Invalid input: '{path}' is not a valid file or directory.")
             counts['invalid'] += 1
+            counts['missing'] += 1
 
-    _print_input_summary(counts)
-    return input_file_infos
+def iter_path_list(stream, null_delimited=False, chunk_size=64 * 1024):
+    """
+    Yields the paths listed in a binary stream, reading it a chunk at a time.
+    
+    Lists can be newline-delimited (one path per line, blank lines ignored) or
+    NUL-delimited as written by 'find -print0', which allows any file name.
+    
+    Args:
+        stream (file): Binary file object, e.g. sys.stdin.buffer.
+        null_delimited (bool, optional): Paths are separated by NUL bytes.
+        chunk_size (int, optional): Bytes read at a time.
+        
+    Yields:
+        str: Each listed path.
+    """
+    separator = b'\0' if null_delimited else b'\n'
+    pending = b''
+    
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        entries = (pending + chunk).split(separator)
+        pending = entries.pop()
+        for entry in entries:
+            path = _decode_path_entry(entry, null_delimited)
+            if path:
+                yield path
+    
+    path = _decode_path_entry(pending, null_delimited)
+    if path:
+        yield path
+
+def _decode_path_entry(entry, null_delimited):
+    """Turn a raw path list entry into a path, or '' for an empty entry."""
+    if not null_delimited:
+        entry = entry.rstrip(b'\r')
+    return os.fsdecode(entry)
 
 def _process_file(path, input_file_infos, counts):
     """Process a single file input and update counts."""
+    input_file_infos.extend(_iter_file(path, counts))
+
+def _iter_file(path, counts):
+    """Yield the files for a single file input and update counts."""
     file_ext = os.path.splitext(path)[1].lower()
     
     if file_ext in CONVERTIBLE_EXTENSIONS:
         # Convertible file, store with source as "direct"
-        input_file_infos.append({'path': path, 'source': 'direct', 'internal_path': ''})
         counts['convertible'] += 1
-    elif file_ext == '.zip':
-        # Count the zip file itself
+        yield WorkItem.direct(path)
+    elif archive_suffix(path):
+        # Count the archive itself
         counts['zip'] += 1
-        # Extract and add contained files with source as the zip name
-        zip_name = os.path.splitext(os.path.basename(path))[0]
-        input_file_infos.extend(extract_zip(path, source_name=zip_name))
+        # Add contained files with source as the archive name
+        archive_name = archive_stem(os.path.basename(path))
+        if STREAM_ZIP_EXTRACTION or archive_suffix(path) != '.zip':
+            # Members (and nested archives) are extracted one at a time during conversion
+            yield from list_archive_members(path, source_name=archive_name)
+        else:
+            yield from extract_zip(path, source_name=archive_name)
     elif COPY_NON_CONVERTIBLE_FILES:
         # Non-convertible file, include if copy option is enabled
-        input_file_infos.append({'path': path, 'source': 'direct', 'internal_path': ''})
         counts['non_convertible'] += 1
+        yield WorkItem.direct(path)
     else:
         print(f"Ignoring non-convertible file: {path}")
         counts['invalid'] += 1
 
 def _process_directory(path, input_file_infos, counts):
     """Process a directory input and update counts."""
+    input_file_infos.extend(_iter_directory(path, counts))
+
+def _iter_directory(path, counts):
+    """Yield the files found in a directory input and update counts."""
     # Count the directory input
     counts['dir'] += 1
     
     # Find supported files within the directory
     dir_name = os.path.basename(path)
-    found_in_dir = get_files_from_directory(path, source_name=dir_name)
-    
-    if not found_in_dir:
-        # Only print message if not a temp dir we created
-        from .temp_dir_manager import is_temp_dir
-        if not is_temp_dir(path):
-            print(f"No files found in directory: {path}")
+    found_any = False
     
-    for file_info in found_in_dir:
-        input_file_infos.append(file_info)
+    for file_info in iter_files_from_directory(path, source_name=dir_name):
+        found_any = True
         ext = os.path.splitext(file_info['path'])[1].lower()
         if ext in CONVERTIBLE_EXTENSIONS:
             counts['convertible'] += 1
         else:
             counts['non_convertible'] += 1
+        yield file_info
+    
+    if not found_any:
+        # Only print message if not a temp dir we created
+        from .temp_dir_manager import is_temp_dir
+        if not is_temp_dir(path):
+            print(f"No files found in directory: {path}")
 
-def _print_input_summary(counts):
+def print_input_summary(counts):
     """Print a summary of the input files."""
     print("\n--- Input Summary ---")
     print(f"Convertible files: {counts['convertible']}")
     if COPY_NON_CONVERTIBLE_FILES:
         print(f"Other files:       {counts['non_convertible']}")
-    print(f"ZIP files:         {counts['zip']}")
+    print(f"Archives:          {counts['zip']}")
     print(f"Directories:       {counts['dir']}")
     print(f"Invalid/ignored:   {counts['invalid']}")
     print("---------------------\n")
\ No newline at end of file
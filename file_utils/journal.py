@@ -0,0 +1,316 @@
+"""Keeps a durable journal of every task in a run so an interrupted run can be resumed."""
+
+import os
+import json
+import time
+import socket
+import sqlite3
+import threading
+from .work_item import WorkItem
+from settings import JOURNAL_BATCH_SIZE, JOURNAL_FLUSH_INTERVAL, JOURNAL_STALE_SECONDS
+
+JOURNAL_VERSION = 1
+
+# Task states
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    pid INTEGER,
+    host TEXT,
+    started REAL,
+    heartbeat REAL,
+    finished REAL,
+    discovery_complete INTEGER DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    key TEXT PRIMARY KEY,
+    file_info TEXT,
+    state TEXT,
+    run_id INTEGER,
+    output_path TEXT,
+    started REAL,
+    finished REAL,
+    seconds REAL
+);
+CREATE INDEX IF NOT EXISTS tasks_state ON tasks (state);
+"""
+
+def get_journal_path(output_folder):
+    """
+    Return the journal location for an output folder (stored next to it).
+    
+    Args:
+        output_folder (str): The output folder from setup_output_directory().
+    
+    Returns:
+        str: Path to the journal database.
+    """
+    output_folder = os.path.abspath(output_folder)
+    parent, name = os.path.split(output_folder)
+    return os.path.join(parent, f".{name}-journal.sqlite")
+
+def _pid_alive(pid):
+    """Check whether a process with the given id exists on this host."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # Exists, but belongs to someone else
+        return True
+    try:
+        with open(f"/proc/{pid}/stat", 'rb') as f:
+            # A killed process that hasn't been reaped yet
+            return f.read().rsplit(b')', 1)[1].split()[0] != b'Z'
+    except (OSError, IndexError):
+        return True
+
+class Journal:
+    """
+    Records the state of every task (pending, running, done or failed) in SQLite.
+    
+    Workers only update an in-memory table of changes; a writer thread commits
+    them in one transaction every JOURNAL_FLUSH_INTERVAL seconds or
+    JOURNAL_BATCH_SIZE changes, so journaling doesn't slow conversions down.
+    A crash loses at most the last interval, and those tasks are simply
+    converted again on resume.
+    """
+    
+    def __init__(self, output_folder, resume=False):
+        """
+        Open the journal of an output folder and register this run.
+        
+        Args:
+            output_folder (str): The output folder the journal describes.
+            resume (bool, optional): Continue the journal of an earlier run. Its
+                finished tasks are skipped and tasks left "running" by runs that
+                are no longer alive are reclaimed. Otherwise the journal starts over.
+        """
+        self.output_folder = os.path.abspath(output_folder)
+        self.path = get_journal_path(output_folder)
+        self.previous_discovery_complete = False
+        self.reclaimed = 0
+        self._done = {}
+        self._changes = {}
+        self._started = {}
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        version = self._db.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, JOURNAL_VERSION):
+            print(f"Warning: Starting over with journal '{self.path}' of an unknown version.")
+            resume = False
+            self._db.executescript("DROP TABLE IF EXISTS runs; DROP TABLE IF EXISTS tasks;")
+        self._db.executescript(_SCHEMA)
+        self._db.execute(f"PRAGMA user_version={JOURNAL_VERSION}")
+        
+        with self._db:
+            if resume:
+                self._load()
+            else:
+                self._db.execute("DELETE FROM tasks")
+                self._db.execute("DELETE FROM runs")
+            now = time.time()
+            self.run_id = self._db.execute(
+                "INSERT INTO runs (pid, host, started, heartbeat) VALUES (?, ?, ?, ?)",
+                (os.getpid(), socket.gethostname(), now, now)
+            ).lastrowid
+        
+        self._writer = threading.Thread(target=self._write, daemon=True, name="journal-writer")
+        self._writer.start()
+    
+    def _load(self):
+        """Reclaim tasks of dead runs and remember finished tasks (in a transaction)."""
+        now = time.time()
+        host = socket.gethostname()
+        dead_runs = []
+        for run_id, pid, run_host, heartbeat, finished in self._db.execute(
+                "SELECT id, pid, host, heartbeat, finished FROM runs"):
+            if finished is not None or heartbeat < now - JOURNAL_STALE_SECONDS:
+                dead_runs.append(run_id)
+            elif run_host == host and not _pid_alive(pid):
+                dead_runs.append(run_id)
+            else:
+                print(f"Warning: Run {run_id} (pid {pid} on {run_host}) still seems to be "
+                      f"writing to this output folder; its running tasks are left alone.")
+        
+        for run_id in dead_runs:
+            self.reclaimed += self._db.execute(
+                "UPDATE tasks SET state = ?, started = NULL WHERE state = ? AND run_id = ?",
+                (PENDING, RUNNING, run_id)
+            ).rowcount
+        
+        last_run = self._db.execute("SELECT discovery_complete FROM runs ORDER BY id DESC LIMIT 1").fetchone()
+        self.previous_discovery_complete = bool(last_run and last_run[0])
+        self._done = dict(self._db.execute("SELECT key, output_path FROM tasks WHERE state = ?", (DONE,)))
+    
+    @property
+    def done_count(self):
+        """Number of tasks an earlier run finished."""
+        return len(self._done)
+    
+    def is_done(self, key):
+        """
+        Check whether an earlier run finished a task and its output is still there.
+        
+        Args:
+            key (str): Manifest key of the file.
+        
+        Returns:
+            bool: True if the task can be skipped.
+        """
+        output_path = self._done.get(key)
+        if output_path is None:
+            return False
+        return os.path.exists(os.path.join(self.output_folder, output_path))
+    
+    def get_output_path(self, key):
+        """
+        Return the output an earlier run produced for a finished task.
+        
+        Args:
+            key (str): Manifest key of the file.
+        
+        Returns:
+            str: Absolute path of the output, or None if there is none.
+        """
+        output_path = self._done.get(key)
+        if output_path is None:
+            return None
+        return os.path.join(self.output_folder, output_path)
+    
+    def unfinished(self):
+        """
+        Return the file infos of tasks an earlier run didn't finish.
+        
+        Returns:
+            list: WorkItems, in the order they were discovered.
+        """
+        file_infos = []
+        with self._db_lock:
+            rows = self._db.execute("SELECT file_info FROM tasks WHERE state != ? ORDER BY rowid",
+                                    (DONE,)).fetchall()
+        for (data,) in rows:
+            file_info = WorkItem.from_dict(json.loads(data))
+            if file_info.archive or file_info.path is None or os.path.exists(file_info.path):
+                file_infos.append(file_info)
+        return file_infos
+    
+    def pending(self, key, file_info):
+        """
+        Record a discovered task.
+        
+        Args:
+            key (str): Manifest key of the file.
+            file_info (dict): File info of the file.
+        """
+        if file_info.get('archive'):
+            # The staged copy is deleted after the run; the member is staged again on resume
+            file_info = dict(file_info, path=None)
+        self._update(key, file_info=json.dumps(dict(file_info)), state=PENDING, output_path=None,
+                     started=None, finished=None, seconds=None)
+    
+    def running(self, keys):
+        """
+        Record that tasks were handed to a converter.
+        
+        Args:
+            keys (list): Manifest keys of the files.
+        """
+        now = time.time()
+        for key in keys:
+            with self._lock:
+                self._started[key] = now
+            self._update(key, state=RUNNING, started=now)
+    
+    def finished(self, key, output_path):
+        """
+        Record a processed task.
+        
+        Args:
+            key (str): Manifest key of the file.
+            output_path (str): Path of the produced output, or None if it failed.
+        """
+        now = time.time()
+        with self._lock:
+            started = self._started.pop(key, None)
+        if output_path is None:
+            self._update(key, state=FAILED, finished=now,
+                         seconds=now - started if started is not None else None)
+        else:
+            self._update(key, state=DONE, output_path=os.path.relpath(output_path, self.output_folder),
+                         finished=now, seconds=now - started if started is not None else None)
+    
+    def discovery_complete(self):
+        """Record that every input was found, so a resume needn't scan the inputs again."""
+        with self._db_lock, self._db:
+            self._db.execute("UPDATE runs SET discovery_complete = 1 WHERE id = ?", (self.run_id,))
+    
+    def close(self):
+        """Write the remaining changes and mark the run finished."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._writer.join()
+        self._flush()
+        with self._db_lock:
+            with self._db:
+                self._db.execute("UPDATE runs SET finished = ?, heartbeat = ? WHERE id = ?",
+                                 (time.time(), time.time(), self.run_id))
+            self._db.close()
+    
+    def _update(self, key, **columns):
+        """Queue changes to a task; changes to the same task are merged."""
+        columns['run_id'] = self.run_id
+        with self._lock:
+            change = self._changes.get(key)
+            if change is None:
+                self._changes[key] = columns
+            else:
+                change.update(columns)
+            if len(self._changes) >= JOURNAL_BATCH_SIZE:
+                self._wake.set()
+    
+    def _write(self):
+        """Commit queued changes periodically until the journal is closed."""
+        while not self._closed:
+            self._wake.wait(JOURNAL_FLUSH_INTERVAL)
+            self._wake.clear()
+            self._flush()
+    
+    def _flush(self):
+        """Commit all queued changes in one transaction."""
+        with self._lock:
+            changes, self._changes = self._changes, {}
+        
+        # One statement per set of changed columns
+        groups = {}
+        for key, columns in changes.items():
+            names = tuple(sorted(columns))
+            groups.setdefault(names, []).append((key,) + tuple(columns[name] for name in names))
+        
+        with self._db_lock:
+            try:
+                with self._db:
+                    for names, rows in groups.items():
+                        assignments = ", ".join(f"{name} = excluded.{name}" for name in names)
+                        self._db.executemany(
+                            f"INSERT INTO tasks (key, {', '.join(names)}) "
+                            f"VALUES ({', '.join('?' * (len(names) + 1))}) "
+                            f"ON CONFLICT (key) DO UPDATE SET {assignments}",
+                            rows
+                        )
+                    self._db.execute("UPDATE runs SET heartbeat = ? WHERE id = ?", (time.time(), self.run_id))
+            except sqlite3.Error as e:
+                print(f"Warning: Could not write journal '{self.path}': {e}")
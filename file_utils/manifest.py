@@ -0,0 +1,212 @@
+"""Keeps a manifest of converted files so unchanged inputs can be skipped on re-runs."""
+
+import os
+import json
+import tempfile
+from .file_hash import hash_file
+
+MANIFEST_VERSION = 1
+
+def get_manifest_path(output_folder):
+    """
+    Return the manifest location for an output folder (stored next to it).
+    
+    Args:
+        output_folder (str): The output folder from setup_output_directory().
+    
+    Returns:
+        str: Path to the manifest file.
+    """
+    output_folder = os.path.abspath(output_folder)
+    parent, name = os.path.split(output_folder)
+    return os.path.join(parent, f".{name}-manifest.json")
+
+def get_manifest_key(file_info):
+    """
+    Return a run-independent identity for a discovered file.
+    
+    Files from directories and archives are identified by source and internal
+    path (their extraction path changes between runs); direct files by path.
+    
+    Args:
+        file_info (dict): File info with 'path', 'source' and 'internal_path'.
+    
+    Returns:
+        str: The manifest key.
+    """
+    if file_info['source'] == 'direct':
+        return f"direct:{os.path.abspath(file_info['path'])}"
+    return f"{file_info['source']}:{file_info['internal_path']}"
+
+def _fingerprint(file_info):
+    """Return (size, mtime_ns) of a file, as read from the zip directory or the scan if known."""
+    if file_info.get('archive') or file_info.get('mtime_ns') is not None:
+        return file_info['size'], file_info['mtime_ns']
+    try:
+        stat = os.stat(file_info['path'])
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+class Manifest:
+    """Records the input fingerprint and output of every processed file."""
+    
+    def __init__(self, output_folder, use_hash=False):
+        """
+        Load the manifest of an output folder, or start an empty one.
+        
+        Args:
+            output_folder (str): The output folder the manifest describes.
+            use_hash (bool, optional): Compare content hashes when size or mtime changed.
+        """
+        self.output_folder = os.path.abspath(output_folder)
+        self.path = get_manifest_path(output_folder)
+        self.use_hash = use_hash
+        self.entries = {}
+        
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == MANIFEST_VERSION:
+                self.entries = data.get('entries', {})
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"Warning: Ignoring unreadable manifest '{self.path}': {e}")
+    
+    def is_unchanged(self, key, file_info, converter_version):
+        """
+        Check whether a file was already processed and its output is still there.
+        
+        Args:
+            key (str): Manifest key of the file.
+            file_info (dict): File info of the file in this run.
+            converter_version (str): Version of the converter for this run.
+        
+        Returns:
+            bool: True if the file can be skipped.
+        """
+        entry = self.entries.get(key)
+        if entry is None or entry.get('converter_version') != converter_version:
+            return False
+        if not os.path.exists(os.path.join(self.output_folder, entry['output_path'])):
+            return False
+        
+        fingerprint = _fingerprint(file_info)
+        if fingerprint is None:
+            return False
+        
+        size, mtime_ns = fingerprint
+        if size != entry['size']:
+            return False
+        if mtime_ns == entry['mtime_ns']:
+            return True
+        if self.use_hash and entry.get('hash'):
+            try:
+                if self._hash(file_info) == entry['hash']:
+                    # Same content, only touched: remember the new mtime
+                    entry['mtime_ns'] = mtime_ns
+                    return True
+            except OSError:
+                pass
+        return False
+    
+    def get_output_path(self, key):
+        """
+        Return the output recorded for a file.
+        
+        Args:
+            key (str): Manifest key of the file.
+        
+        Returns:
+            str: Absolute path of the output, or None if the file isn't recorded.
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        return os.path.join(self.output_folder, entry['output_path'])
+    
+    def record(self, key, file_info, output_path, converter_version):
+        """
+        Record a processed file.
+        
+        Args:
+            key (str): Manifest key of the file.
+            file_info (dict): File info of the processed file.
+            output_path (str): Path of the produced output file.
+            converter_version (str): Version of the converter used.
+        """
+        fingerprint = _fingerprint(file_info)
+        if fingerprint is None:
+            return
+        try:
+            file_hash = self._hash(file_info) if self.use_hash else None
+        except OSError:
+            file_hash = None
+        
+        self.entries[key] = {
+            'source': file_info['source'],
+            'input_path': file_info.get('archive') or file_info['path'],
+            'size': fingerprint[0],
+            'mtime_ns': fingerprint[1],
+            'hash': file_hash,
+            'output_path': os.path.relpath(output_path, self.output_folder),
+            'converter_version': converter_version
+        }
+    
+    def _hash(self, file_info):
+        """Return a content hash, using the stored CRC for zip members."""
+        if file_info.get('archive'):
+            if file_info['crc'] is not None:
+                return f"crc32:{file_info['crc']:08x}"
+            # Tar members carry no checksum; they can only be hashed once staged
+            if file_info['path'] is None:
+                return None
+        return hash_file(file_info['path'])
+    
+    def remove_output(self, key):
+        """
+        Delete the output recorded for a file and forget the file.
+        
+        Args:
+            key (str): Manifest key of the file.
+        """
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        output_path = os.path.join(self.output_folder, entry['output_path'])
+        if os.path.isfile(output_path):
+            os.remove(output_path)
+    
+    def stale_keys(self, sources, seen_keys):
+        """
+        Return keys of files from the given sources that were not seen this run.
+        
+        Directly listed files are not scanned as a whole, so one that wasn't
+        listed this run is only stale once its input file is gone.
+        
+        Args:
+            sources (set): Source names that were scanned this run.
+            seen_keys (set): Keys of all files discovered this run.
+        
+        Returns:
+            list: Keys whose inputs have disappeared.
+        """
+        return [
+            key for key, entry in self.entries.items()
+            if entry['source'] in sources and key not in seen_keys
+            and (entry['source'] != 'direct' or not os.path.exists(entry['input_path']))
+        ]
+    
+    def save(self):
+        """Write the manifest atomically next to the output folder."""
+        data = {'version': MANIFEST_VERSION, 'entries': self.entries}
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"Warning: Could not write manifest '{self.path}': {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
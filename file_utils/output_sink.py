@@ -0,0 +1,194 @@
+"""Collects output files into a directory, a zip file or a tar stream as they are produced."""
+
+import os
+import queue
+import tarfile
+import zipfile
+import threading
+from abc import ABC, abstractmethod
+from .placement import place_file
+from settings import ARCHIVE_STORED_EXTENSIONS, ARCHIVE_COMPRESS_LEVEL
+from utils import metrics
+
+# Queue marker telling the writer thread that no more files will be added
+_CLOSE = object()
+
+class OutputSink(ABC):
+    """
+    Receives finished output files and writes them to a target on one thread.
+    
+    add() may be called from any thread (e.g. conversion workers) and only
+    queues the file, so archiving overlaps conversion instead of following it.
+    The target is opened by the writer thread when the first file arrives (or
+    by close()), so a sink that is never used leaves nothing behind.
+    """
+    
+    def __init__(self, target):
+        """
+        Initialize the sink.
+        
+        Args:
+            target (str or file): Path to write to, or a writable binary stream.
+        """
+        self.target = target
+        self.count = 0
+        self.bytes = 0
+        self.error = None
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+    
+    def add(self, path, arcname):
+        """
+        Queue a finished file for the target.
+        
+        Args:
+            path (str): Path of the file on disk; it must stay there until close().
+            arcname (str): Path of the file within the target.
+        """
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._write_all, daemon=True, name="output-sink")
+                self._thread.start()
+        self._queue.put((path, arcname))
+    
+    def close(self):
+        """
+        Write the remaining files and finish the target.
+        
+        Raises:
+            Exception: The error that stopped the writer, if any.
+        """
+        with self._lock:
+            if self._thread is None:
+                self._open()
+                self._finish()
+                return
+        self._queue.put(_CLOSE)
+        self._thread.join()
+        if self.error is not None:
+            raise self.error
+    
+    def _write_all(self):
+        """Write queued files until the sink is closed."""
+        try:
+            self._open()
+        except Exception as e:
+            self.error = e
+        
+        while True:
+            item = self._queue.get()
+            if item is _CLOSE:
+                break
+            if self.error is not None:
+                # Keep draining so close() doesn't block
+                continue
+            path, arcname = item
+            try:
+                size = os.path.getsize(path)
+                with metrics.span('zip', bytes=size, ext=os.path.splitext(path)[1].lower()):
+                    self._write(path, arcname.replace(os.sep, '/'))
+                self.count += 1
+                self.bytes += size
+            except Exception as e:
+                self.error = e
+        
+        try:
+            if self.error is None:
+                self._finish()
+        except Exception as e:
+            self.error = e
+    
+    def _open(self):
+        """Open the target."""
+    
+    @abstractmethod
+    def _write(self, path, arcname):
+        """Write one file to the target."""
+        pass
+    
+    def _finish(self):
+        """Finish and close the target."""
+
+class DirectorySink(OutputSink):
+    """Places output files below a directory (linked or copied, see FILE_PLACEMENT)."""
+    
+    def _open(self):
+        os.makedirs(self.target, exist_ok=True)
+    
+    def _write(self, path, arcname):
+        dest = os.path.join(self.target, arcname)
+        if os.path.abspath(dest) != os.path.abspath(path):
+            os.makedirs(os.path.dirname(dest), exist_ok=True)
+            place_file(path, dest)
+
+class ZipSink(OutputSink):
+    """
+    Writes output files to a zip file.
+    
+    Files whose type is already compressed (ARCHIVE_STORED_EXTENSIONS, e.g.
+    PDFs and images) are stored as they are; other files are deflated. The
+    target may be an unseekable stream.
+    """
+    
+    def _open(self):
+        self._zip = zipfile.ZipFile(self.target, 'w', zipfile.ZIP_DEFLATED,
+                                    compresslevel=ARCHIVE_COMPRESS_LEVEL)
+    
+    def _write(self, path, arcname):
+        if os.path.splitext(path)[1].lower() in ARCHIVE_STORED_EXTENSIONS:
+            self._zip.write(path, arcname, compress_type=zipfile.ZIP_STORED)
+        else:
+            self._zip.write(path, arcname)
+    
+    def _finish(self):
+        self._zip.close()
+
+class TarSink(OutputSink):
+    """
+    Writes output files to a tar stream.
+    
+    Tar has no per-file compression; the stream as a whole is compressed if
+    the target name ends in '.tar.gz', '.tgz', '.tar.bz2' or '.tar.xz'. The
+    target may be an unseekable stream.
+    """
+    
+    def _open(self):
+        mode = 'w|' + _tar_compression(self.target if isinstance(self.target, str) else '')
+        if isinstance(self.target, str):
+            self._tar = tarfile.open(self.target, mode)
+        else:
+            self._tar = tarfile.open(fileobj=self.target, mode=mode)
+    
+    def _write(self, path, arcname):
+        self._tar.add(path, arcname, recursive=False)
+    
+    def _finish(self):
+        self._tar.close()
+
+def _tar_compression(name):
+    """Return the tarfile compression for a file name ('gz', 'bz2', 'xz' or '')."""
+    lower = name.lower()
+    for suffixes, compression in ((('.tar.gz', '.tgz'), 'gz'), (('.tar.bz2', '.tbz2'), 'bz2'),
+                                  (('.tar.xz', '.txz'), 'xz')):
+        if lower.endswith(suffixes):
+            return compression
+    return ''
+
+def open_output_sink(target):
+    """
+    Return the sink for a target path, chosen by its extension.
+    
+    Args:
+        target (str): A '.zip' file, a tar file ('.tar', optionally compressed:
+            '.tar.gz', '.tgz', '.tar.bz2', '.tar.xz'), or a directory.
+    
+    Returns:
+        OutputSink: ZipSink, TarSink or DirectorySink.
+    """
+    lower = target.lower()
+    if lower.endswith('.zip'):
+        return ZipSink(target)
+    if lower.endswith('.tar') or _tar_compression(lower):
+        return TarSink(target)
+    return DirectorySink(target)
@@ -0,0 +1,143 @@
+"""Places files in the output tree by linking, cloning or copying them."""
+
+import os
+import errno
+import shutil
+import threading
+from .temp_dir_manager import is_temp_dir
+from settings import FILE_PLACEMENT
+
+# ioctl request cloning a whole file (linux/fs.h), supported by Btrfs, XFS, OCFS2 and others
+FICLONE = 0x40049409
+
+# Strategies tried, in order, for each FILE_PLACEMENT setting; 'copy' always works
+FALLBACKS = {
+    'hardlink': ('hardlink', 'reflink', 'copy_file_range', 'copy'),
+    'reflink': ('reflink', 'copy_file_range', 'copy'),
+    'copy_file_range': ('copy_file_range', 'copy'),
+    'symlink': ('symlink', 'copy'),
+    'copy': ('copy',),
+}
+
+# Errors meaning a strategy isn't available between two filesystems
+_UNSUPPORTED_ERRNOS = {
+    errno.EXDEV, errno.EPERM, errno.EMLINK, errno.EINVAL, errno.ENOSYS,
+    errno.EOPNOTSUPP, errno.ENOTTY,
+}
+
+# (strategy, source device, destination device) combinations known to fail
+_unsupported = set()
+_lock = threading.Lock()
+
+class _Unsupported(Exception):
+    """A strategy can't be used for this source and destination."""
+
+def place_file(src, dest, strategy=None):
+    """
+    Put a copy of src at dest, as cheaply as the filesystem allows.
+    
+    Strategies that fail because of the filesystems involved (e.g. a hard link
+    across devices) fall back to the next one, ending with a regular copy, and
+    are not tried again for the same pair of devices.
+    
+    Args:
+        src (str): File to place.
+        dest (str): Destination path; an existing file there is replaced.
+        strategy (str, optional): One of FALLBACKS. Defaults to FILE_PLACEMENT.
+    
+    Returns:
+        str: The strategy that was used.
+    
+    Raises:
+        OSError: If the file could not be placed at all.
+    """
+    strategy = strategy or FILE_PLACEMENT
+    candidates = FALLBACKS.get(strategy)
+    if candidates is None:
+        print(f"Warning: Unknown FILE_PLACEMENT '{strategy}', copying files instead.")
+        candidates = FALLBACKS['copy']
+    
+    src_dev = os.stat(src).st_dev
+    dest_dev = os.stat(os.path.dirname(os.path.abspath(dest))).st_dev
+    
+    for candidate in candidates:
+        if candidate != 'copy' and (candidate, src_dev, dest_dev) in _unsupported:
+            continue
+        if candidate == 'symlink' and is_temp_dir(src):
+            # Staged zip members are deleted after the run
+            continue
+        
+        _remove_existing(dest)
+        try:
+            _STRATEGIES[candidate](src, dest)
+            return candidate
+        except _Unsupported:
+            with _lock:
+                _unsupported.add((candidate, src_dev, dest_dev))
+        except OSError as e:
+            if candidate == 'copy' or e.errno not in _UNSUPPORTED_ERRNOS:
+                raise
+            with _lock:
+                _unsupported.add((candidate, src_dev, dest_dev))
+    
+    raise OSError(f"Could not place '{src}' at '{dest}'")
+
+def _remove_existing(dest):
+    """Remove a file or link left at the destination by an earlier run or attempt."""
+    if os.path.lexists(dest) and not os.path.isdir(dest):
+        os.remove(dest)
+
+def _hardlink(src, dest):
+    """Link dest to the same inode as src (no data is written)."""
+    os.link(src, dest)
+
+def _symlink(src, dest):
+    """Make dest a symbolic link to the absolute path of src."""
+    os.symlink(os.path.abspath(src), dest)
+
+def _reflink(src, dest):
+    """Clone src into dest with copy-on-write extents (no data is written)."""
+    try:
+        import fcntl
+    except ImportError:
+        raise _Unsupported()
+    
+    with open(src, 'rb') as src_file, open(dest, 'wb') as dest_file:
+        try:
+            fcntl.ioctl(dest_file.fileno(), FICLONE, src_file.fileno())
+        except OSError:
+            dest_file.close()
+            os.remove(dest)
+            raise
+    shutil.copystat(src, dest)
+
+def _copy_file_range(src, dest):
+    """Copy src into dest inside the kernel (server-side on NFS 4.2 and SMB)."""
+    if not hasattr(os, 'copy_file_range'):
+        raise _Unsupported()
+    
+    with open(src, 'rb') as src_file, open(dest, 'wb') as dest_file:
+        remaining = os.fstat(src_file.fileno()).st_size
+        try:
+            while remaining > 0:
+                copied = os.copy_file_range(src_file.fileno(), dest_file.fileno(), min(remaining, 1 << 30))
+                if copied == 0:
+                    break
+                remaining -= copied
+        except OSError:
+            dest_file.close()
+            os.remove(dest)
+            raise
+    shutil.copystat(src, dest)
+
+def _copy(src, dest):
+    """Regular copy with metadata (uses sendfile on Linux)."""
+    shutil.copy2(src, dest)
+
+_STRATEGIES = {
+    'hardlink': _hardlink,
+    'reflink': _reflink,
+    'copy_file_range': _copy_file_range,
+    'symlink': _symlink,
+    'copy': _copy,
+}
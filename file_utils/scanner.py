@@ -0,0 +1,268 @@
+"""Scans directory trees with os.scandir, listing subtrees concurrently."""
+
+import os
+import re
+import queue
+import fnmatch
+import threading
+from settings import (
+    EXCLUDED_FILE_PATTERNS,
+    SCAN_INCLUDE_GLOBS,
+    SCAN_EXCLUDE_GLOBS,
+    SCAN_PRUNE_DIRS,
+    SCAN_WORKERS,
+    SCAN_QUEUE_SIZE
+)
+
+# Result queue marker telling the consumer that the scan is complete
+_DONE = object()
+
+def _glob_regex(patterns):
+    """Compile shell-style patterns into one regex, or None if there are none."""
+    if not patterns:
+        return None
+    return re.compile('|'.join(f"(?:{fnmatch.translate(pattern)})" for pattern in patterns))
+
+class FileMatcher:
+    """
+    Decides which files and directories a scan includes, with precompiled rules.
+    
+    EXCLUDED_FILE_PATTERNS without wildcards match file names that start or
+    end with them ('~$', '._', '.tmp'); everything else is a shell-style glob.
+    Globs without a '/' match the file or directory name, globs with a '/'
+    match the path relative to the scanned directory ('/'-separated).
+    """
+    
+    def __init__(self, excluded=None, include_globs=None, exclude_globs=None, prune_dirs=None):
+        """
+        Compile the rules.
+        
+        Args:
+            excluded (list, optional): Temporary/lock file patterns. Defaults to EXCLUDED_FILE_PATTERNS.
+            include_globs (list, optional): If not empty, only matching files are included.
+                Defaults to SCAN_INCLUDE_GLOBS.
+            exclude_globs (list, optional): Files to skip. Defaults to SCAN_EXCLUDE_GLOBS.
+            prune_dirs (list, optional): Directories not to descend into. Defaults to SCAN_PRUNE_DIRS.
+        """
+        excluded = EXCLUDED_FILE_PATTERNS if excluded is None else excluded
+        include_globs = SCAN_INCLUDE_GLOBS if include_globs is None else include_globs
+        exclude_globs = SCAN_EXCLUDE_GLOBS if exclude_globs is None else exclude_globs
+        prune_dirs = SCAN_PRUNE_DIRS if prune_dirs is None else prune_dirs
+        
+        # Plain patterns are name prefixes or suffixes; fold them into the name globs
+        name_globs = []
+        for pattern in list(excluded) + [g for g in exclude_globs if '/' not in g]:
+            if any(char in pattern for char in '*?['):
+                name_globs.append(pattern)
+            else:
+                escaped = pattern.replace('[', '[[]')
+                name_globs.extend([escaped + '*', '*' + escaped])
+        
+        self._excluded_name = _glob_regex(name_globs)
+        self._excluded_path = _glob_regex([g for g in exclude_globs if '/' in g])
+        self._included_name = _glob_regex([g for g in include_globs if '/' not in g])
+        self._included_path = _glob_regex([g for g in include_globs if '/' in g])
+        self._has_includes = bool(include_globs)
+        self._pruned_name = _glob_regex([g for g in prune_dirs if '/' not in g])
+        self._pruned_path = _glob_regex([g for g in prune_dirs if '/' in g])
+    
+    def accepts_file(self, name, rel_path):
+        """
+        Check whether a file is included.
+        
+        Args:
+            name (str): File name.
+            rel_path (str): Path relative to the scanned directory, '/'-separated.
+        
+        Returns:
+            bool: True if the file passes the exclusion and include rules.
+        """
+        if self._excluded_name is not None and self._excluded_name.match(name):
+            return False
+        if self._excluded_path is not None and self._excluded_path.match(rel_path):
+            return False
+        if not self._has_includes:
+            return True
+        return bool((self._included_name is not None and self._included_name.match(name))
+                    or (self._included_path is not None and self._included_path.match(rel_path)))
+    
+    def accepts_dir(self, name, rel_path):
+        """
+        Check whether a directory is descended into.
+        
+        Args:
+            name (str): Directory name.
+            rel_path (str): Path relative to the scanned directory, '/'-separated.
+        
+        Returns:
+            bool: False if the directory is pruned.
+        """
+        if self._pruned_name is not None and self._pruned_name.match(name):
+            return False
+        return not (self._pruned_path is not None and self._pruned_path.match(rel_path))
+    
+    def accepts_path(self, rel_path):
+        """
+        Check a file given only by its relative path (e.g. a zip member).
+        
+        Args:
+            rel_path (str): Path relative to the scanned root, '/'-separated.
+        
+        Returns:
+            bool: True if no parent directory is pruned and the file is included.
+        """
+        parts = rel_path.split('/')
+        for depth in range(1, len(parts)):
+            if not self.accepts_dir(parts[depth - 1], '/'.join(parts[:depth])):
+                return False
+        return self.accepts_file(parts[-1], rel_path)
+
+_default_matcher = None
+_default_matcher_lock = threading.Lock()
+
+def get_default_matcher():
+    """Return the matcher for the rules in settings, compiling it on first use."""
+    global _default_matcher
+    with _default_matcher_lock:
+        if _default_matcher is None:
+            _default_matcher = FileMatcher()
+        return _default_matcher
+
+def scan_directory(root, matcher=None, workers=None):
+    """
+    Yield the files below a directory as they are found.
+    
+    With more than one worker, directories are listed concurrently by a pool
+    of threads, which hides the latency of network filesystems. Results are
+    yielded per directory in no particular order, and the scan stays at most
+    SCAN_QUEUE_SIZE directories ahead of the consumer. Symbolic links to
+    directories are not followed (like os.walk).
+    
+    Args:
+        root (str): Directory to scan.
+        matcher (FileMatcher, optional): Rules to apply. Defaults to the settings.
+        workers (int, optional): Scanning threads. Defaults to SCAN_WORKERS.
+    
+    Yields:
+        tuple: (os.DirEntry, rel_dir) for every included file, where rel_dir is
+            the directory relative to root ('' at the top, os.sep-separated),
+            one string object shared by all files of that directory. The entry's
+            cached stat data can be used without another system call where the
+            OS provides it.
+    """
+    matcher = matcher or get_default_matcher()
+    workers = SCAN_WORKERS if workers is None else workers
+    if workers <= 1:
+        yield from _scan_sequential(root, matcher)
+        return
+    
+    results = queue.Queue(maxsize=max(1, SCAN_QUEUE_SIZE))
+    scanner = _ParallelScan(root, matcher, results, workers)
+    scanner.start()
+    try:
+        while True:
+            found = results.get()
+            if found is _DONE:
+                return
+            yield from found
+    finally:
+        scanner.stop()
+
+def _list_dir(path, rel_dir, matcher):
+    """List one directory; return its included files and the subdirectories to scan."""
+    files = []
+    subdirs = []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                rel_path = rel_dir + os.sep + entry.name if rel_dir else entry.name
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                glob_path = rel_path if os.sep == '/' else rel_path.replace(os.sep, '/')
+                if is_dir:
+                    # Like os.walk, don't follow links to directories
+                    if not entry.is_symlink() and matcher.accepts_dir(entry.name, glob_path):
+                        subdirs.append((entry.path, rel_path))
+                elif matcher.accepts_file(entry.name, glob_path):
+                    files.append((entry, rel_dir))
+    except OSError as e:
+        print(f"Warning: Could not scan directory '{path}': {e}")
+    return files, subdirs
+
+def _scan_sequential(root, matcher):
+    """Scan depth-first on the calling thread."""
+    stack = [(root, '')]
+    while stack:
+        path, rel_dir = stack.pop()
+        files, subdirs = _list_dir(path, rel_dir, matcher)
+        yield from files
+        stack.extend(reversed(subdirs))
+
+class _ParallelScan:
+    """A pool of threads listing the directories of one tree."""
+    
+    def __init__(self, root, matcher, results, workers):
+        """
+        Initialize the scan.
+        
+        Args:
+            root (str): Directory to scan.
+            matcher (FileMatcher): Rules to apply.
+            results (queue.Queue): Receives lists of found files, then _DONE.
+            workers (int): Number of threads.
+        """
+        self.matcher = matcher
+        self.results = results
+        self.workers = workers
+        self._dirs = queue.Queue()
+        self._dirs.put((root, ''))
+        self._outstanding = 1
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._threads = []
+    
+    def start(self):
+        """Start the scanning threads."""
+        for number in range(self.workers):
+            thread = threading.Thread(target=self._work, daemon=True, name=f"scanner-{number + 1}")
+            thread.start()
+            self._threads.append(thread)
+    
+    def stop(self):
+        """Stop scanning, e.g. when the consumer gave up early."""
+        self._stopped.set()
+        for _ in self._threads:
+            self._dirs.put(None)
+    
+    def _work(self):
+        """List directories until the tree is done or the scan is stopped."""
+        while True:
+            item = self._dirs.get()
+            if item is None or self._stopped.is_set():
+                return
+            
+            files, subdirs = _list_dir(item[0], item[1], self.matcher)
+            with self._lock:
+                self._outstanding += len(subdirs)
+            for subdir in subdirs:
+                self._dirs.put(subdir)
+            if files:
+                self._put(files)
+            
+            with self._lock:
+                self._outstanding -= 1
+                finished = self._outstanding == 0
+            if finished:
+                self._put(_DONE)
+                self.stop()
+    
+    def _put(self, item):
+        """Hand results to the consumer, waiting while it is behind."""
+        while not self._stopped.is_set():
+            try:
+                self.results.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
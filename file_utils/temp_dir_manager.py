@@ -7,6 +7,11 @@ import atexit
 # Keep track of temporary directories created for zip extraction
 _temp_dirs_to_clean = []
 
+# The same directories as a set, and the directories they were created in,
+# so membership checks don't scan the list
+_temp_dir_set = set()
+_temp_dir_parents = set()
+
 def register_temp_dir_for_cleanup(temp_dir):
     """
     Registers a temporary directory for cleanup when the program exits.
@@ -14,11 +19,18 @@ def register_temp_dir_for_cleanup(temp_dir):
     Args:
         temp_dir (str): Path to the temporary directory.
     """
+    temp_dir = os.path.abspath(temp_dir)
     _temp_dirs_to_clean.append(temp_dir)
+    _temp_dir_set.add(temp_dir)
+    _temp_dir_parents.add(os.path.dirname(temp_dir))
 
 def is_temp_dir(path):
     """
-    Checks if a path is a temporary directory we've created.
+    Checks if a path is, or is inside, a temporary directory we've created.
+    
+    Temporary directories are all created in one or two parent directories
+    (the system temp folder), so only the path component below each parent
+    is looked up, however many temporary directories exist.
     
     Args:
         path (str): Path to check.
@@ -26,7 +38,15 @@ def is_temp_dir(path):
     Returns:
         bool: True if the path is a temporary directory, False otherwise.
     """
-    return any(temp_dir in path for temp_dir in _temp_dirs_to_clean)
+    path = os.path.abspath(path)
+    for parent in _temp_dir_parents:
+        prefix = parent.rstrip(os.sep) + os.sep
+        if not path.startswith(prefix):
+            continue
+        end = path.find(os.sep, len(prefix))
+        if (path if end < 0 else path[:end]) in _temp_dir_set:
+            return True
+    return False
 
 def cleanup_temp_dirs():
     """Removes all temporary directories created during processing."""
@@ -35,6 +55,8 @@ def cleanup_temp_dirs():
             print(f"Cleaning up temporary directory: {temp_dir}")
             shutil.rmtree(temp_dir)
     _temp_dirs_to_clean.clear()
+    _temp_dir_set.clear()
+    _temp_dir_parents.clear()
 
 # Register the cleanup function to be called upon script exit
 atexit.register(cleanup_temp_dirs)
\ No newline at end of file
@@ -0,0 +1,125 @@
+"""Compact representation of one discovered input file."""
+
+import os
+import sys
+
+class WorkItem:
+    """
+    One file to convert or copy.
+
+    A large run keeps millions of these alive, so they are slotted and share
+    their strings: the source name, the scanned root directory and the
+    directory part of the internal path are interned, and the file's path is
+    only joined together when asked for. Items keep the mapping interface of
+    the file info dicts they replace (item['path'], item.get('archive'),
+    item['path'] = staged_path, dict(item)).
+    """
+
+    __slots__ = ('source', 'root', 'internal_dir', 'name', 'archive', 'container', 'member',
+                 'size', 'mtime_ns', 'crc', '_path')
+
+    # Keys of the mapping interface
+    KEYS = ('path', 'source', 'internal_path', 'archive', 'container', 'member', 'size',
+            'mtime_ns', 'crc')
+    _KEY_SET = frozenset(KEYS)
+
+    def __init__(self, source, internal_dir='', name='', root=None, path=None, archive=None,
+                 container=None, member=None, size=None, mtime_ns=None, crc=None):
+        """
+        Initialize the item. Use the direct(), in_directory() and in_archive() constructors.
+
+        Args:
+            source (str): Source name ('direct', or the directory/archive name).
+            internal_dir (str): Directory of the file within its source ('' at the top).
+            name (str): File name within its source ('' for direct files).
+            root (str, optional): Directory the internal path is relative to.
+            path (str, optional): Full path, if it isn't root + internal path.
+            archive (str, optional): Archive file the item is a member of.
+            container (tuple, optional): Member names of the nested archives the
+                item is in, outermost first (None if it is directly in 'archive').
+            member (str, optional): Member name within the (innermost) archive.
+            size (int, optional): Size in bytes, if known.
+            mtime_ns (int, optional): Modification time, if known.
+            crc (int, optional): CRC-32 of a zip member (None for tar members).
+        """
+        self.source = sys.intern(source)
+        self.internal_dir = sys.intern(internal_dir)
+        self.name = name
+        self.root = sys.intern(root) if root is not None else None
+        self._path = path
+        self.archive = sys.intern(archive) if archive is not None else None
+        self.container = container
+        self.member = member
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.crc = crc
+
+    @classmethod
+    def direct(cls, path):
+        """Return an item for a file given directly as input."""
+        return cls('direct', path=path)
+
+    @classmethod
+    def in_directory(cls, root, source, internal_dir, name, size=None, mtime_ns=None):
+        """Return an item for a file found below root (internal_dir is relative to it)."""
+        return cls(source, internal_dir, name, root=root, size=size, mtime_ns=mtime_ns)
+
+    @classmethod
+    def in_archive(cls, archive, member, source, internal_path, size, mtime_ns, crc, container=None):
+        """Return an item for an archive member; it has no path until it is staged."""
+        internal_dir, name = os.path.split(internal_path)
+        return cls(source, internal_dir, name, archive=archive, container=container, member=member,
+                   size=size, mtime_ns=mtime_ns, crc=crc)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Return an item for a file info dictionary (e.g. read back from a journal)."""
+        internal_dir, name = os.path.split(data.get('internal_path') or '')
+        container = tuple(data['container']) if data.get('container') else None
+        return cls(data['source'], internal_dir, name, path=data.get('path'),
+                   archive=data.get('archive'), container=container, member=data.get('member'),
+                   size=data.get('size'), mtime_ns=data.get('mtime_ns'), crc=data.get('crc'))
+
+    @property
+    def path(self):
+        """Full path of the file, or None for an archive member that isn't staged."""
+        if self._path is not None or self.root is None:
+            return self._path
+        return os.path.join(self.root, self.internal_dir, self.name)
+
+    @path.setter
+    def path(self, value):
+        self._path = value
+
+    @property
+    def internal_path(self):
+        """Path of the file within its source ('' for direct files)."""
+        if not self.internal_dir:
+            return self.name
+        return self.internal_dir + os.sep + self.name
+
+    def __getitem__(self, key):
+        if key not in self._KEY_SET:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self._KEY_SET or key == 'internal_path':
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self._KEY_SET
+
+    def get(self, key, default=None):
+        """Return a field like dict.get(); unset fields are None."""
+        if key not in self._KEY_SET:
+            return default
+        return getattr(self, key)
+
+    def keys(self):
+        """Return the mapping keys, so dict(item) gives a file info dictionary."""
+        return self.KEYS
+
+    def __repr__(self):
+        return f"WorkItem(source={self.source!r}, internal_path={self.internal_path!r}, path={self.path!r})"
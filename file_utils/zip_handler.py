@@ -1,10 +1,14 @@
 """Handles extraction and processing of zip files."""
 
 import os
+import shutil
 import zipfile
 import tempfile
+import threading
 from .directory_handler import get_files_from_directory
 from .temp_dir_manager import register_temp_dir_for_cleanup
+from .archive_handler import open_archive
+from utils import metrics, events
 
 def extract_zip(path, source_name=None):
     """
@@ -15,7 +19,7 @@ def extract_zip(path, source_name=None):
         source_name (str, optional): The name to use as the source. Defaults to zip filename.
         
     Returns:
-        list: A list of dictionaries, each containing 'path', 'source', and 'internal_path'.
+        list: WorkItems with 'path', 'source', and 'internal_path'.
     """
     file_infos = []
 
@@ -43,4 +47,170 @@ def extract_zip(path, source_name=None):
     except Exception as e:
         print(f"An error occurred while processing zip file '{path}': {e}")
 
-    return file_infos
\ No newline at end of file
+    return file_infos
+
+class ScratchBudget:
+    """Limits how many bytes of staged files may exist at the same time."""
+    
+    def __init__(self, max_bytes):
+        """
+        Initialize the budget.
+        
+        Args:
+            max_bytes (int): Maximum number of staged bytes (0 = unlimited).
+        """
+        self.max_bytes = max_bytes
+        self.used = 0
+        self.peak = 0
+        self._condition = threading.Condition()
+    
+    def acquire(self, size):
+        """
+        Reserve space, blocking until enough staged files have been released.
+        
+        A single file larger than the whole budget is still let through once
+        nothing else is staged.
+        
+        Args:
+            size (int): Number of bytes to reserve.
+        """
+        with self._condition:
+            while (self.max_bytes and self.used > 0
+                   and self.used + size > self.max_bytes):
+                self._condition.wait()
+            self.used += size
+            self.peak = max(self.peak, self.used)
+    
+    def release(self, size):
+        """
+        Return reserved space to the budget.
+        
+        Args:
+            size (int): Number of bytes to release.
+        """
+        with self._condition:
+            self.used -= size
+            self._condition.notify_all()
+
+class ZipStager:
+    """
+    Extracts individual archive members to scratch space and removes them when done.
+    
+    Archives are kept open across members. A nested archive is read in place
+    from its parent when it is stored uncompressed; otherwise it is copied out
+    of its parent once (outside the scratch budget) and deleted again when
+    members of a different nested archive are staged, so only the chain of
+    archives currently being read exists on disk.
+    """
+    
+    def __init__(self, budget):
+        """
+        Initialize the stager.
+        
+        Args:
+            budget (ScratchBudget): Budget limiting the staged bytes.
+        """
+        self.budget = budget
+        self.staging_dir = tempfile.mkdtemp(prefix="doc2pdf-stage-")
+        register_temp_dir_for_cleanup(self.staging_dir)
+        self._readers = {}
+        self._copies = {}
+        self._lock = threading.Lock()
+        self._counter = 0
+    
+    def _open_reader(self, archive, container):
+        """Return the open reader of an archive or of an archive nested in it."""
+        key = (archive,) + container
+        reader = self._readers.get(key)
+        if reader is not None:
+            return reader
+        
+        if not container:
+            reader = open_archive(archive, archive)
+        else:
+            self._close_nested(keep=key)
+            parent = self._open_reader(archive, container[:-1])
+            name = container[-1]
+            if parent.member(name).stored:
+                reader = open_archive(parent.open(name), name)
+            else:
+                copy_path = os.path.join(self._new_dir(), os.path.basename(name))
+                with parent.open(name) as src, open(copy_path, 'wb') as dst:
+                    shutil.copyfileobj(src, dst, 1024 * 1024)
+                reader = open_archive(copy_path, name)
+                self._copies[key] = copy_path
+        self._readers[key] = reader
+        return reader
+    
+    def _close_nested(self, keep):
+        """Close the nested archives that aren't part of the given chain."""
+        for key in list(self._readers):
+            if len(key) > 1 and key != keep[:len(key)]:
+                self._readers.pop(key).close()
+                copy_path = self._copies.pop(key, None)
+                if copy_path is not None:
+                    shutil.rmtree(os.path.dirname(copy_path), ignore_errors=True)
+    
+    def _new_dir(self):
+        """Create a new, uniquely numbered folder in the staging directory."""
+        self._counter += 1
+        path = os.path.join(self.staging_dir, str(self._counter))
+        os.makedirs(path)
+        return path
+    
+    def stage(self, file_info):
+        """
+        Extract a member and set its 'path'. Blocks while the scratch budget is full.
+        
+        Args:
+            file_info (dict): File info from list_archive_members().
+        
+        Returns:
+            bool: True if the member was extracted, False otherwise.
+        """
+        self.budget.acquire(file_info['size'])
+        extract_span = metrics.span('extract', bytes=file_info['size'],
+                                    ext=os.path.splitext(file_info['member'])[1].lower())
+        try:
+            with self._lock:
+                reader = self._open_reader(file_info['archive'], file_info['container'] or ())
+                # One folder per member keeps the original file name for the output
+                member_dir = self._new_dir()
+                staged_path = os.path.join(member_dir, os.path.basename(file_info['internal_path']))
+                
+                with extract_span, reader.open(file_info['member']) as src, open(staged_path, 'wb') as dst:
+                    shutil.copyfileobj(src, dst, 1024 * 1024)
+            mtime = file_info['mtime_ns']
+            os.utime(staged_path, ns=(mtime, mtime))
+            
+            file_info['path'] = staged_path
+            return True
+        except Exception as e:
+            events.publish(events.FAILED, file_info['member'],
+                           message=f"could not extract from '{file_info['archive']}': {e}")
+            self.budget.release(file_info['size'])
+            return False
+    
+    def release(self, file_info):
+        """
+        Delete a staged member and give its space back to the budget.
+        
+        Args:
+            file_info (dict): File info previously passed to stage().
+        """
+        staged_path = file_info['path']
+        if staged_path is None:
+            return
+        shutil.rmtree(os.path.dirname(staged_path), ignore_errors=True)
+        file_info['path'] = None
+        self.budget.release(file_info['size'])
+    
+    def close(self):
+        """Close open archives and remove the staging directory."""
+        with self._lock:
+            # Nested archives first: they read from their parents
+            for key in sorted(self._readers, key=len, reverse=True):
+                self._readers[key].close()
+            self._readers.clear()
+            self._copies.clear()
+        shutil.rmtree(self.staging_dir, ignore_errors=True)
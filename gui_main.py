@@ -9,89 +9,249 @@ Features multithreaded processing for faster conversion.
 """
 
 import os
+import time
+import html
+import secrets
 import tempfile
 import shutil
 import streamlit as st
-import zipfile
-from io import BytesIO
 from converters import get_converter
-from file_utils import setup_output_directory
-from conversion import convert_with_structure
-from settings import COPY_NON_CONVERTIBLE_FILES, USE_MULTITHREADING
+from file_utils import setup_output_directory, ZipSink
+from conversion.job_manager import get_job_manager, QUEUED, FAILED
+from converters.conversion_cache import get_cache_stats
+from settings import (
+    COPY_NON_CONVERTIBLE_FILES,
+    USE_MULTITHREADING,
+    CONVERSION_CACHE_ENABLED,
+    PROGRESS_INTERVAL,
+    GUI_ARTIFACT_TTL
+)
 from utils.thread_manager import get_max_workers
+from utils import metrics
+from utils.events import format_progress
+
+# Result archives are served from here by Streamlit's static file serving
+# (server.enableStaticServing in .streamlit/config.toml), streamed from disk
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+ARTIFACT_PREFIX = 'doc2pdf-'
+ARCHIVE_NAME = 'converted_output.zip'
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+def save_upload(uploaded, directory):
+    """
+    Write an uploaded file to disk for conversion.
+    
+    Streamlit already holds the whole upload in memory (UploadedFile is a
+    BytesIO), so this doesn't lower peak memory; copying in chunks only avoids
+    a second full-size copy from getvalue(). The memory is given back when the
+    uploader is reset after submitting the job.
+    
+    Args:
+        uploaded (UploadedFile): File from st.file_uploader.
+        directory (str): Directory to write it to.
+        
+    Returns:
+        str: Path of the written file.
+    """
+    file_path = os.path.join(directory, os.path.basename(uploaded.name))
+    uploaded.seek(0)
+    with open(file_path, "wb") as f:
+        shutil.copyfileobj(uploaded, f, UPLOAD_CHUNK_SIZE)
+    return file_path
+
+def new_artifact_dir():
+    """Create an unguessable directory under STATIC_DIR for one session's result."""
+    os.makedirs(STATIC_DIR, exist_ok=True)
+    return tempfile.mkdtemp(prefix=ARTIFACT_PREFIX + secrets.token_urlsafe(16) + '-', dir=STATIC_DIR)
+
+def expire_artifacts():
+    """Delete result archives older than GUI_ARTIFACT_TTL seconds, from any session."""
+    if not os.path.isdir(STATIC_DIR):
+        return
+    # Archives of queued and running jobs are still to be written, however long they wait
+    live = {os.path.dirname(job.sink.target) for job in get_job_manager().active_jobs()
+            if job.sink is not None}
+    cutoff = time.time() - GUI_ARTIFACT_TTL
+    for entry in os.scandir(STATIC_DIR):
+        try:
+            if not entry.name.startswith(ARTIFACT_PREFIX) or entry.path in live:
+                continue
+            if entry.stat().st_mtime < cutoff:
+                shutil.rmtree(entry.path, ignore_errors=True)
+        except OSError:
+            pass
+
+def finish_job(job, temp_input_dir, temp_output_dir):
+    """
+    Finish a job's download archive and delete its temporary folders.
+    
+    Outputs are added to the archive while the job converts (see ZipSink);
+    this writes the rest and closes it. Runs on the job's background thread,
+    so it must not call Streamlit.
+    
+    Returns:
+        dict: 'path' of the archive and 'messages' to show, or None if the job failed.
+    """
+    archive_path = job.sink.target
+    try:
+        job.sink.close()
+        if job.error is not None:
+            shutil.rmtree(os.path.dirname(archive_path), ignore_errors=True)
+            return None
+        # The download's lifetime starts now, not when the job was queued
+        os.utime(os.path.dirname(archive_path))
+        mode = "converting/copying" if COPY_NON_CONVERTIBLE_FILES else "converting"
+        thread_info = f" using {get_max_workers()} threads" if USE_MULTITHREADING else " (single-threaded)"
+        messages = [f"Found {job.total} file(s) for {mode}{thread_info}.",
+                    f"Processing finished. {job.processed} file(s) processed."]
+        if CONVERSION_CACHE_ENABLED:
+            messages.append(f"{get_cache_stats()['hits']} file(s) served from the conversion cache.")
+        metrics.flush()
+        return {"path": archive_path, "messages": messages}
+    finally:
+        shutil.rmtree(temp_input_dir, ignore_errors=True)
+        shutil.rmtree(temp_output_dir, ignore_errors=True)
+
+def cancel_job():
+    """Cancel this session's job if it hasn't started yet."""
+    job_id = st.session_state.get("job_id")
+    # The job may have started since the button was shown
+    if job_id is not None and get_job_manager().cancel(job_id):
+        st.session_state.pop("job_id")
+        for directory in st.session_state.pop("job_dirs", ()):
+            shutil.rmtree(directory, ignore_errors=True)
+
+@st.fragment(run_every=PROGRESS_INTERVAL)
+def show_job_progress(job_id):
+    """Show the state of a running or queued job, refreshing until it is done."""
+    manager = get_job_manager()
+    job = manager.get(job_id)
+    if job is None or job.finished is not None:
+        # Let the whole page pick up the result
+        st.rerun()
+    
+    if job.state == QUEUED:
+        ahead = manager.position(job)
+        lane = " (fast lane)" if job.small else ""
+        st.info(f"Waiting for a free converter{lane}: {ahead} job(s) ahead of yours.")
+        st.button("Cancel", on_click=cancel_job)
+        return
+    
+    counts = job.tracker.snapshot()
+    fraction = min(1.0, counts['done'] / counts['total']) if counts['total'] else 0.0
+    st.progress(fraction, text=format_progress(counts) if counts['total'] else "Starting conversion...")
+    messages = job.tracker.recent_messages()
+    if messages:
+        st.code("\n".join(messages[-10:]), language=None)
+    status = manager.status()
+    st.caption(f"Server: {status['running']} job(s) running, {status['queued']} waiting, "
+               f"{status['converting']}/{status['conversion_slots']} converters busy.")
+
+def discard_artifact():
+    """Delete this session's result and reset the uploader for a new batch."""
+    artifact = st.session_state.pop("artifact", None)
+    if artifact:
+        shutil.rmtree(os.path.dirname(artifact["path"]), ignore_errors=True)
+    st.session_state["uploader_generation"] = st.session_state.get("uploader_generation", 0) + 1
 
 st.set_page_config(page_title="Document to PDF Converter", layout="centered")
 st.title("📄 Document to PDF Converter")
 
+expire_artifacts()
+owner = st.session_state.setdefault("owner", secrets.token_hex(8))
+
+# Pick up the result of a job that finished since the last run
+job_id = st.session_state.get("job_id")
+if job_id is not None:
+    job = get_job_manager().get(job_id)
+    if job is None:
+        st.session_state.pop("job_id")
+        st.error("Your conversion job is no longer available. Please upload the files again.")
+    elif job.finished is not None:
+        st.session_state.pop("job_id")
+        st.session_state.pop("job_dirs", None)
+        get_job_manager().forget(job_id)
+        if job.state == FAILED or job.result is None:
+            st.error(f"Conversion failed: {job.error}")
+        else:
+            st.session_state["artifact"] = job.result
+    else:
+        show_job_progress(job_id)
+        st.stop()
+
+artifact = st.session_state.get("artifact")
+if artifact and not os.path.exists(artifact["path"]):
+    st.session_state.pop("artifact")
+    artifact = None
+    st.warning("Your previous download has expired. Please upload the files again.")
+
+if artifact:
+    for message in artifact["messages"]:
+        st.success(message)
+    # Static files are streamed from disk, so the archive never has to fit in memory
+    url = "app/static/" + os.path.relpath(artifact["path"], STATIC_DIR).replace(os.sep, "/")
+    st.markdown(
+        f'<a href="{html.escape(url)}" download="{ARCHIVE_NAME}">⬇️ Download All as ZIP</a>',
+        unsafe_allow_html=True
+    )
+    st.caption(f"The download is available for {max(1, GUI_ARTIFACT_TTL // 60)} minute(s).")
+    st.button("Convert more files", on_click=discard_artifact)
+    st.stop()
+
 st.write("Drag and drop your files, folders (as zip), or select them below. Converted PDFs will be available for download.")
 
 uploaded_files = st.file_uploader(
     "Drop files or ZIP folders here",
-    type=["ppt", "pptx", "zip", "doc", "docx", "xls", "xlsx"],
-    accept_multiple_files=True
+    type=["ppt", "pptx", "zip", "tar", "gz", "tgz", "bz2", "xz", "doc", "docx", "xls", "xlsx"],
+    accept_multiple_files=True,
+    key=f"uploader-{st.session_state.get('uploader_generation', 0)}"
 )
 
 if uploaded_files:
-    if "zip_buffer" not in st.session_state:
-        with st.spinner("Processing files..."):
-            # Create a temp input directory
-            temp_input_dir = tempfile.mkdtemp()
-            temp_output_dir = tempfile.mkdtemp()
-            try:
-                input_paths = []
-                for uploaded in uploaded_files:
-                    file_path = os.path.join(temp_input_dir, uploaded.name)
-                    with open(file_path, "wb") as f:
-                        f.write(uploaded.getbuffer())
-                    input_paths.append(file_path)
-
-                # Prepare output directory
-                base_output_folder = setup_output_directory(temp_output_dir)
-
-                # Collect files to convert (simulate get_input_files)
-                from file_utils.input_collector import _process_file, _process_directory
-                files_to_convert = []
-                counts = {'convertible': 0, 'non_convertible': 0, 'zip': 0, 'dir': 0, 'invalid': 0}
-                for path in input_paths:
-                    if os.path.isfile(path):
-                        _process_file(path, files_to_convert, counts)
-                    elif os.path.isdir(path):
-                        _process_directory(path, files_to_convert, counts)
-
-                if not files_to_convert:
-                    st.error("No convertible files found.")
-                else:
-                    mode = "converting/copying" if COPY_NON_CONVERTIBLE_FILES else "converting"
-                    thread_info = f" using {get_max_workers()} threads" if USE_MULTITHREADING else " (single-threaded)"
-                    st.info(f"Found {len(files_to_convert)} file(s) for {mode}{thread_info}.")
-
-                    converter_name = os.environ.get('DOCUMENT_CONVERTER', 'libreoffice')
-                    converter_factory = get_converter(converter_name)
-                    total_processed = convert_with_structure(files_to_convert, base_output_folder, converter_factory)
-
-                    st.success(f"Processing finished. {total_processed} file(s) processed.")
-
-                    # Zip the output directory
-                    zip_buffer = BytesIO()
-                    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zipf:
-                        for root, _, files in os.walk(base_output_folder):
-                            for file in files:
-                                out_path = os.path.join(root, file)
-                                rel_path = os.path.relpath(out_path, base_output_folder)
-                                zipf.write(out_path, arcname=rel_path)
-                    zip_buffer.seek(0)
-                    st.session_state["zip_buffer"] = zip_buffer
-            finally:
-                shutil.rmtree(temp_input_dir)
-                shutil.rmtree(temp_output_dir)
-    else:
-        zip_buffer = st.session_state["zip_buffer"]
+    # Create a temp input directory
+    temp_input_dir = tempfile.mkdtemp()
+    temp_output_dir = tempfile.mkdtemp()
+    submitted = False
+    try:
+        input_paths = [save_upload(uploaded, temp_input_dir) for uploaded in uploaded_files]
 
-    st.download_button(
-        label="Download All as ZIP",
-        data=zip_buffer,
-        file_name="converted_output.zip",
-        mime="application/zip"
-    )
+        # Prepare output directory
+        base_output_folder = setup_output_directory(temp_output_dir)
+
+        # Collect files to convert (simulate get_input_files)
+        from file_utils.input_collector import _process_file, _process_directory
+        files_to_convert = []
+        counts = {'convertible': 0, 'non_convertible': 0, 'zip': 0, 'dir': 0, 'invalid': 0}
+        for path in input_paths:
+            if os.path.isfile(path):
+                _process_file(path, files_to_convert, counts)
+            elif os.path.isdir(path):
+                _process_directory(path, files_to_convert, counts)
+
+        if not files_to_convert:
+            st.error("No convertible files found.")
+        else:
+            converter_name = os.environ.get('DOCUMENT_CONVERTER', 'libreoffice')
+            converter_factory = get_converter(converter_name)
+            # The download archive is written to this session's folder while converting
+            artifact_dir = new_artifact_dir()
+            # Converted in the background by the server-wide job queue
+            job = get_job_manager().submit(
+                owner, files_to_convert, base_output_folder, converter_factory,
+                on_finish=lambda job: finish_job(job, temp_input_dir, temp_output_dir),
+                sink=ZipSink(os.path.join(artifact_dir, ARCHIVE_NAME))
+            )
+            st.session_state["job_id"] = job.id
+            st.session_state["job_dirs"] = (temp_input_dir, temp_output_dir, artifact_dir)
+            submitted = True
+    finally:
+        if not submitted:
+            shutil.rmtree(temp_input_dir)
+            shutil.rmtree(temp_output_dir)
+
+    if submitted:
+        # A new uploader key drops the uploaded bytes Streamlit keeps in memory
+        st.session_state["uploader_generation"] = st.session_state.get("uploader_generation", 0) + 1
+        st.rerun()
 else:
     st.info("Please upload files or zip folders to begin.")
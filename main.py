@@ -6,44 +6,259 @@ A utility for converting documents to PDF files,
 supporting direct file input, directory scanning, and zip archives.
 Can also copy non-convertible files to maintain directory structure.
 Features multithreaded processing for faster conversion.
+
+Run without arguments for the interactive prompt, or non-interactively:
+
+    python main.py [PATH ...] [--manifest FILE|-] [--null] [--output DIR] [--archive FILE] [--resume]
 """
 
 import os
 import sys
+import json
+import argparse
+from itertools import chain
 from converters import get_converter
-from file_utils import get_input_files, setup_output_directory
-from conversion import convert_with_structure
-from settings import COPY_NON_CONVERTIBLE_FILES, USE_MULTITHREADING, MAX_WORKERS
+from file_utils import get_input_files, setup_output_directory, open_output_sink, DirectorySink
+from file_utils.input_collector import (
+    get_input_paths, 
+    iter_input_files, 
+    iter_path_list,
+    new_input_counts, 
+    print_input_summary
+)
+from conversion import convert_with_structure, ConversionPipeline
+from converters.conversion_cache import get_cache_stats
+from settings import (
+    COPY_NON_CONVERTIBLE_FILES, 
+    USE_MULTITHREADING, 
+    MAX_WORKERS, 
+    CONVERSION_CACHE_ENABLED,
+    PIPELINE_MODE,
+    JOURNAL_ENABLED
+)
 from utils.thread_manager import get_max_workers
+from utils.events import ConsoleRenderer
+
+# Exit codes of non-interactive runs
+EXIT_OK = 0
+EXIT_FAILURES = 1   # Some files failed, some input paths didn't exist or --archive failed
+EXIT_NO_INPUT = 2   # Bad arguments, unreadable manifest or nothing to process
 
 
-def main():
+def main(argv=None):
     """Main entry point for the application."""
+    args = parse_args(argv)
+    if args.paths or args.manifest or args.resume:
+        return run_batch(args)
+
     # Create base output folder in the current directory
     current_dir = os.getcwd()
     base_output_folder = setup_output_directory(current_dir)
 
+    # Get the converter to use (default to LibreOffice)
+    converter_name = os.environ.get('DOCUMENT_CONVERTER', 'libreoffice')
+    converter_factory = get_converter(converter_name)
+
+    if PIPELINE_MODE:
+        total_processed = _run_pipeline(base_output_folder, converter_factory)
+    else:
+        total_processed = _run_phased(base_output_folder, converter_factory)
+
+    if total_processed is None:
+        return
+
+    print(f"\nProcessing finished. {total_processed} file(s) processed.")
+    if CONVERSION_CACHE_ENABLED:
+        stats = get_cache_stats()
+        print(f"Conversion cache: {stats['hits']} hit(s), {stats['misses']} miss(es), "
+              f"{stats['stored']} stored, {stats['evicted']} evicted.")
+
+
+def _run_phased(base_output_folder, converter_factory):
+    """Collect all input files first, then convert them."""
     # Get list of files to process (and print input counts)
     files_to_convert = get_input_files()
 
     # If no files found, exit
     if not files_to_convert:
         print("\nNo files found or selected for processing.")
-        return
+        return None
 
     mode = "converting/copying" if COPY_NON_CONVERTIBLE_FILES else "converting"
     thread_info = f" using {get_max_workers()} threads" if USE_MULTITHREADING else " (single-threaded)"
     print(f"Found {len(files_to_convert)} total file(s) for {mode}{thread_info}.")
 
-    # Get the converter to use (default to LibreOffice)
-    converter_name = os.environ.get('DOCUMENT_CONVERTER', 'libreoffice')
-    converter_factory = get_converter(converter_name)
-    
     # Convert files while preserving structure
-    total_processed = convert_with_structure(files_to_convert, base_output_folder, converter_factory)
+    return _with_progress(convert_with_structure, files_to_convert, base_output_folder, converter_factory)
+
+
+def _run_pipeline(base_output_folder, converter_factory):
+    """Convert files while the inputs are still being scanned."""
+    counts = new_input_counts()
+    input_paths = get_input_paths(counts)
+
+    # If nothing valid was entered, exit
+    if not input_paths:
+        print("\nNo files found or selected for processing.")
+        return None
+
+    pipeline = ConversionPipeline(base_output_folder, converter_factory)
+    total_processed = _with_progress(pipeline.run, iter_input_files(input_paths, counts))
+
+    print_input_summary(counts)
+    print(f"Found {pipeline.discovered} total file(s).")
+    return total_processed
+
+
+def parse_args(argv=None):
+    """Parse the command-line options of a non-interactive run."""
+    parser = argparse.ArgumentParser(
+        description="Convert documents to PDF. Without arguments, paths are entered interactively.")
+    parser.add_argument('paths', nargs='*', help="Files, directories or zip files to convert")
+    parser.add_argument('-m', '--manifest', action='append', default=[], metavar='FILE',
+                        help="Read more paths from FILE, one per line ('-' for stdin, repeatable)")
+    parser.add_argument('-0', '--null', action='store_true',
+                        help="Manifest paths are NUL-delimited, as written by 'find -print0'")
+    parser.add_argument('-o', '--output', metavar='DIR',
+                        help="Output directory (default: ./output)")
+    parser.add_argument('--archive', metavar='FILE',
+                        help="Also write the outputs to FILE while converting: a .zip, or a .tar "
+                             "(.tar.gz, .tar.bz2, .tar.xz) file")
+    parser.add_argument('--summary-json', metavar='FILE',
+                        help="Also write the run summary as JSON to FILE")
+    parser.add_argument('--resume', action='store_true',
+                        help="Continue an interrupted run into the same output directory, skipping "
+                             "files it finished; without paths, its unfinished files are re-queued")
+    return parser.parse_args(argv)
+
+
+def run_batch(args):
+    """
+    Convert the paths given on the command line and in manifests, without prompting.
     
-    print(f"\nProcessing finished. {total_processed} file(s) processed.")
+    Manifests are read lazily and files are converted while they are still
+    being read, so the work list can be arbitrarily large.
+    
+    Args:
+        args (argparse.Namespace): Options from parse_args().
+        
+    Returns:
+        int: Exit code (EXIT_OK, EXIT_FAILURES or EXIT_NO_INPUT).
+    """
+    if args.resume and not JOURNAL_ENABLED:
+        print("Error: --resume needs JOURNAL_ENABLED = True in settings.py (and in the interrupted run).")
+        return EXIT_NO_INPUT
+    
+    # Open every manifest up front so a typo fails before any work is done
+    manifests = []
+    for manifest in args.manifest:
+        if manifest == '-':
+            manifests.append(sys.stdin.buffer)
+            continue
+        try:
+            manifests.append(open(manifest, 'rb'))
+        except OSError as e:
+            print(f"Error: Could not read manifest '{manifest}': {e}")
+            return EXIT_NO_INPUT
+
+    sink = None
+    if args.archive:
+        sink = open_output_sink(os.path.abspath(args.archive))
+        if isinstance(sink, DirectorySink):
+            print(f"Error: Archive '{args.archive}' must end in .zip, .tar, .tar.gz, .tar.bz2 or .tar.xz.")
+            return EXIT_NO_INPUT
+
+    if args.output:
+        base_output_folder = os.path.abspath(args.output)
+        os.makedirs(base_output_folder, exist_ok=True)
+    else:
+        base_output_folder = setup_output_directory(os.getcwd())
+
+    converter_name = os.environ.get('DOCUMENT_CONVERTER', 'libreoffice')
+    pipeline = ConversionPipeline(base_output_folder, get_converter(converter_name), resume=args.resume,
+                                  sink=sink)
+    counts = new_input_counts()
+    resume_only = args.resume and not (args.paths or manifests)
+    if resume_only:
+        # Re-queue what the interrupted run left unfinished, without scanning the inputs again
+        file_infos = pipeline.unfinished()
+        print(f"Resuming {len(file_infos)} unfinished file(s) in '{base_output_folder}'.")
+    else:
+        paths = chain(args.paths, *(iter_path_list(stream, args.null) for stream in manifests))
+        file_infos = iter_input_files(paths, counts)
+
+    renderer = ConsoleRenderer()
+    renderer.start()
+    try:
+        total_processed = pipeline.run(file_infos)
+    finally:
+        renderer.stop()
+        for stream in manifests:
+            if stream is not sys.stdin.buffer:
+                stream.close()
+
+    archive_failed = False
+    if sink is not None:
+        try:
+            sink.close()
+            print(f"Wrote {sink.count} output file(s) to '{args.archive}'.")
+        except Exception as e:
+            print(f"Error: Could not write archive '{args.archive}': {e}")
+            archive_failed = True
+
+    progress = renderer.snapshot()
+    summary = {
+        'output': base_output_folder,
+        'archive': os.path.abspath(args.archive) if args.archive else None,
+        'discovered': pipeline.discovered,
+        'processed': total_processed,
+        'converted': progress['converted'],
+        'copied': progress['copied'],
+        'copied_after_failure': progress['fallback'],
+        'unchanged': progress['unchanged'] - pipeline.resumed,
+        'resumed': pipeline.resumed,
+        'duplicates': progress['duplicate'],
+        'duplicate_bytes_saved': pipeline.duplicate_bytes,
+        'cached': progress['cached'],
+        'failed': progress['failed'],
+        'missing_inputs': counts['missing'],
+        'seconds': round(progress['elapsed'], 3),
+    }
+
+    print_input_summary(counts)
+    print(f"Processed {total_processed} of {pipeline.discovered} file(s) in {summary['seconds']:.1f}s "
+          f"into '{base_output_folder}'.")
+    if summary['failed'] or summary['copied_after_failure']:
+        print(f"{summary['failed']} file(s) failed, {summary['copied_after_failure']} "
+              f"copied unconverted after a failed conversion.")
+
+    if not pipeline.discovered and not resume_only:
+        exit_code = EXIT_NO_INPUT
+    elif (summary['failed'] or summary['copied_after_failure'] or summary['missing_inputs']
+          or archive_failed):
+        exit_code = EXIT_FAILURES
+    else:
+        exit_code = EXIT_OK
+    summary['exit_code'] = exit_code
+
+    if args.summary_json:
+        try:
+            with open(args.summary_json, 'w', encoding='utf-8') as f:
+                json.dump(summary, f, indent=2)
+        except OSError as e:
+            print(f"Warning: Could not write summary '{args.summary_json}': {e}")
+    return exit_code
+
+
+def _with_progress(run, *args):
+    """Call run(*args) while showing conversion progress on the console."""
+    renderer = ConsoleRenderer()
+    renderer.start()
+    try:
+        return run(*args)
+    finally:
+        renderer.stop()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Document to PDF Converter - HTTP service
+========================================
+Lets other services convert documents over HTTP, without the web GUI.
+Jobs are queued on the same shared conversion pool the GUI uses.
+
+    python server_main.py [--host HOST] [--port PORT]
+
+Endpoints:
+
+    POST   /jobs?name=FILE          Submit a document or ZIP (request body); 202 with the job
+    GET    /jobs/ID                 Job status and progress (and output files once finished)
+    GET    /jobs/ID/result          ZIP archive of all outputs
+    GET    /jobs/ID/files/PATH      A single output file
+    DELETE /jobs/ID                 Cancel a queued job or delete a finished one
+    GET    /health                  Queue and pool status
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs, quote, unquote
+from converters import get_converter
+from file_utils import setup_output_directory, ZipSink
+from file_utils.input_collector import new_input_counts, _process_file
+from conversion.job_manager import get_job_manager, QUEUED, FAILED
+from settings import (
+    SERVER_HOST,
+    SERVER_PORT,
+    SERVER_MAX_UPLOADS,
+    SERVER_MAX_QUEUED_JOBS,
+    SERVER_MAX_UPLOAD_BYTES,
+    SERVER_RESULT_TTL
+)
+from utils import metrics
+
+JOB_DIR_PREFIX = 'doc2pdf-job-'
+ARCHIVE_NAME = 'converted_output.zip'
+CHUNK_SIZE = 1024 * 1024
+# Seconds clients are asked to wait before retrying a refused submission
+RETRY_AFTER = 5
+
+# Job id -> directory holding the job's upload, output and result archive
+_job_dirs = {}
+_job_dirs_lock = threading.Lock()
+_uploads = threading.BoundedSemaphore(max(1, SERVER_MAX_UPLOADS))
+_converter_factory = None
+
+
+def finish_job(job, job_dir):
+    """
+    Finish a job's result archive and delete its upload.
+
+    Outputs are added to the archive while the job converts (see ZipSink);
+    this writes the rest and closes it. Runs on the job's background thread.
+
+    Returns:
+        str: Path of the result archive, or None if the job failed.
+    """
+    shutil.rmtree(os.path.join(job_dir, 'input'), ignore_errors=True)
+    job.sink.close()
+    if job.error is not None:
+        return None
+    metrics.flush()
+    return job.sink.target
+
+
+def expire_jobs():
+    """Delete finished jobs older than SERVER_RESULT_TTL and jobs the manager no longer knows."""
+    manager = get_job_manager()
+    cutoff = time.time() - SERVER_RESULT_TTL
+    expired = []
+    with _job_dirs_lock:
+        for job_id, job_dir in list(_job_dirs.items()):
+            job = manager.get(job_id)
+            if job is not None and (job.finished is None or job.finished >= cutoff):
+                continue
+            manager.forget(job_id)
+            expired.append(job_dir)
+            del _job_dirs[job_id]
+    # Outside the lock, so requests for other jobs don't wait for the deletion
+    for job_dir in expired:
+        shutil.rmtree(job_dir, ignore_errors=True)
+
+
+def list_outputs(output_folder):
+    """Return the paths of a job's output files, relative to its output folder."""
+    outputs = []
+    for root, _, files in os.walk(output_folder):
+        for file in files:
+            outputs.append(os.path.relpath(os.path.join(root, file), output_folder).replace(os.sep, '/'))
+    return sorted(outputs)
+
+
+def describe_job(job):
+    """Return the JSON description of a job."""
+    manager = get_job_manager()
+    counts = job.tracker.snapshot() if job.state != QUEUED else None
+    description = {
+        'id': job.id,
+        'state': job.state,
+        'files': job.total,
+        'bytes': job.size,
+        'small': job.small,
+        'queued_seconds': round((job.started or time.time()) - job.submitted, 3),
+    }
+    if job.state == QUEUED:
+        description['position'] = manager.position(job)
+    else:
+        description['progress'] = {key: counts[key] for key in
+                                   ('done', 'total', 'converted', 'copied', 'cached', 'failed')}
+        description['running_seconds'] = round((job.finished or time.time()) - job.started, 3)
+    if job.state == FAILED:
+        description['error'] = str(job.error)
+    elif job.finished is not None:
+        description['processed'] = job.processed
+        description['result_url'] = f"/jobs/{job.id}/result"
+        description['outputs'] = [f"/jobs/{job.id}/files/{quote(path)}" for path in list_outputs(job.output_folder)]
+    return description
+
+
+class ConversionRequestHandler(BaseHTTPRequestHandler):
+    """Handles the service's endpoints; see the module docstring."""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'doc2pdf'
+
+    def do_GET(self):
+        """Return job status, results or service health."""
+        self._dispatch()
+
+    def do_POST(self):
+        """Submit a job."""
+        self._dispatch()
+
+    def do_DELETE(self):
+        """Cancel or delete a job."""
+        self._dispatch()
+
+    def _dispatch(self):
+        """Route the request to its handler."""
+        self.started = time.perf_counter()
+        self.timings = []
+        url = urlsplit(self.path)
+        parts = [unquote(part) for part in url.path.strip('/').split('/')]
+        expire_jobs()
+
+        if self.command == 'GET' and parts == ['health']:
+            return self._send_json(200, dict(get_job_manager().status(), status='ok'))
+        if parts == ['jobs']:
+            if self.command == 'POST':
+                return self._submit(parse_qs(url.query))
+            return self._send_error(405, "Use POST to submit a job.")
+        if len(parts) < 2 or parts[0] != 'jobs' or not parts[1].isdigit():
+            return self._send_error(404, "Not found.")
+
+        job = get_job_manager().get(int(parts[1]))
+        if job is None or job.id not in _job_dirs:
+            return self._send_error(404, "No such job.")
+        if self.command == 'DELETE' and len(parts) == 2:
+            return self._delete(job)
+        if self.command != 'GET':
+            return self._send_error(405, "Method not allowed.")
+        if len(parts) == 2:
+            return self._send_json(200, describe_job(job))
+        if parts[2:] == ['result']:
+            return self._send_result(job, job.result, ARCHIVE_NAME, 'application/zip')
+        if parts[2] == 'files' and len(parts) > 3:
+            return self._send_output(job, '/'.join(parts[3:]))
+        return self._send_error(404, "Not found.")
+
+    def _submit(self, query):
+        """Stream an uploaded document or ZIP to disk and queue it."""
+        name = os.path.basename((query.get('name') or [self.headers.get('X-Filename', '')])[0])
+        if not name:
+            return self._send_error(400, "Pass the file name as ?name=FILE or an X-Filename header.")
+        length = self.headers.get('Content-Length')
+        if length is None or not length.isdigit():
+            return self._send_error(411, "A Content-Length header is required.")
+        length = int(length)
+        if length > SERVER_MAX_UPLOAD_BYTES:
+            return self._send_error(413, f"Uploads are limited to {SERVER_MAX_UPLOAD_BYTES} bytes.")
+
+        # Refuse work before reading the body when the service is saturated
+        manager = get_job_manager()
+        if manager.status()['queued'] >= SERVER_MAX_QUEUED_JOBS:
+            return self._send_error(429, "Too many queued jobs, retry later.", retry=True)
+        if not _uploads.acquire(blocking=False):
+            return self._send_error(429, "Too many uploads in progress, retry later.", retry=True)
+
+        job_dir = tempfile.mkdtemp(prefix=JOB_DIR_PREFIX)
+        submitted = False
+        try:
+            upload_started = time.perf_counter()
+            input_dir = os.path.join(job_dir, 'input')
+            os.makedirs(input_dir)
+            upload_path = os.path.join(input_dir, name)
+            try:
+                received = self._receive(upload_path, length)
+            finally:
+                _uploads.release()
+            self.timings.append(('upload', time.perf_counter() - upload_started))
+            if received < length:
+                self.close_connection = True
+                return
+
+            files_to_convert = []
+            _process_file(upload_path, files_to_convert, new_input_counts())
+            if not files_to_convert:
+                return self._send_error(422, "No convertible files found.")
+
+            owner = self.headers.get('X-Client-Id') or self.client_address[0]
+            output_folder = setup_output_directory(job_dir)
+            job = manager.submit(owner, files_to_convert, output_folder, _converter_factory,
+                                 on_finish=lambda job: finish_job(job, job_dir),
+                                 sink=ZipSink(os.path.join(job_dir, ARCHIVE_NAME)))
+            with _job_dirs_lock:
+                _job_dirs[job.id] = job_dir
+            submitted = True
+            self._send_json(202, describe_job(job), headers={'Location': f"/jobs/{job.id}"})
+        finally:
+            if not submitted:
+                shutil.rmtree(job_dir, ignore_errors=True)
+
+    def _receive(self, path, length):
+        """Copy the request body to a file in chunks and return the bytes received."""
+        received = 0
+        with open(path, 'wb') as f:
+            while received < length:
+                chunk = self.rfile.read(min(CHUNK_SIZE, length - received))
+                if not chunk:
+                    break
+                f.write(chunk)
+                received += len(chunk)
+        return received
+
+    def _delete(self, job):
+        """Cancel a queued job or delete a finished one with its files."""
+        manager = get_job_manager()
+        if not manager.forget(job.id) and manager.get(job.id) is not None:
+            return self._send_error(409, "The job is running and can't be cancelled.")
+        with _job_dirs_lock:
+            job_dir = _job_dirs.pop(job.id, None)
+        if job_dir is not None:
+            shutil.rmtree(job_dir, ignore_errors=True)
+        self._send_json(200, {'id': job.id, 'deleted': True})
+
+    def _send_output(self, job, relative_path):
+        """Send one output file of a finished job."""
+        output_folder = os.path.realpath(job.output_folder)
+        path = os.path.realpath(os.path.join(output_folder, relative_path))
+        if not path.startswith(output_folder + os.sep) or not os.path.isfile(path):
+            return self._send_error(404, "No such output file.")
+        content_type = 'application/pdf' if path.lower().endswith('.pdf') else 'application/octet-stream'
+        self._send_result(job, path, os.path.basename(path), content_type)
+
+    def _send_result(self, job, path, download_name, content_type):
+        """Stream a file of a finished job, or explain why it isn't available."""
+        if job.finished is None:
+            return self._send_error(409, f"The job is {job.state}.", retry=True)
+        if job.state == FAILED or path is None:
+            return self._send_error(410, f"The job failed: {job.error}")
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            self._start_response(200, content_type, size, {
+                'Content-Disposition': f"attachment; filename*=UTF-8''{quote(download_name)}"
+            })
+            shutil.copyfileobj(f, self.wfile, CHUNK_SIZE)
+
+    def _send_json(self, status, body, headers=None):
+        """Send a JSON response."""
+        payload = json.dumps(body).encode('utf-8')
+        self._start_response(status, 'application/json', len(payload), headers)
+        self.wfile.write(payload)
+
+    def _send_error(self, status, message, retry=False):
+        """Send a JSON error response."""
+        headers = {'Retry-After': str(RETRY_AFTER)} if retry else None
+        if status >= 400 and self.command == 'POST':
+            # The unread request body would be taken for the next request
+            self.close_connection = True
+        self._send_json(status, {'error': message}, headers)
+
+    def _start_response(self, status, content_type, length, headers=None):
+        """Send the status line and headers, including per-request timings."""
+        self.timings.append(('total', time.perf_counter() - self.started))
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(length))
+        self.send_header('Server-Timing', ', '.join(f"{name};dur={seconds * 1000:.1f}"
+                                                   for name, seconds in self.timings))
+        self.send_header('X-Queue-Depth', str(get_job_manager().status()['queued']))
+        if self.close_connection:
+            self.send_header('Connection', 'close')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+
+
+def parse_args(argv=None):
+    """Parse the command line."""
+    parser = argparse.ArgumentParser(description="Serve document to PDF conversion over HTTP.")
+    parser.add_argument('--host', default=SERVER_HOST, help=f"address to listen on (default: {SERVER_HOST})")
+    parser.add_argument('--port', type=int, default=SERVER_PORT, help=f"port to listen on (default: {SERVER_PORT})")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Run the HTTP service until interrupted."""
+    global _converter_factory
+    args = parse_args(argv)
+
+    # Get the converter to use (default to LibreOffice)
+    converter_name = os.environ.get('DOCUMENT_CONVERTER', 'libreoffice')
+    _converter_factory = get_converter(converter_name)
+    # Created here so finished jobs are kept for SERVER_RESULT_TTL, not the GUI's TTL
+    get_job_manager(SERVER_RESULT_TTL)
+
+    server = ThreadingHTTPServer((args.host, args.port), ConversionRequestHandler)
+    server.daemon_threads = True
+    print(f"Serving document conversion on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down.")
+    finally:
+        server.server_close()
+        with _job_dirs_lock:
+            for job_dir in _job_dirs.values():
+                shutil.rmtree(job_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
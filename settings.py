@@ -2,6 +2,8 @@
 Application settings and configuration options.
 """
 
+import os
+
 # Whether to copy non-convertible files to the output directory
 COPY_NON_CONVERTIBLE_FILES = True
 
@@ -19,7 +21,237 @@ USE_MULTITHREADING = True  # Set to False for more reliable operation
 
 # Maximum number of worker threads/processes
 # For LibreOffice conversions, a lower number is more reliable
+# (0 = auto-detect: one per CPU core when profiles are isolated, half otherwise)
 MAX_WORKERS = 1  # Use just 1 process for most reliable operation
 
-# Files to exclude from processing (temporary/lock files)
-EXCLUDED_FILE_PATTERNS = ['~$', '._', '.tmp']
\ No newline at end of file
+# Give every concurrent LibreOffice process its own user profile.
+# Without this, parallel conversions fight over the shared profile lock,
+# so keep MAX_WORKERS = 1 if you turn it off.
+ISOLATE_LIBREOFFICE_PROFILES = True
+
+# Convert several files of the same output folder with one LibreOffice process
+BATCH_CONVERSIONS = False
+
+# Upper bounds for a single batch (number of files and total input size in bytes)
+BATCH_MAX_FILES = 50
+BATCH_MAX_BYTES = 200 * 1024 * 1024
+
+# Reuse PDFs of identical documents converted in earlier runs
+CONVERSION_CACHE_ENABLED = False
+
+# Where cached PDFs are stored (may be shared between processes and hosts)
+CONVERSION_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'doc2pdf')
+
+# Maximum size of the cache in bytes; least recently used PDFs are removed first
+CONVERSION_CACHE_MAX_BYTES = 5 * 1024 * 1024 * 1024
+
+# Incremental mode: skip files whose output is up to date with the previous run
+# (a manifest is kept next to the output folder)
+INCREMENTAL_MODE = False
+
+# Also compare content hashes when size or modification time changed
+INCREMENTAL_USE_HASH = False
+
+# Delete outputs of files that no longer exist in a re-scanned source
+INCREMENTAL_DELETE_STALE = False
+
+# Extract zip members only when they are about to be converted or copied,
+# instead of unpacking whole archives up front
+STREAM_ZIP_EXTRACTION = True
+
+# Maximum bytes of extracted zip members on disk at any time (0 = unlimited)
+SCRATCH_SPACE_BUDGET = 2 * 1024 * 1024 * 1024
+
+# Archive types whose members are processed like the files of a directory
+# (.7z and .rar need third-party readers and are treated as ordinary files)
+ARCHIVE_EXTENSIONS = ['.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz']
+
+# Archives inside archives are opened up to this many levels deep; deeper
+# ones are treated as ordinary files (0 = don't open nested archives)
+ARCHIVE_MAX_DEPTH = 3
+
+# Zip-bomb protection: stop reading an archive once the files in it (and in
+# archives nested inside it) add up to this many uncompressed bytes (0 = unlimited)
+ARCHIVE_MAX_TOTAL_BYTES = 50 * 1024 * 1024 * 1024
+
+# Zip-bomb protection: skip members compressed more than this many times
+# (0 = no limit); a compressed tar is judged as a whole, and the rest of it
+# is skipped once it exceeds the ratio
+ARCHIVE_MAX_RATIO = 200
+
+# Output archives (GUI and service downloads, --archive): files of these types
+# are already compressed and are stored as they are instead of deflated again
+ARCHIVE_STORED_EXTENSIONS = [
+    '.pdf', '.zip', '.gz', '.tgz', '.bz2', '.xz', '.7z', '.rar',
+    '.docx', '.xlsx', '.pptx', '.odt', '.ods', '.odp',
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.mp3', '.mp4', '.mov'
+]
+
+# zlib compression level (1-9) of the other files in output zip archives
+ARCHIVE_COMPRESS_LEVEL = 6
+
+# Start converting while inputs are still being scanned and extracted
+PIPELINE_MODE = True
+
+# Maximum number of discovered files waiting for a conversion worker
+PIPELINE_QUEUE_SIZE = 1000
+
+# Start long jobs first, using per-extension timings learned from earlier runs
+COST_AWARE_SCHEDULING = False
+
+# Files predicted to take at least this many seconds are scheduled first
+LONG_JOB_SECONDS = 10
+
+# Where the learned timings are kept between runs
+COST_MODEL_FILE = os.path.join(os.path.expanduser('~'), '.cache', 'doc2pdf-cost-model.json')
+
+# Time limit for one LibreOffice process: base seconds, plus seconds per extra
+# file and per MB of input (0 base = no limit); hung processes are killed
+CONVERSION_TIMEOUT_BASE = 60
+CONVERSION_TIMEOUT_PER_FILE = 15
+CONVERSION_TIMEOUT_PER_MB = 5
+
+# Upper bound for the scaled time limit in seconds (0 = no upper bound)
+CONVERSION_TIMEOUT_MAX = 1800
+
+# Retries of a failed conversion, waiting CONVERSION_RETRY_DELAY seconds
+# before the first and doubling the wait each time (timeouts aren't retried)
+CONVERSION_RETRIES = 2
+CONVERSION_RETRY_DELAY = 1
+
+# Stop converting a document after it failed or hung this many times,
+# copying it like a failed conversion instead (0 = never)
+QUARANTINE_AFTER_FAILURES = 0
+
+# Where failure counts are kept between runs
+QUARANTINE_FILE = os.path.join(os.path.expanduser('~'), '.cache', 'doc2pdf-quarantine.json')
+
+# Adapt the number of concurrent conversions to free memory, CPU load and
+# conversion latency instead of using a fixed MAX_WORKERS
+ADAPTIVE_CONCURRENCY = False
+
+# Fewest and most concurrent conversions in adaptive mode (0 max = 2x CPU cores)
+ADAPTIVE_MIN_WORKERS = 1
+ADAPTIVE_MAX_WORKERS = 0
+
+# Lower concurrency when less memory than this is available (bytes)
+ADAPTIVE_MIN_FREE_MEMORY = 1024 * 1024 * 1024
+
+# Lower concurrency above this one-minute load average per CPU core
+ADAPTIVE_MAX_LOAD = 1.5
+
+# Lower concurrency when conversions get this many times slower than the best seen
+ADAPTIVE_MAX_SLOWDOWN = 1.5
+
+# Seconds between adjustments
+ADAPTIVE_INTERVAL = 5
+
+# Record how long each stage takes (discovering, extracting, queueing,
+# converting, copying, zipping) with bytes processed, per-extension counts
+# and failure reasons, as JSON lines in METRICS_FILE
+METRICS_ENABLED = False
+METRICS_FILE = 'doc2pdf-metrics.jsonl'
+
+# Also write a Prometheus textfile-collector snapshot here after each run ('' = off)
+METRICS_PROMETHEUS_FILE = ''
+
+# How copied files (non-convertible ones and failed conversions) are placed in
+# the output: 'copy' (the default), 'reflink' (copy-on-write clone),
+# 'copy_file_range' (in-kernel or server-side copy), 'hardlink' (shares the
+# file, so editing one changes both) or 'symlink' (links back to the input).
+# Strategies the filesystems don't support fall back towards 'copy' automatically
+FILE_PLACEMENT = 'copy'
+
+# Convert documents with identical content only once per run and place the
+# result (see FILE_PLACEMENT) for every other copy; only files sharing a size
+# with another input are hashed
+DEDUPLICATE_INPUTS = False
+
+# Seconds the GUI keeps a session's result archive available for download;
+# expired archives are deleted from disk
+GUI_ARTIFACT_TTL = 60 * 60
+
+# Conversions the GUI runs at once across all users (0 = the static worker
+# count); ignored with ADAPTIVE_CONCURRENCY, which sizes the shared pool itself
+GUI_POOL_SIZE = 0
+
+# Uploads the GUI converts at the same time; further jobs wait in a queue
+GUI_MAX_RUNNING_JOBS = 2
+
+# Jobs one GUI session may have running at once; its other jobs wait while
+# other users' jobs go ahead
+GUI_MAX_JOBS_PER_USER = 1
+
+# Jobs up to this many files and bytes are small and may also use a separate
+# fast lane, so they never wait behind a large upload
+GUI_SMALL_JOB_FILES = 10
+GUI_SMALL_JOB_BYTES = 20 * 1024 * 1024
+
+# Journal the state of every file (SQLite, next to the output folder) so an
+# interrupted run can be continued with 'main.py --resume'
+JOURNAL_ENABLED = False
+
+# Journal changes are committed in one transaction per this many changes, or
+# at least every JOURNAL_FLUSH_INTERVAL seconds; a crash only loses that much
+JOURNAL_BATCH_SIZE = 500
+JOURNAL_FLUSH_INTERVAL = 2.0
+
+# Seconds without a journal write after which a run counts as dead, so the
+# files it left running are converted again on resume
+JOURNAL_STALE_SECONDS = 60
+
+# Address and port the HTTP conversion service (server_main.py) listens on
+SERVER_HOST = '0.0.0.0'
+SERVER_PORT = 8080
+
+# Uploads the HTTP service receives at the same time; more are refused with
+# 429 Too Many Requests (conversions themselves are limited by GUI_POOL_SIZE)
+SERVER_MAX_UPLOADS = 4
+
+# Queued jobs at which the HTTP service refuses new submissions with 429
+SERVER_MAX_QUEUED_JOBS = 16
+
+# Largest upload the HTTP service accepts, in bytes
+SERVER_MAX_UPLOAD_BYTES = 1024 * 1024 * 1024
+
+# Seconds the HTTP service keeps a finished job's results before deleting them
+SERVER_RESULT_TTL = 60 * 60
+
+# Seconds between console progress updates; per-file output is collected and
+# written in one go, so a fast run isn't slowed down by the terminal
+PROGRESS_INTERVAL = 1.0
+
+# List every converted, copied and cached file instead of only the progress
+# line (failures and retries are always listed)
+PROGRESS_LIST_FILES = False
+
+# Files to exclude from processing (temporary/lock files); plain patterns match
+# names starting or ending with them, patterns with * ? [ are globs
+EXCLUDED_FILE_PATTERNS = ['~$', '._', '.tmp']
+
+# Shell-style globs applied while scanning directories and ZIP files. Globs
+# without a '/' match names, globs with one match the path below the scanned
+# directory (e.g. 'archive/*'). If SCAN_INCLUDE_GLOBS isn't empty, only
+# matching files are processed
+SCAN_INCLUDE_GLOBS = []
+SCAN_EXCLUDE_GLOBS = []
+
+# Directories that are never descended into
+SCAN_PRUNE_DIRS = ['__MACOSX', '.git', '.svn']
+
+# Threads listing directories at once; listing is latency-bound on network
+# shares, so several threads speed up discovery (1 = scan sequentially)
+SCAN_WORKERS = 8
+
+# Directories' worth of scan results buffered ahead of the conversion
+SCAN_QUEUE_SIZE = 64
+
+# Persistent LibreOffice pool (used by the 'libreoffice-pool' converter)
+# Number of headless LibreOffice instances to keep running (0 = one per worker thread)
+LIBREOFFICE_POOL_SIZE = 0
+
+# Restart an instance after it has converted this many files (0 = never recycle)
+LIBREOFFICE_POOL_MAX_JOBS = 200
+
+# Seconds to wait for a pooled instance to start accepting connections
+LIBREOFFICE_POOL_START_TIMEOUT = 60
@@ -0,0 +1,36 @@
+"""Shared fixtures for the test suite."""
+
+import os
+import tempfile
+import pytest
+
+# settings.py reads HOME when it is first imported: keep the cost model,
+# quarantine list and conversion cache of the tests out of the real one
+os.environ['HOME'] = tempfile.mkdtemp(prefix='doc2pdf-tests-home-')
+
+from benchmarks.run_benchmark import _install_fake_soffice
+from converters.libreoffice_converter import get_libreoffice_version
+from utils import events
+
+
+@pytest.fixture
+def fake_soffice(tmp_path, monkeypatch):
+    """Put the benchmarks' fake 'libreoffice' first on PATH, converting without delays."""
+    bin_dir = str(tmp_path / 'bin')
+    _install_fake_soffice(bin_dir)
+    monkeypatch.setenv('PATH', bin_dir + os.pathsep + os.environ.get('PATH', ''))
+    for name, value in (('STARTUP', '0'), ('LATENCY', '0'), ('PER_MB', '0'), ('JITTER', 'none')):
+        monkeypatch.setenv(f"FAKE_SOFFICE_{name}", value)
+    get_libreoffice_version.cache_clear()
+    yield
+    get_libreoffice_version.cache_clear()
+
+
+@pytest.fixture
+def published():
+    """Collect the progress events published during a test."""
+    received = []
+    callback = received.append
+    events.bus.subscribe(callback)
+    yield received
+    events.bus.unsubscribe(callback)
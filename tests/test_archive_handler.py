@@ -0,0 +1,179 @@
+"""Tests for listing and staging the members of (nested) archives."""
+
+import io
+import os
+import tarfile
+import threading
+import zipfile
+import pytest
+import file_utils.archive_handler as archive_handler
+from file_utils.archive_handler import list_archive_members, archive_suffix, archive_stem, _safe_member_path
+from file_utils.zip_handler import ZipStager, ScratchBudget
+
+
+def _zip_bytes(entries, compression=zipfile.ZIP_DEFLATED):
+    """Return a zip file with the given (name, bytes) entries."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', compression) as archive:
+        for name, data in entries:
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def _tar_bytes(entries, mode='w:gz'):
+    """Return a tar file with the given (name, bytes) entries."""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode=mode) as archive:
+        for name, data in entries:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = 1_700_000_000
+            archive.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def nested_zip(tmp_path):
+    """outer.zip > sub/inner.zip (deflated) > deep/innermost.zip (stored) > c.docx"""
+    innermost = _zip_bytes([('c.docx', b'c' * 100)])
+    inner = _zip_bytes([('b.docx', b'b' * 100), ('deep/innermost.zip', innermost)], zipfile.ZIP_STORED)
+    path = tmp_path / 'outer.zip'
+    path.write_bytes(_zip_bytes([('a.docx', b'a' * 100), ('sub/inner.zip', inner)]))
+    return str(path)
+
+
+def _internal_paths(items):
+    return sorted(item['internal_path'].replace(os.sep, '/') for item in items)
+
+
+def test_suffixes():
+    assert archive_suffix('Docs.TAR.GZ') == '.tar.gz'
+    assert archive_suffix('docs.gz') is None
+    assert archive_stem('docs.tar.gz') == 'docs'
+    assert archive_stem('docs.zip') == 'docs'
+
+
+@pytest.mark.parametrize('name, expected', [
+    ('a/b.docx', os.path.join('a', 'b.docx')),
+    ('a\\b.docx', os.path.join('a', 'b.docx')),
+    ('./a/../b.docx', 'b.docx'),
+    ('dir/', None),
+    ('../evil.docx', None),
+    ('a/../../evil.docx', None),
+    ('/etc/evil.docx', None),
+    ('__MACOSX/._a.docx', None),
+])
+def test_safe_member_path(name, expected):
+    assert _safe_member_path(name) == expected
+
+
+def test_nested_archives_are_listed_below_their_stem(nested_zip):
+    items = list_archive_members(nested_zip)
+    assert _internal_paths(items) == ['a.docx', 'sub/inner/b.docx', 'sub/inner/deep/innermost/c.docx']
+    by_name = {item.name: item for item in items}
+    assert by_name['a.docx'].container is None
+    assert by_name['c.docx'].container == ('sub/inner.zip', 'deep/innermost.zip')
+    assert by_name['c.docx'].member == 'c.docx'
+    assert all(item['source'] == 'outer.zip' and item['path'] is None for item in items)
+
+
+def test_depth_limit(nested_zip, monkeypatch):
+    monkeypatch.setattr(archive_handler, 'ARCHIVE_MAX_DEPTH', 1)
+    assert _internal_paths(list_archive_members(nested_zip)) == [
+        'a.docx', 'sub/inner/b.docx', 'sub/inner/deep/innermost.zip']
+
+    monkeypatch.setattr(archive_handler, 'ARCHIVE_MAX_DEPTH', 0)
+    assert _internal_paths(list_archive_members(nested_zip)) == ['a.docx', 'sub/inner.zip']
+
+
+def test_ratio_limit(tmp_path, monkeypatch):
+    path = tmp_path / 'bomb.zip'
+    path.write_bytes(_zip_bytes([('bomb.docx', b'\0' * 1_000_000), ('a.docx', b'a')]))
+    monkeypatch.setattr(archive_handler, 'ARCHIVE_MAX_RATIO', 200)
+    assert _internal_paths(list_archive_members(str(path))) == ['a.docx']
+
+    monkeypatch.setattr(archive_handler, 'ARCHIVE_MAX_RATIO', 0)
+    assert _internal_paths(list_archive_members(str(path))) == ['a.docx', 'bomb.docx']
+
+
+def test_total_bytes_limit_covers_nested_archives(nested_zip, monkeypatch):
+    monkeypatch.setattr(archive_handler, 'ARCHIVE_MAX_RATIO', 0)
+    # a.docx (100) fits, b.docx from the inner archive doesn't
+    monkeypatch.setattr(archive_handler, 'ARCHIVE_MAX_TOTAL_BYTES', 150)
+    assert _internal_paths(list_archive_members(nested_zip)) == ['a.docx']
+    # Only the three documents count, not the archives they are in
+    monkeypatch.setattr(archive_handler, 'ARCHIVE_MAX_TOTAL_BYTES', 300)
+    assert _internal_paths(list_archive_members(nested_zip)) == [
+        'a.docx', 'sub/inner/b.docx', 'sub/inner/deep/innermost/c.docx']
+
+
+def test_ratio_limit_covers_compressed_tar_streams(tmp_path, monkeypatch):
+    entries = [('a.docx', b'a'), ('bomb.docx', b'\0' * 1_000_000), ('b.docx', b'b')]
+    path = tmp_path / 'bomb.tar.gz'
+    path.write_bytes(_tar_bytes(entries))
+    monkeypatch.setattr(archive_handler, 'ARCHIVE_MAX_RATIO', 200)
+    assert _internal_paths(list_archive_members(str(path))) == ['a.docx']
+    # Also when the tar is inside another archive
+    outer = tmp_path / 'outer.zip'
+    outer.write_bytes(_zip_bytes([('c.docx', b'c'), ('bomb.tar.gz', path.read_bytes())]))
+    assert _internal_paths(list_archive_members(str(outer))) == ['bomb/a.docx', 'c.docx']
+    # An uncompressed tar is no bomb
+    path = tmp_path / 'plain.tar'
+    path.write_bytes(_tar_bytes(entries, mode='w'))
+    assert _internal_paths(list_archive_members(str(path))) == ['a.docx', 'b.docx', 'bomb.docx']
+
+    monkeypatch.setattr(archive_handler, 'ARCHIVE_MAX_RATIO', 0)
+    assert _internal_paths(list_archive_members(str(tmp_path / 'bomb.tar.gz'))) == [
+        'a.docx', 'b.docx', 'bomb.docx']
+
+
+def test_tar_archives(tmp_path):
+    path = tmp_path / 'docs.tar.gz'
+    path.write_bytes(_tar_bytes([('x/y.docx', b'y' * 10), ('../evil.docx', b'e'),
+                                 ('z.zip', _zip_bytes([('q.docx', b'q')]))]))
+    items = list_archive_members(str(path))
+    assert _internal_paths(items) == ['x/y.docx', 'z/q.docx']
+    by_name = {item.name: item for item in items}
+    assert by_name['y.docx'].crc is None
+    assert by_name['y.docx'].mtime_ns == 1_700_000_000 * 1_000_000_000
+
+
+def test_invalid_nested_archive_is_a_file(tmp_path):
+    path = tmp_path / 'outer.zip'
+    path.write_bytes(_zip_bytes([('broken.zip', b'not a zip')]))
+    assert _internal_paths(list_archive_members(str(path))) == ['broken.zip']
+
+
+def test_staging_nested_members(nested_zip):
+    stager = ZipStager(ScratchBudget(0))
+    try:
+        items = {item.name: item for item in list_archive_members(nested_zip)}
+        for name, content in (('c.docx', b'c' * 100), ('b.docx', b'b' * 100), ('a.docx', b'a' * 100)):
+            assert stager.stage(items[name])
+            with open(items[name]['path'], 'rb') as f:
+                assert f.read() == content
+            assert os.path.basename(items[name]['path']) == name
+
+        staged = items['c.docx']['path']
+        stager.release(items['c.docx'])
+        assert items['c.docx']['path'] is None
+        assert not os.path.exists(staged)
+    finally:
+        stager.close()
+
+
+def test_budget_blocks_until_space_is_released():
+    budget = ScratchBudget(100)
+    budget.acquire(80)
+    acquired = threading.Event()
+    waiter = threading.Thread(target=lambda: (budget.acquire(50), acquired.set()))
+    waiter.start()
+    assert not acquired.wait(0.2)
+
+    budget.release(80)
+    assert acquired.wait(5)
+    waiter.join()
+    # A file larger than the whole budget still gets through on its own
+    budget.release(50)
+    budget.acquire(500)
+    assert budget.used == 500
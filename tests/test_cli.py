@@ -0,0 +1,48 @@
+"""Tests for the non-interactive command line."""
+
+import io
+import json
+import os
+import pytest
+import main
+from file_utils.input_collector import iter_path_list
+from main import parse_args, run_batch, EXIT_OK, EXIT_FAILURES, EXIT_NO_INPUT
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 64 * 1024])
+def test_path_lists_are_split_across_chunks(chunk_size):
+    stream = io.BytesIO(b'a.docx\r\n\nsub dir/b.docx\nc.docx')
+    assert list(iter_path_list(stream, chunk_size=chunk_size)) == ['a.docx', 'sub dir/b.docx', 'c.docx']
+
+
+def test_nul_delimited_path_lists_allow_newlines():
+    stream = io.BytesIO(b'a.docx\0odd\nname.docx\0')
+    assert list(iter_path_list(stream, null_delimited=True)) == ['a.docx', 'odd\nname.docx']
+
+
+@pytest.mark.usefixtures('fake_soffice')
+def test_batch_run_writes_a_summary(tmp_path):
+    (tmp_path / 'a.docx').write_bytes(b'a')
+    (tmp_path / 'list.txt').write_text(f"{tmp_path / 'missing.docx'}\n")
+    summary_path = tmp_path / 'summary.json'
+    args = parse_args([str(tmp_path / 'a.docx'), '--manifest', str(tmp_path / 'list.txt'),
+                       '--output', str(tmp_path / 'out'), '--summary-json', str(summary_path)])
+
+    assert run_batch(args) == EXIT_FAILURES
+    assert os.listdir(tmp_path / 'out') == ['a.pdf']
+    summary = json.loads(summary_path.read_text())
+    assert (summary['processed'], summary['missing_inputs'], summary['exit_code']) == (1, 1, EXIT_FAILURES)
+
+
+@pytest.mark.usefixtures('fake_soffice')
+def test_batch_run_exit_codes(tmp_path):
+    (tmp_path / 'a.docx').write_bytes(b'a')
+    output = ['--output', str(tmp_path / 'out')]
+    assert run_batch(parse_args([str(tmp_path / 'a.docx')] + output)) == EXIT_OK
+    assert run_batch(parse_args([str(tmp_path / 'missing.docx')] + output)) == EXIT_NO_INPUT
+
+
+def test_resume_needs_the_journal(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, 'JOURNAL_ENABLED', False)
+    assert run_batch(parse_args(['--resume', '--output', str(tmp_path / 'out')])) == EXIT_NO_INPUT
+    assert not (tmp_path / 'out').exists()
@@ -0,0 +1,74 @@
+"""Tests for the adaptive concurrency limit."""
+
+import json
+import os
+import pytest
+import utils.concurrency_controller as concurrency_controller
+from utils.concurrency_controller import ConcurrencyController, status_files
+
+GB = 1024 * 1024 * 1024
+
+
+def _sample(available=8 * GB, child_rss=0, load=0.1, slowdown=None):
+    return {'mem_total': 16 * GB, 'mem_available': available, 'child_rss': child_rss,
+            'child_processes': 0, 'load': load, 'slowdown': slowdown}
+
+
+@pytest.fixture
+def controller():
+    return ConcurrencyController(1, 8, 4)
+
+
+def test_limit_starts_at_baseline_within_bounds():
+    assert ConcurrencyController(1, 8, 4).limit == 4
+    assert ConcurrencyController(2, 8, 0).limit == 2
+    assert ConcurrencyController(1, 3, 10).limit == 3
+
+
+def test_raised_only_while_every_slot_is_busy(controller):
+    assert controller.decide(_sample()) == (4, None)
+    controller.in_flight = 4
+    assert controller.decide(_sample())[0] == 5
+
+
+def test_lowered_under_memory_pressure(controller):
+    assert controller.decide(_sample(available=700 * 1024 * 1024))[0] == 3
+    # Far below the minimum the limit is halved
+    assert controller.decide(_sample(available=10 * 1024 * 1024))[0] == 2
+
+
+def test_lowered_when_overloaded_or_slowing_down(controller):
+    assert controller.decide(_sample(load=10))[0] == 3
+    assert controller.decide(_sample(slowdown=10))[0] == 3
+
+
+def test_changes_are_published_as_messages(tmp_path, monkeypatch, controller, published):
+    monkeypatch.setattr(concurrency_controller, 'STATUS_FILE',
+                        str(tmp_path / 'doc2pdf-concurrency-{pid}.json'))
+    monkeypatch.setattr(concurrency_controller, 'ADAPTIVE_INTERVAL', 0)
+    monkeypatch.setattr(controller, 'sample', lambda: _sample(load=10))
+    with controller._condition:
+        controller._maybe_adjust()
+    assert controller.limit == 3
+    reason = controller.decisions[-1]['reason']
+    assert [event.message for event in published] == [f"Concurrency 4 -> 3: {reason}"]
+
+
+def test_never_below_the_floor():
+    controller = ConcurrencyController(2, 8, 2)
+    assert controller.decide(_sample(available=0))[0] == 2
+
+
+def test_status_is_published_per_process(tmp_path, monkeypatch):
+    monkeypatch.setattr(concurrency_controller, 'STATUS_FILE',
+                        str(tmp_path / 'doc2pdf-concurrency-{pid}.json'))
+    (tmp_path / 'doc2pdf-concurrency-1.json').write_text('{}')
+    controller = ConcurrencyController(1, 8, 4)
+    controller.publish()
+
+    own = str(tmp_path / f"doc2pdf-concurrency-{os.getpid()}.json")
+    assert sorted(status_files()) == sorted([str(tmp_path / 'doc2pdf-concurrency-1.json'), own])
+    with open(own) as f:
+        assert json.load(f)['pid'] == os.getpid()
+    concurrency_controller._remove_status_file(own)
+    assert not os.path.exists(own)
@@ -0,0 +1,62 @@
+"""Tests for the on-disk cache of converted PDFs."""
+
+import os
+import time
+import pytest
+from converters.conversion_cache import ConversionCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ConversionCache(str(tmp_path / 'cache'), 1024 * 1024)
+
+
+def _pdf(tmp_path, name, content):
+    path = tmp_path / name
+    path.write_bytes(content)
+    return str(path)
+
+
+def test_keys_depend_on_content_and_converter(tmp_path, cache):
+    first = _pdf(tmp_path, 'a.docx', b'one')
+    same = _pdf(tmp_path, 'b.docx', b'one')
+    other = _pdf(tmp_path, 'c.docx', b'two')
+    key = cache.make_key(first, 'libreoffice', '7.6', 'pdf')
+    assert cache.make_key(same, 'libreoffice', '7.6', 'pdf') == key
+    assert cache.make_key(other, 'libreoffice', '7.6', 'pdf') != key
+    assert cache.make_key(first, 'libreoffice', '24.2', 'pdf') != key
+
+
+def test_hits_dont_share_the_entry(tmp_path, cache):
+    key = 'ab' * 32
+    cache.store(key, _pdf(tmp_path, 'a.pdf', b'%PDF cached'))
+    dest = tmp_path / 'out' / 'a.pdf'
+    assert cache.fetch(key, str(dest))
+    assert dest.read_bytes() == b'%PDF cached'
+
+    stat = os.stat(dest)
+    time.sleep(0.01)
+    # A later hit marks the entry as used; the earlier output stays as it was
+    assert cache.fetch(key, str(tmp_path / 'out' / 'b.pdf'))
+    assert os.stat(dest).st_mtime_ns == stat.st_mtime_ns
+    dest.write_bytes(b'edited')
+    assert cache.fetch(key, str(tmp_path / 'out' / 'c.pdf'))
+    assert (tmp_path / 'out' / 'c.pdf').read_bytes() == b'%PDF cached'
+
+
+def test_miss(tmp_path, cache):
+    assert not cache.fetch('cd' * 32, str(tmp_path / 'out' / 'a.pdf'))
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ConversionCache(str(tmp_path / 'cache'), 250)
+    for index, key in enumerate(('aa' * 32, 'bb' * 32)):
+        cache.store(key, _pdf(tmp_path, f"{index}.pdf", b'x' * 100))
+        os.utime(cache._entry_path(key), (1_000 + index, 1_000 + index))
+    # Using the older entry makes the other one the least recently used
+    assert cache.fetch('aa' * 32, str(tmp_path / 'out' / 'a.pdf'))
+    cache.store('cc' * 32, _pdf(tmp_path, '2.pdf', b'x' * 100))
+
+    assert os.path.exists(cache._entry_path('aa' * 32))
+    assert not os.path.exists(cache._entry_path('bb' * 32))
+    assert os.path.exists(cache._entry_path('cc' * 32))
@@ -0,0 +1,63 @@
+"""Tests for the learned per-extension cost model."""
+
+import pytest
+from utils.cost_model import CostModel, format_duration
+
+
+@pytest.fixture
+def model(tmp_path):
+    return CostModel(str(tmp_path / 'cost-model.json'))
+
+
+def test_defaults_before_any_observation(model):
+    # 2 seconds per converted document plus 1 second per MB
+    assert model.predict('a.docx', 1024 * 1024) == pytest.approx(3.0)
+    assert model.predict('a.txt', 0) == pytest.approx(0.01)
+
+
+def test_fits_overhead_and_rate(model):
+    for size in (100_000, 400_000, 1_000_000, 2_500_000, 5_000_000) * 4:
+        model.observe('a.pptx', size, 0.5 + size * 2e-6)
+    assert model.predict('b.pptx', 0) == pytest.approx(0.5)
+    assert model.predict('b.pptx', 3_000_000) == pytest.approx(6.5)
+    # Other extensions keep their own model
+    assert model.predict('b.docx', 0) == pytest.approx(2.0)
+
+
+def test_files_of_one_size_only_teach_the_overhead(model):
+    for _ in range(10):
+        model.observe('a.xlsx', 1024 * 1024, 4.0)
+    assert model.predict('a.xlsx', 1024 * 1024) == pytest.approx(4.0)
+    # The default rate of 1 MB per second is kept
+    assert model.predict('a.xlsx', 2 * 1024 * 1024) == pytest.approx(5.0)
+
+
+def test_group_time_is_split_by_predicted_cost(tmp_path, model):
+    model.observe_group([('a.docx', 0), ('b.docx', 2 * 1024 * 1024)], 6.0)
+    # Predicted 2 and 4 seconds, so the 6 seconds are split 2:4
+    separate = CostModel(str(tmp_path / 'separate.json'))
+    separate.observe('a.docx', 0, 2.0)
+    separate.observe('b.docx', 2 * 1024 * 1024, 4.0)
+    for size in (0, 1024 * 1024, 10 * 1024 * 1024):
+        assert model.predict('c.docx', size) == pytest.approx(separate.predict('c.docx', size))
+
+
+def test_save_and_load(tmp_path, model):
+    for size in (1_000, 2_000_000):
+        model.observe('a.doc', size, 1.0 + size * 1e-6)
+    model.save()
+    loaded = CostModel(model.path)
+    assert loaded.predict('x.doc', 500_000) == pytest.approx(model.predict('x.doc', 500_000))
+
+
+def test_estimate_duration(model):
+    assert model.estimate_duration([], 4) == 0.0
+    assert model.estimate_duration([1, 1, 1, 1], 2) == 2.0
+    # Never shorter than the longest task
+    assert model.estimate_duration([10, 1, 1], 4) == 10
+
+
+def test_format_duration():
+    assert format_duration(12) == '12s'
+    assert format_duration(185) == '3m 05s'
+    assert format_duration(3720) == '1h 02m'
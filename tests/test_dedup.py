@@ -0,0 +1,84 @@
+"""Tests for the detection of identical inputs."""
+
+import os
+import pytest
+import conversion.dedup as dedup
+from conversion.dedup import Deduplicator
+from file_utils.work_item import WorkItem
+from utils import events
+
+
+@pytest.fixture
+def hashed(monkeypatch):
+    """Record the paths of the files that are hashed."""
+    paths = []
+    hash_file = dedup.hash_file
+
+    def counting_hash(path):
+        paths.append(os.path.basename(path))
+        return hash_file(path)
+    monkeypatch.setattr(dedup, 'hash_file', counting_hash)
+    return paths
+
+
+def _input(tmp_path, internal_dir, name, content):
+    """Create an input file below tmp_path/in and return its item."""
+    directory = tmp_path / 'in' / internal_dir
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / name).write_bytes(content)
+    return WorkItem.in_directory(str(tmp_path / 'in'), 'in', internal_dir, name)
+
+
+def test_files_with_unique_sizes_are_not_hashed(tmp_path, hashed):
+    deduplicator = Deduplicator(str(tmp_path / 'output'))
+    assert not deduplicator.claim(_input(tmp_path, '', 'a.docx', b'a'))
+    assert not deduplicator.claim(_input(tmp_path, '', 'b.docx', b'bb'))
+    assert not deduplicator.claim(_input(tmp_path, '', 'c.docx', b'ccc'))
+    assert hashed == []
+
+
+def test_same_size_different_content(tmp_path, hashed):
+    deduplicator = Deduplicator(str(tmp_path / 'output'))
+    assert not deduplicator.claim(_input(tmp_path, '', 'a.docx', b'aaa'))
+    assert not deduplicator.claim(_input(tmp_path, '', 'b.docx', b'bbb'))
+    # The first file is only hashed once a second one of its size shows up
+    assert sorted(hashed) == ['a.docx', 'b.docx']
+    assert deduplicator.duplicates == 0
+
+
+def test_duplicates_get_the_primary_output(tmp_path):
+    output_folder = tmp_path / 'output'
+    placed = []
+    deduplicator = Deduplicator(str(output_folder), on_placed=lambda f, path: placed.append(path))
+    primary = _input(tmp_path, 'one', 'report.docx', b'same')
+    waiting = _input(tmp_path, 'two', 'copy.docx', b'same')
+    assert not deduplicator.claim(primary)
+    assert deduplicator.claim(waiting)
+
+    pdf = output_folder / 'in' / 'one' / 'report.pdf'
+    pdf.parent.mkdir(parents=True)
+    pdf.write_bytes(b'%PDF')
+    deduplicator.complete([primary], {id(primary): str(pdf)})
+    assert (output_folder / 'in' / 'two' / 'copy.pdf').read_bytes() == b'%PDF'
+
+    # Found after the primary finished: placed straight away
+    late = _input(tmp_path, 'three', 'late.docx', b'same')
+    assert deduplicator.claim(late)
+    assert (output_folder / 'in' / 'three' / 'late.pdf').exists()
+
+    assert deduplicator.duplicates == 2
+    assert deduplicator.placed == 2
+    assert deduplicator.saved_bytes == 8
+    assert len(placed) == 2
+
+
+def test_duplicates_of_a_failed_primary_fail(tmp_path, published):
+    deduplicator = Deduplicator(str(tmp_path / 'output'))
+    primary = _input(tmp_path, 'one', 'a.docx', b'same')
+    follower = _input(tmp_path, 'two', 'b.docx', b'same')
+    deduplicator.claim(primary)
+    deduplicator.claim(follower)
+    deduplicator.complete([primary], {})
+
+    assert deduplicator.placed == 0
+    assert [event.path for event in published if event.kind == events.FAILED] == [follower['path']]
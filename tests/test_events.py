@@ -0,0 +1,33 @@
+"""Tests for the progress event bus and tracker."""
+
+from utils import events
+from utils.events import EventBus, ProgressTracker
+
+
+def test_bus_delivers_to_subscribers_until_unsubscribed():
+    bus = EventBus()
+    received = []
+    callback = received.append
+    assert not bus.active
+    bus.subscribe(callback)
+    bus.publish(events.QUEUED, 'a.docx', size=10)
+    bus.unsubscribe(callback)
+    bus.publish(events.QUEUED, 'b.docx')
+    assert [(event.kind, event.path, event.size) for event in received] == [
+        (events.QUEUED, 'a.docx', 10)]
+
+
+def test_tracker_counts_outcomes():
+    tracker = ProgressTracker()
+    tracker(events.Event(events.PLANNED, count=4))
+    for path in ('a.docx', 'b.docx', 'c.txt'):
+        tracker(events.Event(events.QUEUED, path))
+    tracker(events.Event(events.FINISHED, 'a.docx', outcome=events.CONVERTED, size=100))
+    tracker(events.Event(events.FINISHED, 'c.txt', outcome=events.COPIED, size=5))
+    tracker(events.Event(events.FAILED, 'b.docx', message='broken'))
+
+    counts = tracker.snapshot()
+    assert (counts['done'], counts['total'], counts['bytes']) == (3, 4, 105)
+    assert (counts[events.CONVERTED], counts[events.COPIED], counts[events.FAILED]) == (1, 1, 1)
+    assert tracker.take_new_lines() == ['Failed: b.docx: broken']
+    assert tracker.take_new_lines() == []
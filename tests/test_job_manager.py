@@ -0,0 +1,128 @@
+"""Tests for the background job manager shared by GUI sessions."""
+
+import os
+import threading
+import time
+import pytest
+import conversion.job_manager as job_manager
+from conversion.job_manager import JobManager, QUEUED, RUNNING, FINISHED
+from converters.base_converter import DocumentConverter
+from file_utils.work_item import WorkItem
+
+
+class GatedConverter(DocumentConverter):
+    """Writes a placeholder PDF for every file once the gate is open."""
+
+    gate = None
+
+    def process(self, file_paths):
+        assert GatedConverter.gate.wait(30)
+        for path in file_paths:
+            with open(self.get_output_path(path), 'wb') as f:
+                f.write(b'%PDF')
+        return len(file_paths)
+
+
+@pytest.fixture
+def gate(monkeypatch):
+    """Hold conversions until the returned event is set."""
+    GatedConverter.gate = threading.Event()
+    monkeypatch.setattr(job_manager, 'GUI_MAX_RUNNING_JOBS', 2)
+    monkeypatch.setattr(job_manager, 'GUI_MAX_JOBS_PER_USER', 1)
+    # No job counts as small, so the fast lane stays idle
+    monkeypatch.setattr(job_manager, 'GUI_SMALL_JOB_FILES', 0)
+    yield GatedConverter.gate
+    GatedConverter.gate.set()
+
+
+def _files(tmp_path, name):
+    (tmp_path / 'in').mkdir(exist_ok=True)
+    (tmp_path / 'in' / name).write_bytes(b'document')
+    return [WorkItem.direct(str(tmp_path / 'in' / name))]
+
+
+def _submit(manager, tmp_path, owner, name, on_finish=None):
+    (tmp_path / 'out').mkdir(exist_ok=True)
+    return manager.submit(owner, _files(tmp_path, name), str(tmp_path / 'out' / name),
+                          GatedConverter, on_finish)
+
+
+def _wait_for(condition):
+    deadline = time.monotonic() + 30
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_job_runs_and_keeps_its_result(tmp_path, gate):
+    gate.set()
+    manager = JobManager()
+    job = _submit(manager, tmp_path, 'alice', 'a.docx', on_finish=lambda job: 'archive.zip')
+    _wait_for(lambda: job.state == FINISHED)
+    assert (job.processed, job.result, job.error) == (1, 'archive.zip', None)
+    assert os.path.exists(tmp_path / 'out' / 'a.docx' / 'a.pdf')
+
+
+def test_users_wait_for_their_own_jobs_only(tmp_path, gate):
+    manager = JobManager()
+    first = _submit(manager, tmp_path, 'alice', 'a.docx')
+    second = _submit(manager, tmp_path, 'alice', 'b.docx')
+    other = _submit(manager, tmp_path, 'bob', 'c.docx')
+    _wait_for(lambda: first.state == RUNNING and other.state == RUNNING)
+    assert second.state == QUEUED
+    assert manager.position(second) == 0
+
+    gate.set()
+    _wait_for(lambda: second.state == FINISHED)
+
+
+def test_forget_cancels_queued_jobs_only(tmp_path, gate):
+    manager = JobManager()
+    running = _submit(manager, tmp_path, 'alice', 'a.docx')
+    queued = _submit(manager, tmp_path, 'alice', 'b.docx')
+    _wait_for(lambda: running.state == RUNNING)
+
+    assert manager.forget(queued.id)
+    assert not manager.forget(running.id)
+    assert manager.get(queued.id) is None
+    assert manager.get(running.id) is running
+    assert manager.status()['queued'] == 0
+
+
+def test_only_queued_jobs_can_be_cancelled(tmp_path, gate):
+    manager = JobManager()
+    running = _submit(manager, tmp_path, 'alice', 'a.docx')
+    queued = _submit(manager, tmp_path, 'alice', 'b.docx')
+    _wait_for(lambda: running.state == RUNNING)
+
+    assert not manager.cancel(running.id)
+    assert manager.cancel(queued.id)
+    assert not manager.cancel(queued.id)
+    gate.set()
+    _wait_for(lambda: running.state == FINISHED)
+    # A finished job stays until it is forgotten
+    assert not manager.cancel(running.id)
+    assert manager.get(running.id) is running
+
+
+def test_active_jobs_are_the_unfinished_ones(tmp_path, gate):
+    manager = JobManager()
+    running = _submit(manager, tmp_path, 'alice', 'a.docx')
+    queued = _submit(manager, tmp_path, 'alice', 'b.docx')
+    assert set(manager.active_jobs()) == {running, queued}
+
+    gate.set()
+    _wait_for(lambda: queued.state == FINISHED)
+    assert manager.active_jobs() == []
+
+
+def test_finished_jobs_are_kept_for_the_result_ttl(tmp_path, gate):
+    gate.set()
+    kept, expiring = JobManager(result_ttl=3600), JobManager(result_ttl=0)
+    for manager in (kept, expiring):
+        first = _submit(manager, tmp_path, 'alice', 'a.docx')
+        _wait_for(lambda: first.state == FINISHED)
+        time.sleep(0.01)
+        # Expired jobs are dropped when the next job is submitted
+        _submit(manager, tmp_path, 'alice', 'b.docx')
+        assert (manager.get(first.id) is first) == (manager is kept)
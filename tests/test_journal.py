@@ -0,0 +1,123 @@
+"""Tests for the journal that lets interrupted runs be resumed."""
+
+import sqlite3
+import subprocess
+import sys
+from file_utils.journal import Journal, get_journal_path
+from file_utils.work_item import WorkItem
+
+
+def _dead_pid():
+    """Return the id of a process that has exited."""
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+def _interrupted_run(tmp_path):
+    """
+    Journal a run that finished 'a', left 'b' running and 'c' pending, then died.
+
+    Returns:
+        tuple: (output folder, {name: item}).
+    """
+    output_folder = str(tmp_path / 'output')
+    (tmp_path / 'in').mkdir()
+    items = {}
+    for name in 'abc':
+        (tmp_path / 'in' / f"{name}.docx").write_bytes(b'x')
+        items[name] = WorkItem.in_directory(str(tmp_path / 'in'), 'in', '', f"{name}.docx")
+    output_path = tmp_path / 'output' / 'in' / 'a.pdf'
+    output_path.parent.mkdir(parents=True)
+    output_path.write_bytes(b'%PDF')
+
+    journal = Journal(output_folder)
+    for name, item in items.items():
+        journal.pending(f"in:{name}", item)
+    journal.running(['in:a', 'in:b'])
+    journal.finished('in:a', str(output_path))
+    journal.close()
+
+    # Make it look like the process was killed rather than closing the journal
+    with sqlite3.connect(get_journal_path(output_folder)) as db:
+        db.execute("UPDATE runs SET finished = NULL, pid = ?", (_dead_pid(),))
+    db.close()
+    return output_folder, items
+
+
+def test_resume_reclaims_tasks_of_dead_runs(tmp_path):
+    output_folder, items = _interrupted_run(tmp_path)
+
+    journal = Journal(output_folder, resume=True)
+    try:
+        assert journal.reclaimed == 1
+        assert journal.done_count == 1
+        assert journal.is_done('in:a')
+        assert journal.get_output_path('in:a') == str(tmp_path / 'output' / 'in' / 'a.pdf')
+        assert not journal.is_done('in:b')
+        assert [item.name for item in journal.unfinished()] == ['b.docx', 'c.docx']
+    finally:
+        journal.close()
+
+
+def test_finished_task_without_output_is_converted_again(tmp_path):
+    output_folder, items = _interrupted_run(tmp_path)
+    (tmp_path / 'output' / 'in' / 'a.pdf').unlink()
+
+    journal = Journal(output_folder, resume=True)
+    try:
+        assert not journal.is_done('in:a')
+    finally:
+        journal.close()
+
+
+def test_live_runs_keep_their_tasks(tmp_path):
+    output_folder = str(tmp_path / 'output')
+    (tmp_path / 'output').mkdir()
+    running = Journal(output_folder)
+    try:
+        running.pending('in:a', WorkItem.direct(str(tmp_path / 'a.docx')))
+        running.running(['in:a'])
+        running._flush()
+
+        second = Journal(output_folder, resume=True)
+        assert second.reclaimed == 0
+        second.close()
+    finally:
+        running.close()
+
+
+def test_new_run_starts_over(tmp_path):
+    output_folder, items = _interrupted_run(tmp_path)
+
+    journal = Journal(output_folder)
+    try:
+        assert journal.done_count == 0
+        assert not journal.is_done('in:a')
+        assert journal.unfinished() == []
+    finally:
+        journal.close()
+
+
+def test_archive_members_are_journaled_without_their_staged_path(tmp_path):
+    output_folder = str(tmp_path / 'output')
+    (tmp_path / 'output').mkdir()
+    item = WorkItem.in_archive('/in/x.zip', 'a.docx', 'x.zip', 'a.docx', 1, 0, 0,
+                               container=('inner.zip',))
+    item['path'] = str(tmp_path / 'staged' / 'a.docx')
+
+    journal = Journal(output_folder)
+    journal.pending('x.zip:a.docx', item)
+    journal.close()
+    with sqlite3.connect(get_journal_path(output_folder)) as db:
+        db.execute("UPDATE runs SET finished = NULL, pid = ?", (_dead_pid(),))
+    db.close()
+
+    journal = Journal(output_folder, resume=True)
+    try:
+        (unfinished,) = journal.unfinished()
+        assert unfinished.path is None
+        assert unfinished.container == ('inner.zip',)
+        assert unfinished.member == 'a.docx'
+    finally:
+        journal.close()
@@ -0,0 +1,147 @@
+"""Tests for the LibreOffice converter, run against the benchmarks' fake soffice."""
+
+import os
+import random
+import time
+import pytest
+import converters.libreoffice_converter as libreoffice_converter
+from converters.libreoffice_converter import LibreOfficeConverter
+from converters.quarantine import Quarantine
+
+pytestmark = pytest.mark.usefixtures('fake_soffice')
+
+# Share of the files the fake soffice hangs on in the timeout tests
+HANG_RATE = 0.5
+
+
+def _hangs(name):
+    """Whether the fake soffice hangs on a file (its first per-file draw, with the default seed)."""
+    return random.Random(f"0:{name}").random() < HANG_RATE
+
+
+def _names(count, hanging):
+    """Return document names the fake soffice hangs on (or doesn't)."""
+    names = (f"doc{index}.docx" for index in range(1000))
+    return [name for name in names if _hangs(name) == hanging][:count]
+
+
+def _inputs(tmp_path, names):
+    (tmp_path / 'in').mkdir(exist_ok=True)
+    paths = []
+    for name in names:
+        (tmp_path / 'in' / name).write_bytes(b'document ' + name.encode())
+        paths.append(str(tmp_path / 'in' / name))
+    return paths
+
+
+@pytest.fixture
+def quarantine(tmp_path, monkeypatch):
+    """A quarantine list that quarantines documents after one failure."""
+    quarantine = Quarantine(str(tmp_path / 'quarantine.json'), 1)
+    monkeypatch.setattr(libreoffice_converter, 'get_quarantine', lambda: quarantine)
+    return quarantine
+
+
+def test_documents_are_converted_and_other_files_copied(tmp_path):
+    paths = _inputs(tmp_path, ['a.docx', 'b.pptx', 'notes.txt'])
+    converter = LibreOfficeConverter(str(tmp_path / 'out'))
+    assert converter.process(paths) == 3
+    assert sorted(os.listdir(tmp_path / 'out')) == ['a.pdf', 'b.pdf', 'notes.txt']
+    with open(tmp_path / 'out' / 'a.pdf') as f:
+        assert f.read().startswith('%PDF')
+
+
+def test_batches(tmp_path):
+    names = ['a.docx', 'b.docx', 'c.xlsx']
+    paths = _inputs(tmp_path, names)
+    converter = LibreOfficeConverter(str(tmp_path / 'out'))
+    converter.batch_conversions = True
+    assert converter._make_batches(paths) == [tuple(paths)]
+    assert converter.process(paths) == 3
+    assert sorted(os.listdir(tmp_path / 'out')) == ['a.pdf', 'b.pdf', 'c.pdf']
+
+
+def test_files_with_the_same_output_name_share_a_batch(tmp_path, monkeypatch):
+    monkeypatch.setattr(libreoffice_converter, 'BATCH_MAX_FILES', 1)
+    a_docx, b_docx, a_pptx = paths = _inputs(tmp_path, ['a.docx', 'b.docx', 'a.pptx'])
+    converter = LibreOfficeConverter(str(tmp_path / 'out'))
+    assert converter._make_batches(paths) == [(a_docx, a_pptx), (b_docx,)]
+
+
+def test_files_with_the_same_output_name_are_converted_in_turn(tmp_path, monkeypatch):
+    a_docx, a_pptx, b_docx = paths = _inputs(tmp_path, ['a.docx', 'a.pptx', 'b.docx'])
+    converter = LibreOfficeConverter(str(tmp_path / 'out'))
+    converter.batch_conversions = True
+    runs = []
+    run_libreoffice = converter._run_libreoffice
+    monkeypatch.setattr(converter, '_run_libreoffice',
+                        lambda batch: runs.append(batch) or run_libreoffice(batch))
+
+    assert converter.process(paths) == 3
+    assert runs == [[a_docx, b_docx], [a_pptx]]
+    assert sorted(os.listdir(tmp_path / 'out')) == ['a.pdf', 'b.pdf']
+    # The later file's PDF replaced the earlier one
+    with open(tmp_path / 'out' / 'a.pdf') as f:
+        assert 'a.pptx' in f.read()
+
+
+def test_batch_falls_back_to_single_files_for_missing_outputs(tmp_path, monkeypatch):
+    paths = _inputs(tmp_path, ['a.docx', 'b.docx'])
+    converter = LibreOfficeConverter(str(tmp_path / 'out'))
+    os.makedirs(converter.output_folder, exist_ok=True)
+    monkeypatch.setattr(converter, '_run_libreoffice', lambda batch: None)
+    singles = []
+    monkeypatch.setattr(converter, '_convert_single_file',
+                        lambda path: singles.append(path) or True)
+    assert converter._convert_batch(tuple(paths)) == 2
+    assert singles == paths
+
+
+def test_hung_conversion_is_killed_and_quarantined(tmp_path, monkeypatch, quarantine):
+    monkeypatch.setenv('FAKE_SOFFICE_HANG_RATE', str(HANG_RATE))
+    monkeypatch.setattr(libreoffice_converter, 'get_conversion_timeout', lambda paths: 1)
+    (hung,) = _names(1, hanging=True)
+    (path,) = _inputs(tmp_path, [hung])
+    converter = LibreOfficeConverter(str(tmp_path / 'out'))
+    started = time.monotonic()
+    assert converter.process([path]) == 1
+    # Killed after the time limit and not retried
+    assert time.monotonic() - started < 5
+    assert os.listdir(tmp_path / 'out') == [hung]
+    assert quarantine.is_quarantined(path)
+
+
+def test_hung_batch_doesnt_wait_twice(tmp_path, monkeypatch, quarantine):
+    monkeypatch.setenv('FAKE_SOFFICE_HANG_RATE', str(HANG_RATE))
+    monkeypatch.setattr(libreoffice_converter, 'get_conversion_timeout', lambda paths: 2)
+    converted = _names(3, hanging=False)
+    (hung,) = _names(1, hanging=True)
+    paths = _inputs(tmp_path, converted[:1] + [hung] + converted[1:])
+    # An output left by an earlier run must not be taken for a new one
+    (tmp_path / 'out').mkdir()
+    stale_pdf = tmp_path / 'out' / (os.path.splitext(hung)[0] + '.pdf')
+    stale_pdf.write_bytes(b'%PDF old')
+
+    converter = LibreOfficeConverter(str(tmp_path / 'out'))
+    started = time.monotonic()
+    assert converter._convert_batch(tuple(paths)) == 4
+    # One time limit for the batch; the hung file isn't converted again on its own
+    assert time.monotonic() - started < 4
+    assert not stale_pdf.exists()
+    # Copied instead of converted, and counted towards quarantine
+    assert (tmp_path / 'out' / hung).exists()
+    assert quarantine.is_quarantined(paths[1])
+    for name in converted:
+        assert (tmp_path / 'out' / (os.path.splitext(name)[0] + '.pdf')).exists()
+
+
+def test_quarantined_documents_are_copied(tmp_path, quarantine, monkeypatch):
+    (path,) = _inputs(tmp_path, ['a.docx'])
+    quarantine.record_failure(path)
+
+    def run_libreoffice(paths):
+        raise AssertionError("LibreOffice was started")
+    converter = LibreOfficeConverter(str(tmp_path / 'out'))
+    monkeypatch.setattr(converter, '_run_libreoffice', run_libreoffice)
+    assert converter.process([path]) == 1
+    assert os.listdir(tmp_path / 'out') == ['a.docx']
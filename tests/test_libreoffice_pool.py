@@ -0,0 +1,169 @@
+import os
+import types
+import time
+import threading
+import contextlib
+import subprocess
+import pytest
+
+from converters import libreoffice_pool
+from converters.libreoffice_converter import LibreOfficeConverter
+from converters.libreoffice_pool import LibreOfficeWorker, PooledLibreOfficeConverter
+from converters.libreoffice_profiles import profile_url
+from utils import metrics
+
+
+class FakeProcess:
+    """Stands in for the LibreOffice process of a worker."""
+
+    def __init__(self):
+        self.returncode = None
+
+    def poll(self):
+        return self.returncode
+
+    def wait(self, timeout=None):
+        self.returncode = 0
+        return 0
+
+    def kill(self):
+        self.returncode = -9
+
+
+class FakeDocument:
+    def __init__(self, source):
+        self.source = source
+
+    def supportsService(self, service):
+        return service == 'com.sun.star.text.TextDocument'
+
+    def storeToURL(self, url, properties):
+        with open(url[len('file://'):], 'w') as output:
+            output.write(f"PDF of {self.source}")
+
+    def close(self, deliver_ownership):
+        pass
+
+
+class FakeDesktop:
+    def getFrames(self):
+        return ()
+
+    def loadComponentFromURL(self, url, target, flags, properties):
+        return FakeDocument(url[len('file://'):])
+
+    def terminate(self):
+        pass
+
+
+class FakeProperty:
+    Name = None
+    Value = None
+
+
+@pytest.fixture
+def fake_uno(monkeypatch):
+    """Replace the UNO bridge and the LibreOffice launch with in-process fakes."""
+    monkeypatch.setattr(libreoffice_pool, 'uno',
+                        types.SimpleNamespace(systemPathToFileUrl=lambda path: 'file://' + path))
+    monkeypatch.setattr(libreoffice_pool, 'PropertyValue', FakeProperty, raising=False)
+    started = []
+
+    def start(worker):
+        worker.process = FakeProcess()
+        worker.desktop = FakeDesktop()
+        worker.jobs_done = 0
+        started.append(worker.process)
+
+    monkeypatch.setattr(LibreOfficeWorker, 'start', start)
+    return started
+
+
+def _documents(tmp_path, count):
+    paths = []
+    for index in range(count):
+        path = tmp_path / f"doc{index}.docx"
+        path.write_text(f"document {index}")
+        paths.append(str(path))
+    return paths
+
+
+def test_worker_is_recycled_after_max_jobs(tmp_path, fake_uno):
+    worker = LibreOfficeWorker(0, max_jobs=2)
+
+    for path in _documents(tmp_path, 5):
+        worker.convert(path, str(tmp_path))
+
+    assert len(fake_uno) == 3
+    assert sorted(name for name in os.listdir(tmp_path) if name.endswith('.pdf')) == [
+        f"doc{index}.pdf" for index in range(5)]
+
+
+def test_worker_restarts_an_instance_that_died(tmp_path, fake_uno):
+    worker = LibreOfficeWorker(0)
+    first, second = _documents(tmp_path, 2)
+    worker.convert(first, str(tmp_path))
+
+    fake_uno[0].returncode = 1
+    worker.convert(second, str(tmp_path))
+
+    assert len(fake_uno) == 2
+    assert os.path.exists(tmp_path / 'doc1.pdf')
+
+
+def test_converter_falls_back_to_one_process_per_file_without_uno(tmp_path, monkeypatch):
+    monkeypatch.setattr(libreoffice_pool, 'uno', None)
+    converted = []
+    monkeypatch.setattr(LibreOfficeConverter, '_run_conversion',
+                        lambda self, path: converted.append(path))
+    path = _documents(tmp_path, 1)[0]
+
+    PooledLibreOfficeConverter(str(tmp_path))._run_conversion(path)
+
+    assert converted == [path]
+
+
+def test_hung_instance_is_killed_on_stop(tmp_path, monkeypatch):
+    hung = threading.Event()
+
+    class HungDesktop(FakeDesktop):
+        def terminate(self):
+            hung.wait(30)
+
+    class HungProcess(FakeProcess):
+        def wait(self, timeout=None):
+            if self.returncode is None and timeout is not None:
+                raise subprocess.TimeoutExpired('soffice', timeout)
+            return self.returncode
+
+    killed = []
+
+    def kill_process_tree(process, marker=None):
+        killed.append(marker)
+        process.kill()
+
+    monkeypatch.setattr(libreoffice_pool, '_STOP_TIMEOUT', 0.1)
+    monkeypatch.setattr(libreoffice_pool, 'kill_process_tree', kill_process_tree)
+    worker = LibreOfficeWorker(0)
+    worker.process, worker.desktop, worker.profile_dir = HungProcess(), HungDesktop(), str(tmp_path)
+
+    started = time.monotonic()
+    worker.stop()
+    hung.set()
+    assert time.monotonic() - started < 5
+    assert killed == [profile_url(str(tmp_path))]
+    assert worker.process is None
+
+
+def test_pooled_conversions_are_measured(tmp_path, monkeypatch):
+    converted, spans = [], []
+    monkeypatch.setattr(libreoffice_pool, 'get_pool', lambda: types.SimpleNamespace(
+        convert=lambda path, output_folder: converted.append(path)))
+    monkeypatch.setattr(metrics, 'span', lambda stage, **fields: spans.append(
+        (stage, fields)) or contextlib.nullcontext())
+    path = _documents(tmp_path, 1)[0]
+
+    PooledLibreOfficeConverter(str(tmp_path))._run_conversion(path)
+
+    assert converted == [path]
+    assert spans == [('convert', {'files': 1, 'bytes': 0, 'ext': '.docx'})]
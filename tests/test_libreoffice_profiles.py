@@ -0,0 +1,23 @@
+import os
+
+from converters.libreoffice_profiles import acquire_profile, profile_url
+
+
+def test_concurrent_conversions_get_separate_profiles():
+    with acquire_profile() as first, acquire_profile() as second:
+        assert first != second
+        assert os.path.isdir(first) and os.path.isdir(second)
+
+
+def test_released_profiles_are_reused():
+    with acquire_profile() as first:
+        root = os.path.dirname(first)
+    slots = set(os.listdir(root))
+
+    with acquire_profile() as again:
+        assert os.path.basename(again) in slots
+    assert set(os.listdir(root)) == slots
+
+
+def test_profile_url_is_a_file_uri(tmp_path):
+    assert profile_url(str(tmp_path)) == f"-env:UserInstallation=file://{tmp_path}"
@@ -0,0 +1,133 @@
+"""Tests for the incremental-mode manifest."""
+
+import os
+from file_utils.manifest import Manifest, get_manifest_key, get_manifest_path
+from file_utils.work_item import WorkItem
+
+
+def _setup(tmp_path, content=b'version 1'):
+    """Create an input file and its output; return (output folder, input item, output path)."""
+    source = tmp_path / 'in' / 'a.docx'
+    source.parent.mkdir()
+    source.write_bytes(content)
+    output_folder = tmp_path / 'output'
+    output_path = output_folder / 'in' / 'a.pdf'
+    output_path.parent.mkdir(parents=True)
+    output_path.write_bytes(b'%PDF')
+    item = WorkItem.in_directory(str(tmp_path / 'in'), 'in', '', 'a.docx')
+    return str(output_folder), item, str(output_path)
+
+
+def _touch(path, offset_ns):
+    """Shift a file's modification time."""
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + offset_ns))
+
+
+def test_keys_and_location():
+    item = WorkItem.in_directory('/data', 'data', 'sub', 'a.docx')
+    assert get_manifest_key(item) == f"data:{os.path.join('sub', 'a.docx')}"
+    assert get_manifest_key(WorkItem.direct('a.docx')) == f"direct:{os.path.abspath('a.docx')}"
+    assert get_manifest_path('/x/output') == '/x/.output-manifest.json'
+
+
+def test_unchanged_file_is_skipped(tmp_path):
+    output_folder, item, output_path = _setup(tmp_path)
+    manifest = Manifest(output_folder)
+    key = get_manifest_key(item)
+    assert not manifest.is_unchanged(key, item, 'v1')
+
+    manifest.record(key, item, output_path, 'v1')
+    assert manifest.is_unchanged(key, item, 'v1')
+    assert manifest.get_output_path(key) == output_path
+    # A new converter version converts everything again
+    assert not manifest.is_unchanged(key, item, 'v2')
+
+    os.remove(output_path)
+    assert not manifest.is_unchanged(key, item, 'v1')
+
+
+def test_changed_fingerprint(tmp_path):
+    output_folder, item, output_path = _setup(tmp_path)
+    manifest = Manifest(output_folder)
+    key = get_manifest_key(item)
+    manifest.record(key, item, output_path, 'v1')
+
+    _touch(item['path'], 1_000_000_000)
+    assert not manifest.is_unchanged(key, item, 'v1')
+
+    with open(item['path'], 'ab') as f:
+        f.write(b' and more')
+    assert not manifest.is_unchanged(key, item, 'v1')
+
+
+def test_touched_file_with_same_hash_is_skipped(tmp_path):
+    output_folder, item, output_path = _setup(tmp_path)
+    manifest = Manifest(output_folder, use_hash=True)
+    key = get_manifest_key(item)
+    manifest.record(key, item, output_path, 'v1')
+
+    _touch(item['path'], 1_000_000_000)
+    assert manifest.is_unchanged(key, item, 'v1')
+    # The new modification time is remembered, so the file isn't hashed again
+    assert manifest.entries[key]['mtime_ns'] == os.stat(item['path']).st_mtime_ns
+
+    with open(item['path'], 'wb') as f:
+        f.write(b'version 2')
+    assert not manifest.is_unchanged(key, item, 'v1')
+
+
+def test_archive_members_use_the_listed_fingerprint(tmp_path):
+    output_folder = str(tmp_path / 'output')
+    output_path = tmp_path / 'output' / 'x.zip' / 'a.pdf'
+    output_path.parent.mkdir(parents=True)
+    output_path.write_bytes(b'%PDF')
+    item = WorkItem.in_archive(str(tmp_path / 'x.zip'), 'a.docx', 'x.zip', 'a.docx', 10, 1_000, 5)
+    manifest = Manifest(output_folder, use_hash=True)
+    key = get_manifest_key(item)
+    manifest.record(key, item, str(output_path), 'v1')
+    assert manifest.entries[key]['hash'] == 'crc32:00000005'
+
+    moved = WorkItem.in_archive(str(tmp_path / 'x.zip'), 'a.docx', 'x.zip', 'a.docx', 10, 2_000, 5)
+    assert manifest.is_unchanged(key, moved, 'v1')
+    changed = WorkItem.in_archive(str(tmp_path / 'x.zip'), 'a.docx', 'x.zip', 'a.docx', 10, 3_000, 6)
+    assert not manifest.is_unchanged(key, changed, 'v1')
+
+
+def test_stale_keys_only_cover_scanned_sources(tmp_path):
+    output_folder, item, output_path = _setup(tmp_path)
+    manifest = Manifest(output_folder)
+    manifest.record('in:a.docx', item, output_path, 'v1')
+    manifest.record('in:gone.docx', item, output_path, 'v1')
+    manifest.record('other:b.docx', dict(item, source='other'), output_path, 'v1')
+
+    assert manifest.stale_keys({'in'}, {'in:a.docx'}) == ['in:gone.docx']
+    assert manifest.stale_keys(set(), {'in:a.docx'}) == []
+
+
+def test_direct_files_are_stale_only_once_deleted(tmp_path):
+    output_folder, _, output_path = _setup(tmp_path)
+    manifest = Manifest(output_folder)
+    for name in ('kept.docx', 'gone.docx'):
+        (tmp_path / name).write_bytes(b'document')
+        item = WorkItem.direct(str(tmp_path / name))
+        manifest.record(get_manifest_key(item), item, output_path, 'v1')
+    os.remove(tmp_path / 'gone.docx')
+
+    # Neither file was listed this run; only the deleted one is stale
+    gone = get_manifest_key(WorkItem.direct(str(tmp_path / 'gone.docx')))
+    assert manifest.stale_keys({'direct'}, set()) == [gone]
+
+
+def test_remove_output_and_save(tmp_path):
+    output_folder, item, output_path = _setup(tmp_path)
+    manifest = Manifest(output_folder)
+    key = get_manifest_key(item)
+    manifest.record(key, item, output_path, 'v1')
+    manifest.save()
+
+    reloaded = Manifest(output_folder)
+    assert reloaded.is_unchanged(key, item, 'v1')
+    reloaded.remove_output(key)
+    assert not os.path.exists(output_path)
+    assert reloaded.get_output_path(key) is None
@@ -0,0 +1,59 @@
+"""Tests for the timing spans and counters."""
+
+import json
+import pytest
+from utils import metrics
+
+
+@pytest.fixture
+def metrics_file(tmp_path, monkeypatch):
+    """Turn metrics on with fresh totals; return the JSON lines file."""
+    path = tmp_path / 'metrics.jsonl'
+    monkeypatch.setattr(metrics, 'enabled', True)
+    monkeypatch.setattr(metrics, 'METRICS_FILE', str(path))
+    monkeypatch.setattr(metrics, 'METRICS_PROMETHEUS_FILE', str(tmp_path / 'metrics.prom'))
+    monkeypatch.setattr(metrics, '_stages', {})
+    monkeypatch.setattr(metrics, '_counters', {})
+    monkeypatch.setattr(metrics, '_output', None)
+    yield path
+    metrics._close()
+
+
+def _lines(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_spans_are_written_and_totalled(metrics_file):
+    with metrics.span('convert', ext='.docx') as span:
+        span.set(bytes=100)
+    with pytest.raises(ValueError):
+        with metrics.span('convert', bytes=50):
+            raise ValueError("broken")
+    metrics.flush()
+
+    first, second, summary = _lines(metrics_file)
+    assert (first['stage'], first['ext'], first['bytes']) == ('convert', '.docx', 100)
+    assert second['error'] == 'ValueError'
+    totals = summary['summary']['stages']['convert']
+    assert (totals['count'], totals['bytes']) == (2, 150)
+
+
+def test_counters_are_exported_for_prometheus(metrics_file, tmp_path):
+    metrics.count('files', ext='.docx', outcome='converted')
+    metrics.count('files', 2, ext='.docx', outcome='converted')
+    metrics.flush()
+
+    assert metrics.summary()['counters'] == {'files{ext=".docx",outcome="converted"}': 3}
+    snapshot = (tmp_path / 'metrics.prom').read_text()
+    assert 'doc2pdf_files_total{ext=".docx",outcome="converted"} 3\n' in snapshot
+
+
+def test_nothing_is_recorded_while_disabled(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, 'enabled', False)
+    monkeypatch.setattr(metrics, 'METRICS_FILE', str(tmp_path / 'metrics.jsonl'))
+    with metrics.span('convert'):
+        pass
+    metrics.count('files')
+    metrics.flush()
+    assert not (tmp_path / 'metrics.jsonl').exists()
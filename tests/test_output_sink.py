@@ -0,0 +1,102 @@
+"""Tests for the output sinks that collect files while converting."""
+
+import io
+import os
+import tarfile
+import zipfile
+import pytest
+from file_utils.output_sink import OutputSink, DirectorySink, ZipSink, TarSink, open_output_sink
+
+
+@pytest.fixture
+def outputs(tmp_path):
+    """A PDF and a text file to add to sinks."""
+    (tmp_path / 'out' / 'sub').mkdir(parents=True)
+    pdf = tmp_path / 'out' / 'sub' / 'a.pdf'
+    pdf.write_bytes(b'%PDF' + b'x' * 1000)
+    text = tmp_path / 'out' / 'notes.txt'
+    text.write_bytes(b'notes ' * 1000)
+    return str(pdf), str(text)
+
+
+def test_zip_stores_compressed_types_and_deflates_the_rest(tmp_path, outputs):
+    pdf, text = outputs
+    target = str(tmp_path / 'result.zip')
+    sink = ZipSink(target)
+    sink.add(pdf, os.path.join('sub', 'a.pdf'))
+    sink.add(text, 'notes.txt')
+    sink.close()
+
+    assert (sink.count, sink.bytes) == (2, os.path.getsize(pdf) + os.path.getsize(text))
+    with zipfile.ZipFile(target) as archive:
+        assert archive.getinfo('sub/a.pdf').compress_type == zipfile.ZIP_STORED
+        assert archive.getinfo('notes.txt').compress_type == zipfile.ZIP_DEFLATED
+        assert archive.read('notes.txt') == b'notes ' * 1000
+
+
+def test_zip_to_an_unseekable_stream(outputs):
+    class Unseekable(io.RawIOBase):
+        def __init__(self):
+            self.data = bytearray()
+
+        def writable(self):
+            return True
+
+        def write(self, data):
+            self.data += data
+            return len(data)
+
+    stream = Unseekable()
+    sink = ZipSink(stream)
+    sink.add(outputs[0], 'a.pdf')
+    sink.close()
+    with zipfile.ZipFile(io.BytesIO(bytes(stream.data))) as archive:
+        assert archive.namelist() == ['a.pdf']
+
+
+def test_unused_sink_writes_an_empty_archive(tmp_path):
+    target = str(tmp_path / 'empty.zip')
+    ZipSink(target).close()
+    with zipfile.ZipFile(target) as archive:
+        assert archive.namelist() == []
+
+
+def test_tar_sink(tmp_path, outputs):
+    target = str(tmp_path / 'result.tar.gz')
+    sink = TarSink(target)
+    sink.add(outputs[0], os.path.join('sub', 'a.pdf'))
+    sink.close()
+    with tarfile.open(target, 'r:gz') as archive:
+        assert archive.getnames() == ['sub/a.pdf']
+
+
+def test_directory_sink(tmp_path, outputs):
+    sink = DirectorySink(str(tmp_path / 'copy'))
+    sink.add(outputs[0], os.path.join('sub', 'a.pdf'))
+    sink.close()
+    with open(tmp_path / 'copy' / 'sub' / 'a.pdf', 'rb') as f, open(outputs[0], 'rb') as original:
+        assert f.read() == original.read()
+
+
+def test_errors_are_raised_by_close(tmp_path, outputs):
+    sink = ZipSink(str(tmp_path / 'result.zip'))
+    sink.add(str(tmp_path / 'missing.pdf'), 'missing.pdf')
+    sink.add(outputs[0], 'a.pdf')
+    with pytest.raises(OSError):
+        sink.close()
+
+
+def test_sinks_must_write():
+    with pytest.raises(TypeError):
+        OutputSink('target')
+
+
+@pytest.mark.parametrize('target, sink_type', [
+    ('out.ZIP', ZipSink),
+    ('out.tar', TarSink),
+    ('out.tgz', TarSink),
+    ('out.tar.xz', TarSink),
+    ('out', DirectorySink),
+])
+def test_open_output_sink(target, sink_type):
+    assert type(open_output_sink(target)) is sink_type
@@ -0,0 +1,153 @@
+"""Tests for the conversion pipeline's incremental, resume and sink handling."""
+
+import os
+import json
+import shutil
+import zipfile
+import pytest
+import conversion.pipeline as pipeline
+import conversion.scheduler as scheduler
+import utils.cost_model as cost_model
+from conversion.pipeline import ConversionPipeline
+from converters.base_converter import DocumentConverter
+from file_utils.output_sink import ZipSink
+from file_utils.input_collector import iter_input_files, new_input_counts
+
+
+class PdfWriter(DocumentConverter):
+    """Writes a placeholder PDF for every file."""
+
+    def process(self, file_paths):
+        os.makedirs(self.output_folder, exist_ok=True)
+        for path in file_paths:
+            with open(self.get_output_path(path), 'wb') as f:
+                f.write(b'%PDF ' + os.path.basename(path).encode())
+        return len(file_paths)
+
+    def get_version(self):
+        return 'pdf-writer 1'
+
+
+class Copier(PdfWriter):
+    """Fails to convert and copies every file instead."""
+
+    def process(self, file_paths):
+        for path in file_paths:
+            shutil.copy2(path, self.output_folder)
+        return len(file_paths)
+
+
+class Failer(PdfWriter):
+    """Produces nothing."""
+
+    def process(self, file_paths):
+        return 0
+
+
+@pytest.fixture
+def incremental(monkeypatch):
+    """Turn on incremental mode with stale output removal."""
+    monkeypatch.setattr(pipeline, 'INCREMENTAL_MODE', True)
+    monkeypatch.setattr(pipeline, 'INCREMENTAL_DELETE_STALE', True)
+
+
+def _run(tmp_path, names, converter=PdfWriter, **options):
+    """Convert tmp_path/src, creating the missing files among names first."""
+    (tmp_path / 'src').mkdir(exist_ok=True)
+    for name in names:
+        path = tmp_path / 'src' / name
+        if not path.exists():
+            path.write_bytes(b'document ' + name.encode())
+    conversion = ConversionPipeline(str(tmp_path / 'output'), converter, num_workers=1, **options)
+    processed = conversion.run(iter_input_files([str(tmp_path / 'src')], new_input_counts()))
+    return conversion, processed
+
+
+def _outputs(tmp_path):
+    return sorted(os.listdir(tmp_path / 'output' / 'src'))
+
+
+def test_all_files_are_converted(tmp_path):
+    conversion, processed = _run(tmp_path, ['a.docx', 'b.docx', 'c.docx'])
+    assert processed == 3
+    assert conversion.discovered == 3
+    assert _outputs(tmp_path) == ['a.pdf', 'b.pdf', 'c.pdf']
+
+
+def test_run_teaches_the_cost_model(tmp_path, monkeypatch):
+    monkeypatch.setattr(scheduler, 'COST_AWARE_SCHEDULING', True)
+    monkeypatch.setattr(cost_model, '_model', cost_model.CostModel(str(tmp_path / 'cost-model.json')))
+    _run(tmp_path, ['a.docx', 'b.docx', 'c.txt'])
+    with open(tmp_path / 'cost-model.json') as f:
+        extensions = json.load(f)['extensions']
+    assert extensions['.docx']['n'] > 1
+    assert extensions['.txt']['n'] > 0
+
+
+def test_unchanged_files_are_skipped(tmp_path, incremental):
+    _run(tmp_path, ['a.docx', 'b.docx'])
+    conversion, processed = _run(tmp_path, ['c.docx'])
+    assert processed == 1
+    assert conversion.skipped == 2
+    assert _outputs(tmp_path) == ['a.pdf', 'b.pdf', 'c.pdf']
+
+
+def test_outputs_of_deleted_inputs_are_removed(tmp_path, incremental):
+    _run(tmp_path, ['a.docx', 'b.docx', 'c.docx'])
+    os.remove(tmp_path / 'src' / 'c.docx')
+    _run(tmp_path, [])
+    assert _outputs(tmp_path) == ['a.pdf', 'b.pdf']
+
+
+def test_changed_file_keeps_its_output_until_replaced(tmp_path, incremental):
+    _run(tmp_path, ['a.docx'])
+    (tmp_path / 'src' / 'a.docx').write_bytes(b'changed document')
+    # A failed reconversion leaves the earlier PDF in place
+    conversion, processed = _run(tmp_path, [], converter=Failer)
+    assert processed == 0
+    assert _outputs(tmp_path) == ['a.pdf']
+    # A copy made instead of the PDF replaces it
+    _run(tmp_path, [], converter=Copier)
+    assert _outputs(tmp_path) == ['a.docx']
+
+
+def test_resumed_run_skips_finished_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline, 'JOURNAL_ENABLED', True)
+    _run(tmp_path, ['a.docx', 'b.docx'])
+    conversion, processed = _run(tmp_path, ['c.docx'], resume=True)
+    assert conversion.resumed == 2
+    assert processed == 1
+    assert _outputs(tmp_path) == ['a.pdf', 'b.pdf', 'c.pdf']
+
+
+def test_resumed_files_are_not_taken_for_deleted_ones(tmp_path, incremental, monkeypatch):
+    monkeypatch.setattr(pipeline, 'JOURNAL_ENABLED', True)
+    _run(tmp_path, ['a.docx', 'b.docx'])
+    # c.docx is converted, so the source counts as scanned
+    conversion, processed = _run(tmp_path, ['c.docx'], resume=True)
+    assert conversion.resumed == 2
+    assert processed == 1
+    assert _outputs(tmp_path) == ['a.pdf', 'b.pdf', 'c.pdf']
+
+
+def test_sink_receives_converted_and_skipped_outputs(tmp_path, incremental):
+    _run(tmp_path, ['a.docx'])
+    target = str(tmp_path / 'result.zip')
+    sink = ZipSink(target)
+    _run(tmp_path, ['b.docx'], sink=sink)
+    sink.close()
+    with zipfile.ZipFile(target) as archive:
+        assert sorted(archive.namelist()) == ['src/a.pdf', 'src/b.pdf']
+
+
+def test_duplicates_are_converted_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline, 'DEDUPLICATE_INPUTS', True)
+    (tmp_path / 'src').mkdir()
+    for name in ('a.docx', 'copy of a.docx'):
+        (tmp_path / 'src' / name).write_bytes(b'same document')
+    conversion, processed = _run(tmp_path, ['a.docx', 'copy of a.docx'])
+    assert processed == 2
+    assert _outputs(tmp_path) == ['a.pdf', 'copy of a.pdf']
+    # One of them was converted, the other got its PDF
+    contents = {(tmp_path / 'output' / 'src' / name).read_bytes() for name in _outputs(tmp_path)}
+    assert len(contents) == 1
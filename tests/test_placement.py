@@ -0,0 +1,77 @@
+"""Tests for placing files by linking, cloning or copying them."""
+
+import errno
+import os
+import pytest
+import file_utils.placement as placement
+from file_utils.placement import FALLBACKS, place_file
+
+
+@pytest.fixture(autouse=True)
+def fresh_placement(monkeypatch):
+    """Forget which strategies failed in earlier tests."""
+    monkeypatch.setattr(placement, '_unsupported', set())
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'src.txt'
+    path.write_bytes(b'content')
+    return str(path)
+
+
+def _failing(error_number, calls):
+    """Return a strategy that records its calls and fails with an OSError."""
+    def strategy(src, dest):
+        calls.append(dest)
+        raise OSError(error_number, os.strerror(error_number))
+    return strategy
+
+
+def test_every_strategy_ends_with_a_copy():
+    for strategy, candidates in FALLBACKS.items():
+        assert candidates[0] == strategy
+        assert candidates[-1] == 'copy'
+
+
+def test_hardlink_shares_the_file(tmp_path, source):
+    dest = str(tmp_path / 'dest.txt')
+    assert place_file(source, dest, 'hardlink') == 'hardlink'
+    assert os.path.samefile(source, dest)
+
+
+def test_symlink_points_back_to_the_input(tmp_path, source):
+    dest = str(tmp_path / 'dest.txt')
+    assert place_file(source, dest, 'symlink') == 'symlink'
+    assert os.readlink(dest) == os.path.abspath(source)
+
+
+def test_copy_replaces_an_existing_file(tmp_path, source):
+    dest = tmp_path / 'dest.txt'
+    dest.write_bytes(b'old')
+    assert place_file(source, str(dest), 'copy') == 'copy'
+    assert dest.read_bytes() == b'content'
+    assert not os.path.samefile(source, str(dest))
+
+
+def test_unsupported_strategy_falls_back_and_is_remembered(tmp_path, source, monkeypatch):
+    calls = []
+    monkeypatch.setitem(placement._STRATEGIES, 'reflink', _failing(errno.EOPNOTSUPP, calls))
+    monkeypatch.setitem(placement._STRATEGIES, 'copy_file_range', _failing(errno.EXDEV, calls))
+
+    assert place_file(source, str(tmp_path / 'one.txt'), 'reflink') == 'copy'
+    assert place_file(source, str(tmp_path / 'two.txt'), 'reflink') == 'copy'
+    # Not tried again for the same pair of devices
+    assert len(calls) == 2
+    assert (tmp_path / 'two.txt').read_bytes() == b'content'
+
+
+def test_other_errors_are_raised(tmp_path, source, monkeypatch):
+    monkeypatch.setitem(placement._STRATEGIES, 'reflink', _failing(errno.ENOSPC, []))
+    with pytest.raises(OSError) as error:
+        place_file(source, str(tmp_path / 'dest.txt'), 'reflink')
+    assert error.value.errno == errno.ENOSPC
+
+
+def test_unknown_strategy_copies(tmp_path, source):
+    assert place_file(source, str(tmp_path / 'dest.txt'), 'teleport') == 'copy'
@@ -0,0 +1,55 @@
+"""Tests for the scan rules of FileMatcher."""
+
+from file_utils.scanner import FileMatcher
+
+
+def _matcher(**rules):
+    """Return a matcher with only the given rules (settings are not used)."""
+    defaults = {'excluded': [], 'include_globs': [], 'exclude_globs': [], 'prune_dirs': []}
+    defaults.update(rules)
+    return FileMatcher(**defaults)
+
+
+def test_plain_patterns_match_name_prefixes_and_suffixes():
+    matcher = _matcher(excluded=['~$', '.tmp'])
+    assert not matcher.accepts_file('~$report.docx', '~$report.docx')
+    assert not matcher.accepts_file('report.tmp', 'report.tmp')
+    assert matcher.accepts_file('report.docx', 'report.docx')
+    assert matcher.accepts_file('my~$report.docx', 'my~$report.docx')
+
+
+def test_plain_patterns_are_literal():
+    matcher = _matcher(excluded=['.tmp', '[x]*'])
+    assert matcher.accepts_file('reportxtmp', 'reportxtmp')
+    # Patterns with wildcards are globs
+    assert not matcher.accepts_file('x.docx', 'x.docx')
+    assert matcher.accepts_file('[x].docx', '[x].docx')
+
+
+def test_name_and_path_globs():
+    matcher = _matcher(exclude_globs=['*.bak', 'archive/*'])
+    assert not matcher.accepts_file('old.bak', 'x/old.bak')
+    assert not matcher.accepts_file('a.docx', 'archive/a.docx')
+    assert matcher.accepts_file('a.docx', 'current/a.docx')
+
+
+def test_include_globs_restrict_the_scan():
+    matcher = _matcher(include_globs=['*.docx', 'reports/*.xlsx'])
+    assert matcher.accepts_file('a.docx', 'x/a.docx')
+    assert matcher.accepts_file('b.xlsx', 'reports/b.xlsx')
+    assert not matcher.accepts_file('b.xlsx', 'other/b.xlsx')
+    assert not matcher.accepts_file('c.pptx', 'c.pptx')
+
+
+def test_pruned_directories():
+    matcher = _matcher(prune_dirs=['.git', 'build/cache'])
+    assert not matcher.accepts_dir('.git', 'project/.git')
+    assert not matcher.accepts_dir('cache', 'build/cache')
+    assert matcher.accepts_dir('cache', 'other/cache')
+
+
+def test_member_paths_check_every_parent_directory():
+    matcher = _matcher(excluded=['~$'], prune_dirs=['__MACOSX'])
+    assert not matcher.accepts_path('__MACOSX/docs/a.docx')
+    assert not matcher.accepts_path('docs/~$a.docx')
+    assert matcher.accepts_path('docs/a.docx')
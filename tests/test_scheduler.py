@@ -0,0 +1,108 @@
+"""Tests for the run-wide task scheduler."""
+
+import threading
+import time
+import conversion.scheduler as scheduler_module
+from conversion.scheduler import TaskScheduler
+from converters.base_converter import DocumentConverter
+from file_utils.work_item import WorkItem
+from utils import events
+from utils.concurrency_controller import ConcurrencyController
+
+
+class CountingConverter(DocumentConverter):
+    """Pretends to convert every file."""
+
+    def process(self, file_paths):
+        return len(file_paths)
+
+
+def _items(tmp_path, count):
+    (tmp_path / 'in').mkdir()
+    items = []
+    for index in range(count):
+        (tmp_path / 'in' / f"{index}.docx").write_bytes(b'x')
+        items.append(WorkItem.in_directory(str(tmp_path / 'in'), 'in', '', f"{index}.docx"))
+    return items
+
+
+def _run(scheduler, items):
+    """Submit the items and join, failing instead of hanging if a worker died."""
+    finished = threading.Event()
+
+    def submit_and_join():
+        scheduler.start()
+        for item in items:
+            scheduler.submit(item)
+        scheduler.join()
+        finished.set()
+
+    threading.Thread(target=submit_and_join, daemon=True).start()
+    assert finished.wait(30), "scheduler did not finish"
+
+
+def _failed(published):
+    return sorted(event.path for event in published if event.kind == events.FAILED)
+
+
+def test_files_are_processed(tmp_path):
+    scheduler = TaskScheduler(str(tmp_path / 'output'), CountingConverter, num_workers=2)
+    _run(scheduler, _items(tmp_path, 5))
+    assert scheduler.processed == 5
+    assert (tmp_path / 'output' / 'in').is_dir()
+
+
+def test_failing_callbacks_keep_the_workers_alive(tmp_path, published):
+    def on_complete(file_infos, output_dir, converter):
+        raise RuntimeError("manifest is broken")
+
+    items = _items(tmp_path, 4)
+    scheduler = TaskScheduler(str(tmp_path / 'output'), CountingConverter, num_workers=1,
+                              on_complete=on_complete)
+    _run(scheduler, items)
+    assert scheduler.processed == 4
+    assert _failed(published) == sorted(item['path'] for item in items)
+
+
+def test_failing_prediction_gives_back_the_slot(tmp_path, published):
+    controller = ConcurrencyController(1, 1, 1)
+    items = _items(tmp_path, 3)
+    scheduler = TaskScheduler(str(tmp_path / 'output'), CountingConverter, num_workers=1,
+                              controller=controller)
+
+    def predict(file_infos):
+        raise ValueError("no prediction")
+    scheduler._predict = predict
+
+    _run(scheduler, items)
+    assert controller.in_flight == 0
+    assert _failed(published) == sorted(item['path'] for item in items)
+
+
+def test_idle_workers_hold_no_slots(tmp_path, monkeypatch):
+    controller = ConcurrencyController(1, 8, 4)
+    monkeypatch.setattr(scheduler_module, 'ADAPTIVE_CONCURRENCY', True)
+    monkeypatch.setattr(scheduler_module, 'get_concurrency_controller', lambda: controller)
+    scheduler = TaskScheduler(str(tmp_path / 'output'), CountingConverter, num_workers=4)
+    scheduler.start()
+    time.sleep(0.1)
+    assert controller.in_flight == 0
+    for item in _items(tmp_path, 3):
+        scheduler.submit(item)
+    assert scheduler.join() == 3
+    assert controller.in_flight == 0
+
+
+def test_failing_converter(tmp_path, published):
+    def broken_factory(output_dir):
+        raise OSError("no converter")
+
+    completed = []
+    items = _items(tmp_path, 2)
+    scheduler = TaskScheduler(str(tmp_path / 'output'), broken_factory, num_workers=1,
+                              on_complete=lambda files, output_dir, converter: completed.append(converter))
+    _run(scheduler, items)
+    assert scheduler.processed == 0
+    assert _failed(published) == sorted(item['path'] for item in items)
+    # The callback still runs, without a converter
+    assert completed and all(converter is None for converter in completed)
@@ -0,0 +1,84 @@
+"""Tests for the HTTP conversion service."""
+
+import io
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+import zipfile
+from http.server import ThreadingHTTPServer
+import pytest
+import server_main
+from conversion.job_manager import JobManager
+from converters.base_converter import DocumentConverter
+
+
+class PdfWriter(DocumentConverter):
+    """Writes a placeholder PDF for every file."""
+
+    def process(self, file_paths):
+        for path in file_paths:
+            with open(self.get_output_path(path), 'wb') as f:
+                f.write(b'%PDF ' + os.path.basename(path).encode())
+        return len(file_paths)
+
+
+@pytest.fixture
+def service(monkeypatch):
+    """Serve the API on a free local port with its own job manager; return its URL."""
+    manager = JobManager()
+    monkeypatch.setattr(server_main, 'get_job_manager', lambda: manager)
+    monkeypatch.setattr(server_main, '_converter_factory', PdfWriter)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), server_main.ConversionRequestHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _request(url, method='GET', data=None):
+    """Return (status, headers, body) of a request, also for error statuses."""
+    request = urllib.request.Request(url, data=data, method=method)
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as error:
+        return error.code, error.headers, error.read()
+
+
+def _wait_until_finished(job_url):
+    deadline = time.monotonic() + 30
+    while True:
+        status, _, body = _request(job_url)
+        job = json.loads(body)
+        if job['state'] in ('finished', 'failed'):
+            return job
+        assert time.monotonic() < deadline, "job did not finish"
+        time.sleep(0.05)
+
+
+def test_submit_poll_download_and_delete(service):
+    status, headers, body = _request(f"{service}/jobs?name=a.docx", 'POST', b'document')
+    assert status == 202
+    job_url = service + headers['Location']
+
+    job = _wait_until_finished(job_url)
+    assert (job['state'], job['processed']) == ('finished', 1)
+    status, _, body = _request(service + job['result_url'])
+    assert status == 200
+    with zipfile.ZipFile(io.BytesIO(body)) as archive:
+        assert [name.rsplit('/', 1)[-1] for name in archive.namelist()] == ['a.pdf']
+    status, _, body = _request(service + job['outputs'][0])
+    assert (status, body) == (200, b'%PDF a.docx')
+
+    assert _request(job_url, 'DELETE')[0] == 200
+    assert _request(job_url)[0] == 404
+
+
+def test_submissions_need_a_file_name(service):
+    status, _, body = _request(f"{service}/jobs", 'POST', b'document')
+    assert status == 400
+    assert 'name' in json.loads(body)['error']
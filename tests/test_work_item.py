@@ -0,0 +1,55 @@
+"""Tests for the WorkItem file info representation."""
+
+import os
+import pytest
+from file_utils.work_item import WorkItem
+
+
+def test_directory_item_joins_its_path():
+    item = WorkItem.in_directory('/data', 'data', os.path.join('a', 'b'), 'c.docx', size=3)
+    assert item['path'] == os.path.join('/data', 'a', 'b', 'c.docx')
+    assert item['internal_path'] == os.path.join('a', 'b', 'c.docx')
+    assert item['size'] == 3
+    assert item['archive'] is None
+
+
+def test_archive_member_has_no_path_until_staged():
+    item = WorkItem.in_archive('/in/x.zip', 'sub/a.docx', 'x.zip', os.path.join('sub', 'a.docx'),
+                               10, 1_000, 0xDEADBEEF, container=('inner.zip',))
+    assert item['path'] is None
+    assert item.get('crc') == 0xDEADBEEF
+    item['path'] = '/tmp/staged/a.docx'
+    assert item['path'] == '/tmp/staged/a.docx'
+    assert item['internal_path'] == os.path.join('sub', 'a.docx')
+
+
+def test_mapping_interface():
+    item = WorkItem.direct('/in/a.docx')
+    assert 'path' in item
+    assert 'bogus' not in item
+    assert item.get('bogus', 'default') == 'default'
+    assert item.get('size') is None
+    with pytest.raises(KeyError):
+        item['bogus']
+    with pytest.raises(KeyError):
+        item['internal_path'] = 'x'
+    with pytest.raises(KeyError):
+        item['bogus'] = 'x'
+    assert set(dict(item)) == set(WorkItem.KEYS)
+
+
+def test_dict_round_trip():
+    item = WorkItem.in_archive('/in/x.zip', 'a.docx', 'x.zip', 'a.docx', 10, 1_000, 7,
+                               container=('one.zip', 'two.tar'))
+    # As read back from the journal's JSON
+    data = dict(item)
+    data['container'] = list(data['container'])
+    copy = WorkItem.from_dict(data)
+    assert dict(copy) == dict(item)
+    assert copy.container == ('one.zip', 'two.tar')
+
+
+def test_shared_strings_are_interned():
+    first = WorkItem.in_directory('/data', 'data', ''.join(['s', 'ub']), 'a.docx')
+    second = WorkItem.in_directory('/data', 'data', ''.join(['su', 'b']), 'b.docx')
+    assert first.internal_dir is second.internal_dir
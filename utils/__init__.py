@@ -1,5 +1,5 @@
 """Utility functions and helpers for the application."""
 
-from .thread_manager import process_files_in_parallel, get_max_workers
+from .thread_manager import process_files_in_parallel, get_max_workers, get_concurrency_controller
 
-__all__ = ['process_files_in_parallel', 'get_max_workers']
\ No newline at end of file
+__all__ = ['process_files_in_parallel', 'get_max_workers', 'get_concurrency_controller']
\ No newline at end of file
@@ -0,0 +1,268 @@
+"""Adjusts the number of concurrent conversions to memory and CPU pressure."""
+
+import os
+import glob
+import json
+import time
+import atexit
+import tempfile
+import threading
+from collections import deque
+from settings import (
+    ADAPTIVE_MIN_FREE_MEMORY,
+    ADAPTIVE_MAX_LOAD,
+    ADAPTIVE_MAX_SLOWDOWN,
+    ADAPTIVE_INTERVAL
+)
+from . import events
+
+# Where running controllers publish their state for check_threads.py, one
+# file per process ('{pid}' is replaced with the process id)
+STATUS_FILE = os.path.join(tempfile.gettempdir(), 'doc2pdf-concurrency-{pid}.json')
+
+# Smoothing of the observed slowdown (weight of the newest conversion)
+_LATENCY_WEIGHT = 0.3
+
+def status_files():
+    """Return the status files published by conversions, one per process."""
+    return sorted(glob.glob(STATUS_FILE.format(pid='*')))
+
+def _remove_status_file(path):
+    """Remove this process's status file when it exits."""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def read_meminfo():
+    """
+    Return total and available memory from /proc/meminfo.
+    
+    Returns:
+        tuple: (total bytes, available bytes), or (None, None) if unknown.
+    """
+    values = {}
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                name, _, rest = line.partition(':')
+                if name in ('MemTotal', 'MemAvailable'):
+                    values[name] = int(rest.split()[0]) * 1024
+    except (OSError, ValueError):
+        pass
+    return values.get('MemTotal'), values.get('MemAvailable')
+
+def child_rss(root_pid=None):
+    """
+    Return the resident memory of all descendants of a process (e.g. soffice).
+    
+    Args:
+        root_pid (int, optional): Process whose descendants are counted. Defaults to this process.
+    
+    Returns:
+        tuple: (total RSS bytes, number of descendant processes).
+    """
+    root_pid = root_pid or os.getpid()
+    page_size = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+    children = {}
+    rss = {}
+    try:
+        entries = os.listdir('/proc')
+    except OSError:
+        return 0, 0
+    
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", 'r') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        fields = stat[stat.rfind(')') + 2:].split()
+        children.setdefault(int(fields[1]), []).append(int(entry))
+        rss[int(entry)] = int(fields[21]) * page_size
+    
+    total, count = 0, 0
+    pending = list(children.get(root_pid, []))
+    while pending:
+        pid = pending.pop()
+        total += rss.get(pid, 0)
+        count += 1
+        pending.extend(children.get(pid, []))
+    return total, count
+
+def cpu_load():
+    """
+    Return the one-minute load average per CPU core.
+    
+    Returns:
+        float: Load per core, or None if unavailable on this platform.
+    """
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (OSError, AttributeError):
+        return None
+
+class ConcurrencyController:
+    """
+    Limits how many conversions run at once and adapts the limit while running.
+    
+    Workers call acquire() before taking a task and release() when it is done.
+    Every ADAPTIVE_INTERVAL seconds the limit is lowered when free memory runs
+    short (taking the memory used by running LibreOffice processes into
+    account), the CPU is overloaded or conversions slow down relative to their
+    predicted cost, and raised again while every slot is busy and the host has
+    room for one more process.
+    """
+    
+    def __init__(self, floor, ceiling, baseline):
+        """
+        Initialize the controller.
+        
+        Args:
+            floor (int): Fewest concurrent conversions.
+            ceiling (int): Most concurrent conversions.
+            baseline (int): Limit to start with.
+        """
+        self.floor = max(1, floor)
+        self.ceiling = max(self.floor, ceiling)
+        self.limit = min(self.ceiling, max(self.floor, baseline))
+        self.in_flight = 0
+        self.decisions = deque(maxlen=20)
+        self._slowdown = None
+        self._best_slowdown = None
+        self._last_adjust = time.monotonic()
+        self._condition = threading.Condition()
+        self._status_file = None
+    
+    def acquire(self):
+        """Wait for a free conversion slot and take it."""
+        with self._condition:
+            while self.in_flight >= self.limit:
+                self._condition.wait(timeout=ADAPTIVE_INTERVAL)
+                self._maybe_adjust()
+            self.in_flight += 1
+    
+    def release(self, seconds=None, predicted=None):
+        """
+        Give back a conversion slot.
+        
+        Args:
+            seconds (float, optional): How long the conversion took.
+            predicted (float, optional): How long it was predicted to take.
+        """
+        with self._condition:
+            self.in_flight -= 1
+            if seconds is not None and predicted:
+                ratio = seconds / predicted
+                if self._slowdown is None:
+                    self._slowdown = ratio
+                else:
+                    self._slowdown += _LATENCY_WEIGHT * (ratio - self._slowdown)
+                if self._best_slowdown is None or self._slowdown < self._best_slowdown:
+                    self._best_slowdown = self._slowdown
+            self._maybe_adjust()
+            self._condition.notify_all()
+    
+    def sample(self):
+        """
+        Measure the current load on the host.
+        
+        Returns:
+            dict: Memory, child process, CPU and latency readings.
+        """
+        total, available = read_meminfo()
+        rss, processes = child_rss()
+        slowdown = None
+        if self._slowdown is not None and self._best_slowdown:
+            slowdown = self._slowdown / self._best_slowdown
+        return {
+            'mem_total': total,
+            'mem_available': available,
+            'child_rss': rss,
+            'child_processes': processes,
+            'load': cpu_load(),
+            'slowdown': slowdown
+        }
+    
+    def decide(self, sample):
+        """
+        Work out the next limit from a sample.
+        
+        Args:
+            sample (dict): Readings from sample().
+        
+        Returns:
+            tuple: (new limit, reason), reason being None when nothing changes.
+        """
+        available = sample['mem_available']
+        per_conversion = sample['child_rss'] / max(1, self.in_flight)
+        load = sample['load']
+        slowdown = sample['slowdown']
+        
+        if available is not None and available < ADAPTIVE_MIN_FREE_MEMORY:
+            # Shed load quickly before the OOM killer picks a LibreOffice process
+            new_limit = self.limit // 2 if available < ADAPTIVE_MIN_FREE_MEMORY / 2 else self.limit - 1
+            return max(self.floor, new_limit), f"low memory ({available // (1024 * 1024)} MB free)"
+        if load is not None and load > ADAPTIVE_MAX_LOAD:
+            return max(self.floor, self.limit - 1), f"CPU overloaded (load {load:.2f} per core)"
+        if slowdown is not None and slowdown > ADAPTIVE_MAX_SLOWDOWN:
+            return max(self.floor, self.limit - 1), f"conversions {slowdown:.1f}x slower than best"
+        
+        busy = self.in_flight >= self.limit
+        room = available is None or available - per_conversion > ADAPTIVE_MIN_FREE_MEMORY
+        if busy and room and (load is None or load < ADAPTIVE_MAX_LOAD * 0.8):
+            return min(self.ceiling, self.limit + 1), "all slots busy, host has headroom"
+        return self.limit, None
+    
+    def status(self):
+        """
+        Return the controller's state for display.
+        
+        Returns:
+            dict: Limits, slots in use and the most recent decisions.
+        """
+        return {
+            'pid': os.getpid(),
+            'floor': self.floor,
+            'ceiling': self.ceiling,
+            'limit': self.limit,
+            'in_flight': self.in_flight,
+            'decisions': list(self.decisions)
+        }
+    
+    def _maybe_adjust(self):
+        """Re-evaluate the limit if the adjustment interval has passed (lock held)."""
+        now = time.monotonic()
+        if now - self._last_adjust < ADAPTIVE_INTERVAL:
+            return
+        self._last_adjust = now
+        
+        sample = self.sample()
+        new_limit, reason = self.decide(sample)
+        if reason is None or new_limit == self.limit:
+            self.publish()
+            return
+        
+        self.decisions.append({'time': time.time(), 'from': self.limit,
+                               'to': new_limit, 'reason': reason})
+        events.publish(events.MESSAGE, message=f"Concurrency {self.limit} -> {new_limit}: {reason}")
+        if new_limit < self.limit:
+            # Judge the new limit by the conversions that run under it
+            self._slowdown = None
+        self.limit = new_limit
+        self.publish()
+    
+    def publish(self):
+        """Write the current state to this process's STATUS_FILE for check_threads.py."""
+        if self._status_file is None:
+            self._status_file = STATUS_FILE.format(pid=os.getpid())
+            atexit.register(_remove_status_file, self._status_file)
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(self._status_file), suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self.status(), f)
+            os.replace(temp_path, self._status_file)
+        except OSError:
+            pass
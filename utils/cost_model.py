@@ -0,0 +1,185 @@
+"""Predicts how long a file will take to process, learned from earlier runs."""
+
+import os
+import json
+import tempfile
+import threading
+from settings import CONVERTIBLE_EXTENSIONS, COST_MODEL_FILE
+
+# Starting guesses before any timings have been observed
+_DEFAULT_CONVERT_OVERHEAD = 2.0          # seconds per converted file
+_DEFAULT_CONVERT_RATE = 1024 * 1024      # bytes converted per second
+_DEFAULT_COPY_OVERHEAD = 0.01
+_DEFAULT_COPY_RATE = 100 * 1024 * 1024
+
+# Weight of older observations (closer to 1 = longer memory)
+_DECAY = 0.98
+
+class CostModel:
+    """
+    Per-extension linear cost model: seconds = overhead + size * seconds_per_byte.
+    
+    The model keeps exponentially decayed sums of (size, seconds) observations
+    for each extension and fits the line by least squares, so it adapts to the
+    machine and LibreOffice version it runs on.
+    """
+    
+    def __init__(self, path):
+        """
+        Load the model from disk, or start with default estimates.
+        
+        Args:
+            path (str): JSON file the model is persisted to.
+        """
+        self.path = path
+        self._stats = {}
+        self._lock = threading.Lock()
+        
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self._stats = json.load(f).get('extensions', {})
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"Warning: Ignoring unreadable cost model '{path}': {e}")
+    
+    def predict(self, path, size=None):
+        """
+        Predict the processing time of a file.
+        
+        Args:
+            path (str): Path (or name) of the file; its extension selects the model.
+            size (int, optional): File size in bytes. Read from disk if omitted.
+        
+        Returns:
+            float: Predicted seconds.
+        """
+        if size is None:
+            try:
+                size = os.path.getsize(path)
+            except (OSError, TypeError):
+                size = 0
+        
+        overhead, seconds_per_byte = self._coefficients(os.path.splitext(path)[1].lower())
+        return overhead + size * seconds_per_byte
+    
+    def observe(self, path, size, seconds):
+        """
+        Record how long a file actually took.
+        
+        Args:
+            path (str): Path (or name) of the file.
+            size (int): File size in bytes.
+            seconds (float): Measured processing time.
+        """
+        ext = os.path.splitext(path)[1].lower()
+        with self._lock:
+            stats = self._stats.setdefault(ext, {'n': 0.0, 'x': 0.0, 'y': 0.0, 'xx': 0.0, 'xy': 0.0})
+            for key in stats:
+                stats[key] *= _DECAY
+            stats['n'] += 1
+            stats['x'] += size
+            stats['y'] += seconds
+            stats['xx'] += size * size
+            stats['xy'] += size * seconds
+    
+    def observe_group(self, files, seconds):
+        """
+        Record the time taken by a group of files processed together.
+        
+        The time is split between the files in proportion to their predicted cost.
+        
+        Args:
+            files (list): (path, size) tuples of the files in the group.
+            seconds (float): Measured processing time of the whole group.
+        """
+        predictions = [self.predict(path, size) for path, size in files]
+        total = sum(predictions) or 1.0
+        for (path, size), predicted in zip(files, predictions):
+            self.observe(path, size, seconds * predicted / total)
+    
+    def estimate_duration(self, costs, workers):
+        """
+        Estimate the wall time for running tasks longest-first on a number of workers.
+        
+        Args:
+            costs (list): Predicted seconds of each task.
+            workers (int): Number of parallel workers.
+        
+        Returns:
+            float: Estimated seconds until all tasks are done.
+        """
+        if not costs:
+            return 0.0
+        return max(sum(costs) / max(1, workers), max(costs))
+    
+    def save(self):
+        """Write the model to disk atomically."""
+        with self._lock:
+            data = {'extensions': self._stats}
+        try:
+            directory = os.path.dirname(self.path) or '.'
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"Warning: Could not save cost model '{self.path}': {e}")
+    
+    def _coefficients(self, ext):
+        """Return (overhead seconds, seconds per byte) for an extension."""
+        if ext in CONVERTIBLE_EXTENSIONS:
+            overhead, rate = _DEFAULT_CONVERT_OVERHEAD, _DEFAULT_CONVERT_RATE
+        else:
+            overhead, rate = _DEFAULT_COPY_OVERHEAD, _DEFAULT_COPY_RATE
+        seconds_per_byte = 1.0 / rate
+        
+        with self._lock:
+            stats = self._stats.get(ext)
+            if not stats or stats['n'] < 1:
+                return overhead, seconds_per_byte
+            n, x, y, xx, xy = stats['n'], stats['x'], stats['y'], stats['xx'], stats['xy']
+        
+        variance = n * xx - x * x
+        if variance > 1e-9 * n * xx:
+            # Enough spread in sizes to fit both overhead and per-byte cost
+            seconds_per_byte = max(0.0, (n * xy - x * y) / variance)
+            overhead = max(0.0, (y - seconds_per_byte * x) / n)
+        else:
+            # All files of similar size: keep the default rate, learn the overhead
+            overhead = max(0.0, (y - seconds_per_byte * x) / n)
+        return overhead, seconds_per_byte
+
+def format_duration(seconds):
+    """
+    Format a duration for display, e.g. '1h 02m', '3m 05s' or '12s'.
+    
+    Args:
+        seconds (float): Duration in seconds.
+    
+    Returns:
+        str: Human-readable duration.
+    """
+    seconds = int(round(seconds))
+    if seconds >= 3600:
+        return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    return f"{seconds}s"
+
+_model = None
+_model_lock = threading.Lock()
+
+def get_cost_model():
+    """
+    Return the process-wide cost model, loading it on first use.
+    
+    Returns:
+        CostModel: The shared model.
+    """
+    global _model
+    with _model_lock:
+        if _model is None:
+            _model = CostModel(COST_MODEL_FILE)
+        return _model
@@ -0,0 +1,314 @@
+"""Progress events published while converting, and renderers that display them."""
+
+import os
+import sys
+import time
+import threading
+from collections import deque
+from settings import PROGRESS_INTERVAL, PROGRESS_LIST_FILES
+
+# Event kinds
+PLANNED = 'planned'      # The number of files to process is known ('count')
+QUEUED = 'queued'        # A file was handed to the conversion workers
+STARTED = 'started'      # A file's conversion started
+FINISHED = 'finished'    # A file was converted or copied ('outcome')
+CACHED = 'cached'        # A file's PDF was served from the conversion cache
+FAILED = 'failed'        # A file could not be processed at all
+MESSAGE = 'message'      # Informational line, e.g. a retry or an error detail
+
+# Outcomes of FINISHED events
+CONVERTED = 'converted'
+COPIED = 'copied'
+FALLBACK = 'fallback'    # Copied because its conversion failed
+UNCHANGED = 'unchanged'  # Skipped by an incremental run
+DUPLICATE = 'duplicate'  # Output placed from an identical document's conversion
+
+_OUTCOME_LABELS = {
+    CONVERTED: 'Converted',
+    COPIED: 'Copied',
+    FALLBACK: 'Copied after failed conversion',
+    UNCHANGED: 'Unchanged',
+    DUPLICATE: 'Duplicate of an earlier file',
+}
+
+class Event:
+    """A single progress event."""
+    
+    __slots__ = ('kind', 'path', 'size', 'seconds', 'outcome', 'message', 'count', 'time', 'scope')
+    
+    def __init__(self, kind, path=None, size=None, seconds=None, outcome=None, message=None, count=None):
+        """
+        Initialize the event.
+        
+        Args:
+            kind (str): One of the event kinds above.
+            path (str, optional): File the event is about.
+            size (int, optional): Size of the file in bytes.
+            seconds (float, optional): Time the step took.
+            outcome (str, optional): Outcome of a FINISHED event.
+            message (str, optional): Human-readable detail.
+            count (int, optional): Number of files of a PLANNED event.
+        """
+        self.kind = kind
+        self.path = path
+        self.size = size
+        self.seconds = seconds
+        self.outcome = outcome
+        self.message = message
+        self.count = count
+        self.time = time.monotonic()
+        self.scope = getattr(_local, 'scope', None)
+
+class EventBus:
+    """Delivers events to subscribers on the publishing thread."""
+    
+    def __init__(self):
+        """Initialize the bus without subscribers."""
+        self._subscribers = ()
+        self._lock = threading.Lock()
+    
+    def subscribe(self, callback):
+        """
+        Register a callback that receives every event.
+        
+        Callbacks run on worker threads and should only record the event.
+        
+        Args:
+            callback (function): Called as callback(event).
+        """
+        with self._lock:
+            self._subscribers = self._subscribers + (callback,)
+    
+    def unsubscribe(self, callback):
+        """
+        Remove a callback registered with subscribe().
+        
+        Args:
+            callback (function): The callback to remove.
+        """
+        with self._lock:
+            self._subscribers = tuple(s for s in self._subscribers if s is not callback)
+    
+    @property
+    def active(self):
+        """Whether anyone is listening; lets publishers skip gathering event data."""
+        return bool(self._subscribers)
+    
+    def publish(self, kind, path=None, **fields):
+        """
+        Send an event to all subscribers (nothing happens without subscribers).
+        
+        Args:
+            kind (str): Event kind.
+            path (str, optional): File the event is about.
+            **fields: Other Event fields (size, seconds, outcome, message, count).
+        """
+        subscribers = self._subscribers
+        if not subscribers:
+            return
+        event = Event(kind, path, **fields)
+        for callback in subscribers:
+            callback(event)
+
+# Process-wide bus used by the converters and the scheduler
+bus = EventBus()
+
+# Scope of the events published by each thread, e.g. the id of a GUI job
+_local = threading.local()
+
+def set_scope(scope):
+    """
+    Tag the events published by the current thread, so trackers can tell runs apart.
+    
+    Threads that work on behalf of another (like scheduler workers) should
+    copy their creator's scope with set_scope(get_scope()).
+    
+    Args:
+        scope: Any hashable value, or None for no scope.
+    """
+    _local.scope = scope
+
+def get_scope():
+    """Return the scope set for the current thread, or None."""
+    return getattr(_local, 'scope', None)
+
+def publish(kind, path=None, **fields):
+    """Publish an event on the process-wide bus (see EventBus.publish)."""
+    bus.publish(kind, path, **fields)
+
+class ProgressTracker:
+    """
+    Counts events so progress can be shown from any thread.
+    
+    Subscribe an instance to the bus; snapshot() returns consistent totals.
+    """
+    
+    def __init__(self, keep_messages=100, scope=None):
+        """
+        Initialize the tracker.
+        
+        Args:
+            keep_messages (int, optional): Number of recent messages to keep.
+            scope (optional): Only count events published in this scope (see set_scope).
+        """
+        self.scope = scope
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        self._counts = {'planned': 0, 'queued': 0, CONVERTED: 0, COPIED: 0,
+                        FALLBACK: 0, UNCHANGED: 0, DUPLICATE: 0, CACHED: 0, FAILED: 0, 'bytes': 0}
+        self._messages = deque(maxlen=keep_messages)
+        self._new_lines = []
+    
+    def __call__(self, event):
+        """Record an event (called by the bus)."""
+        if self.scope is not None and event.scope != self.scope:
+            return
+        with self._lock:
+            counts = self._counts
+            if event.kind == PLANNED:
+                counts['planned'] += event.count or 0
+            elif event.kind == QUEUED:
+                counts['queued'] += 1
+            elif event.kind in (FINISHED, CACHED, FAILED):
+                key = event.outcome if event.kind == FINISHED else event.kind
+                counts[key] = counts.get(key, 0) + 1
+                counts['bytes'] += event.size or 0
+            
+            line = self._describe(event)
+            if line:
+                self._messages.append(line)
+                self._new_lines.append(line)
+    
+    def _describe(self, event):
+        """Return the line shown for an event, or None if it only counts."""
+        name = os.path.basename(event.path) if event.path else ''
+        if event.kind == FAILED:
+            return f"Failed: {name}: {event.message}" if event.message else f"Failed: {name}"
+        if event.kind == MESSAGE:
+            return f"{name}: {event.message}" if name else event.message
+        if PROGRESS_LIST_FILES and event.kind == FINISHED:
+            return f"{_OUTCOME_LABELS.get(event.outcome, event.outcome)}: {name}"
+        if PROGRESS_LIST_FILES and event.kind == CACHED:
+            return f"Cached: {name}"
+        return None
+    
+    def snapshot(self):
+        """
+        Return the current totals.
+        
+        Returns:
+            dict: Counts per outcome, 'done', 'total', 'elapsed' and 'rate' (files/s).
+        """
+        with self._lock:
+            counts = dict(self._counts)
+        counts['done'] = sum(counts[key] for key in (CONVERTED, COPIED, FALLBACK, UNCHANGED, DUPLICATE, CACHED, FAILED))
+        counts['total'] = max(counts['planned'], counts['queued'] + counts[UNCHANGED] + counts[DUPLICATE],
+                              counts['done'])
+        counts['elapsed'] = time.monotonic() - self.started
+        counts['rate'] = counts['done'] / counts['elapsed'] if counts['elapsed'] > 0 else 0.0
+        return counts
+    
+    def recent_messages(self):
+        """Return the most recent message lines."""
+        with self._lock:
+            return list(self._messages)
+    
+    def take_new_lines(self):
+        """Return the message lines added since the last call."""
+        with self._lock:
+            lines, self._new_lines = self._new_lines, []
+        return lines
+
+def format_progress(counts):
+    """
+    Format a progress snapshot as a single line.
+    
+    Args:
+        counts (dict): Snapshot from ProgressTracker.snapshot().
+    
+    Returns:
+        str: The progress line.
+    """
+    parts = [f"{counts[CONVERTED]} converted"]
+    for key, label in ((COPIED, 'copied'), (FALLBACK, 'copied after failure'),
+                       (UNCHANGED, 'unchanged'), (DUPLICATE, 'duplicates'),
+                       (CACHED, 'cached'), (FAILED, 'failed')):
+        if counts[key]:
+            parts.append(f"{counts[key]} {label}")
+    return (f"Progress: {counts['done']}/{counts['total']} done ({', '.join(parts)}), "
+            f"{counts['rate']:.1f} files/s")
+
+class ConsoleRenderer(ProgressTracker):
+    """
+    Shows progress on the console at most once per PROGRESS_INTERVAL.
+    
+    Events are only counted on the worker threads; a background thread writes
+    the accumulated messages and one progress line in a single write, so
+    thousands of files don't turn into thousands of terminal writes.
+    """
+    
+    def __init__(self, stream=None):
+        """
+        Initialize the renderer.
+        
+        Args:
+            stream (file, optional): Where to write. Defaults to sys.stdout.
+        """
+        super().__init__()
+        self.stream = stream or sys.stdout
+        self._interactive = hasattr(self.stream, 'isatty') and self.stream.isatty()
+        self._last_line = None
+        self._last_done = None
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        """Subscribe to the bus and start rendering."""
+        bus.subscribe(self)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Render the final state and unsubscribe."""
+        bus.unsubscribe(self)
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.render(final=True)
+    
+    def _run(self):
+        """Render until stopped."""
+        while not self._stop.wait(PROGRESS_INTERVAL):
+            self.render()
+    
+    def render(self, final=False):
+        """
+        Write new messages and the progress line if anything changed.
+        
+        Args:
+            final (bool, optional): End the progress line with a newline.
+        """
+        lines = self.take_new_lines()
+        counts = self.snapshot()
+        progress = format_progress(counts) if counts['total'] else None
+        if not lines and (progress == self._last_line or progress is None) and not final:
+            return
+        # Without a terminal, only new completions are worth another progress line
+        changed = counts['done'] != self._last_done or final
+        
+        if self._interactive:
+            # Messages scroll above a progress line that is redrawn in place
+            text = '\r\033[K' + ''.join(line + '\n' for line in lines)
+            if progress:
+                text += progress + ('\n' if final else '')
+        else:
+            text = ''.join(line + '\n' for line in lines)
+            if progress and changed:
+                text += progress + '\n'
+        self._last_line = progress
+        self._last_done = counts['done']
+        if not text:
+            return
+        
+        self.stream.write(text)
+        self.stream.flush()
@@ -0,0 +1,222 @@
+"""Per-stage timing spans and counters, exported as JSON lines and Prometheus text."""
+
+import os
+import json
+import time
+import atexit
+import tempfile
+import threading
+from settings import METRICS_ENABLED, METRICS_FILE, METRICS_PROMETHEUS_FILE
+
+# Checked by every call; everything below is skipped when metrics are off
+enabled = METRICS_ENABLED
+
+_lock = threading.Lock()
+_output = None
+_stages = {}
+_counters = {}
+_changed = False
+
+class Span:
+    """
+    Times one stage of work (extracting, converting, copying, ...).
+
+    Use as a context manager; attributes such as bytes processed or a failure
+    reason can be added with set() while the span is open.
+    """
+
+    def __init__(self, stage, attrs):
+        """
+        Initialize the span.
+
+        Args:
+            stage (str): Name of the stage.
+            attrs (dict): Attributes recorded with the span.
+        """
+        self.stage = stage
+        self.attrs = attrs
+        self.started = None
+
+    def set(self, **attrs):
+        """Add attributes to the span."""
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.started = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is not None and 'error' not in self.attrs:
+            self.attrs['error'] = exc_type.__name__
+        record(self.stage, time.monotonic() - self.started, **self.attrs)
+        return False
+
+class _NullSpan:
+    """Span that does nothing, handed out while metrics are disabled."""
+
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+def span(stage, **attrs):
+    """
+    Return a context manager timing a stage.
+
+    Args:
+        stage (str): Name of the stage, e.g. 'convert'.
+        **attrs: Attributes recorded with the span (bytes, files, ext, ...).
+
+    Returns:
+        Span: The span, or a shared no-op span if metrics are disabled.
+    """
+    if not enabled:
+        return _NULL_SPAN
+    return Span(stage, attrs)
+
+def record(stage, seconds, **attrs):
+    """
+    Record a stage whose duration was measured by the caller.
+
+    Args:
+        stage (str): Name of the stage, e.g. 'queue_wait'.
+        seconds (float): Duration of the stage.
+        **attrs: Attributes recorded with the span; 'bytes' is also totalled.
+    """
+    if not enabled:
+        return
+
+    global _changed
+    line = json.dumps({'ts': time.time(), 'stage': stage, 'seconds': round(seconds, 6),
+                       'thread': threading.current_thread().name, **attrs})
+    with _lock:
+        _changed = True
+        totals = _stages.setdefault(stage, [0, 0.0, 0])
+        totals[0] += 1
+        totals[1] += seconds
+        totals[2] += attrs.get('bytes') or 0
+        _write(line)
+
+def count(name, value=1, **labels):
+    """
+    Increment a counter, e.g. count('files', ext='.docx', outcome='converted').
+
+    Args:
+        name (str): Name of the counter.
+        value (int, optional): Amount to add.
+        **labels: Labels distinguishing the counter's series.
+    """
+    if not enabled:
+        return
+
+    global _changed
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _changed = True
+        _counters[key] = _counters.get(key, 0) + value
+
+def _write(line):
+    """Append a line to the JSON lines file (lock held)."""
+    global _output
+    if _output is None:
+        try:
+            _output = open(METRICS_FILE, 'a', encoding='utf-8')
+        except OSError as e:
+            print(f"Warning: Could not open metrics file '{METRICS_FILE}': {e}")
+            _output = False
+    if _output:
+        _output.write(line + '\n')
+
+def summary():
+    """
+    Return the totals collected so far.
+
+    Returns:
+        dict: 'stages' maps stage names to count, seconds and bytes;
+            'counters' maps 'name{labels}' to values.
+    """
+    with _lock:
+        stages = {
+            stage: {'count': n, 'seconds': seconds, 'bytes': nbytes}
+            for stage, (n, seconds, nbytes) in _stages.items()
+        }
+        counters = {_series(name, labels): value for (name, labels), value in _counters.items()}
+    return {'stages': stages, 'counters': counters}
+
+def _series(name, labels):
+    """Format a counter name with its labels in Prometheus notation."""
+    if not labels:
+        return name
+    rendered = ','.join(
+        f'{key}="' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+        for key, value in labels)
+    return f"{name}{{{rendered}}}"
+
+def flush():
+    """Write buffered JSON lines, a summary line and the Prometheus snapshot."""
+    global _changed
+    if not enabled or not _changed:
+        return
+
+    totals = summary()
+    with _lock:
+        _changed = False
+        _write(json.dumps({'ts': time.time(), 'summary': totals}))
+        if _output:
+            _output.flush()
+        counters = dict(_counters)
+
+    if METRICS_PROMETHEUS_FILE:
+        _write_prometheus(totals, counters)
+
+def _write_prometheus(totals, counters):
+    """Write a snapshot for the node_exporter textfile collector (atomically)."""
+    lines = [
+        '# HELP doc2pdf_stage_seconds_total Time spent in each processing stage.',
+        '# TYPE doc2pdf_stage_seconds_total counter',
+    ]
+    for stage, values in sorted(totals['stages'].items()):
+        lines.append(f'doc2pdf_stage_seconds_total{{stage="{stage}"}} {values["seconds"]:.6f}')
+    lines += ['# HELP doc2pdf_stage_spans_total Number of spans recorded for each stage.',
+              '# TYPE doc2pdf_stage_spans_total counter']
+    for stage, values in sorted(totals['stages'].items()):
+        lines.append(f'doc2pdf_stage_spans_total{{stage="{stage}"}} {values["count"]}')
+    lines += ['# HELP doc2pdf_stage_bytes_total Bytes processed in each stage.',
+              '# TYPE doc2pdf_stage_bytes_total counter']
+    for stage, values in sorted(totals['stages'].items()):
+        lines.append(f'doc2pdf_stage_bytes_total{{stage="{stage}"}} {values["bytes"]}')
+
+    declared = set()
+    for (name, labels), value in sorted(counters.items()):
+        metric = f"doc2pdf_{name}_total"
+        if metric not in declared:
+            declared.add(metric)
+            lines.append(f'# TYPE {metric} counter')
+        lines.append(f"{_series(metric, labels)} {value}")
+
+    try:
+        directory = os.path.dirname(os.path.abspath(METRICS_PROMETHEUS_FILE))
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, METRICS_PROMETHEUS_FILE)
+    except OSError as e:
+        print(f"Warning: Could not write metrics snapshot '{METRICS_PROMETHEUS_FILE}': {e}")
+
+def _close():
+    """Flush and close the metrics file when the program exits."""
+    global _output
+    flush()
+    with _lock:
+        if _output:
+            _output.close()
+        _output = None
+
+atexit.register(_close)
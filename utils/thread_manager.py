@@ -1,24 +1,81 @@
 """Provides threading utilities for parallel file processing."""
 
 import os
+import time
+import threading
 import concurrent.futures
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from settings import MAX_WORKERS
+from settings import (
+    MAX_WORKERS,
+    ISOLATE_LIBREOFFICE_PROFILES,
+    COST_AWARE_SCHEDULING,
+    ADAPTIVE_CONCURRENCY,
+    ADAPTIVE_MIN_WORKERS,
+    ADAPTIVE_MAX_WORKERS
+)
+from .cost_model import get_cost_model
+from .concurrency_controller import ConcurrencyController
+from . import metrics, events
+
+# Per-thread flag marking threads that already belong to a worker pool
+_thread_state = threading.local()
+
+def mark_worker_thread():
+    """Mark the current thread as a worker so nested parallel calls run inline."""
+    _thread_state.is_worker = True
+
+def is_worker_thread():
+    """Return True if the current thread belongs to a worker pool."""
+    return getattr(_thread_state, 'is_worker', False)
 
 def get_max_workers():
-    """Determine the number of worker processes to use."""
-    # For LibreOffice conversions, it's safer to use fewer processes
+    """
+    Determine the number of worker processes to use.
+    
+    In adaptive mode this is the ceiling; the concurrency controller decides
+    how many of them convert at the same time.
+    """
+    if ADAPTIVE_CONCURRENCY:
+        return get_concurrency_controller().ceiling
+    return get_static_workers()
+
+def get_static_workers():
+    """Determine the number of worker processes from MAX_WORKERS and the CPU count."""
     if MAX_WORKERS <= 0:
+        # Isolated profiles let every core run its own LibreOffice process;
+        # with a shared profile it's safer to use fewer processes
+        if ISOLATE_LIBREOFFICE_PROFILES:
+            return os.cpu_count() or 4
         return int(round(os.cpu_count() / 2)) or 4
     else:
         return MAX_WORKERS
 
+_controller = None
+_controller_lock = threading.Lock()
+
+def get_concurrency_controller():
+    """
+    Return the process-wide concurrency controller, creating it on first use.
+    
+    It starts at the static worker count, bounded by ADAPTIVE_MIN_WORKERS and
+    ADAPTIVE_MAX_WORKERS (0 = twice the CPU count).
+    
+    Returns:
+        ConcurrencyController: The shared controller.
+    """
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            ceiling = ADAPTIVE_MAX_WORKERS if ADAPTIVE_MAX_WORKERS > 0 else 2 * (os.cpu_count() or 2)
+            _controller = ConcurrencyController(ADAPTIVE_MIN_WORKERS, ceiling, get_static_workers())
+        return _controller
+
 def process_files_in_parallel(file_list, process_function, max_workers=None):
     """
     Process a list of files in parallel using threads.
     
     Args:
-        file_list (list): List of files to process.
+        file_list (list): List of files (or tuples of files) to process.
         process_function (function): The function to call for each file.
         max_workers (int, optional): Maximum number of worker threads.
             If None, uses the value from get_max_workers().
@@ -30,27 +87,89 @@ def process_files_in_parallel(file_list, process_function, max_workers=None):
         max_workers = get_max_workers()
         
     results = {}
-    total_files = len(file_list)
+    
+    if COST_AWARE_SCHEDULING:
+        # Longest predicted jobs first, so no big file is left for the end
+        model = get_cost_model()
+        file_list = sorted(file_list, key=lambda item: -_predict(model, item))
+    
+    # Already running inside a worker: the outer pool provides the parallelism,
+    # and the scheduler times the whole group for the cost model
+    if is_worker_thread():
+        for path in file_list:
+            try:
+                results[path] = process_function(path)
+            except Exception as exc:
+                _publish_failure(path, exc)
+                results[path] = False
+        return results
     
     print(f"Starting parallel processing with {max_workers} worker threads.")
     
+    if COST_AWARE_SCHEDULING:
+        process_function = _timed(model, process_function)
+    
+    if metrics.enabled:
+        process_function = _measured(process_function)
+    
     # Use a context manager to ensure threads are cleaned up
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+    with ThreadPoolExecutor(max_workers=max_workers, initializer=mark_worker_thread) as executor:
         # Submit all tasks and create a future->path mapping
         future_to_path = {
             executor.submit(process_function, path): path
             for path in file_list
         }
         
-        # Process results as they complete
-        for i, future in enumerate(as_completed(future_to_path), 1):
+        # Collect results as they complete; progress is reported through events
+        for future in as_completed(future_to_path):
             path = future_to_path[future]
             try:
-                result = future.result()
-                results[path] = result
-                print(f"({i}/{total_files}) Processed: {os.path.basename(path)}")
+                results[path] = future.result()
             except Exception as exc:
-                print(f"({i}/{total_files}) Error processing {os.path.basename(path)}: {exc}")
+                _publish_failure(path, exc)
                 results[path] = False
     
-    return results
\ No newline at end of file
+    if COST_AWARE_SCHEDULING:
+        get_cost_model().save()
+    
+    return results
+
+def _measured(process_function):
+    """Wrap a process function so its queue wait and run time are recorded."""
+    submitted = time.monotonic()
+    def wrapper(item):
+        metrics.record('queue_wait', time.monotonic() - submitted)
+        with metrics.span('task'):
+            return process_function(item)
+    return wrapper
+
+def _sized_files(item):
+    """Return (path, size) tuples for a file path or a batch of paths."""
+    paths = item if isinstance(item, tuple) else (item,)
+    sized = []
+    for path in paths:
+        try:
+            sized.append((path, os.path.getsize(path)))
+        except OSError:
+            sized.append((path, 0))
+    return sized
+
+def _predict(model, item):
+    """Predict the processing time of a file path or a batch of paths."""
+    return sum(model.predict(path, size) for path, size in _sized_files(item))
+
+def _timed(model, process_function):
+    """Wrap a process function so its run times feed the cost model."""
+    def wrapper(item):
+        sized = _sized_files(item)
+        started = time.monotonic()
+        try:
+            return process_function(item)
+        finally:
+            model.observe_group(sized, time.monotonic() - started)
+    return wrapper
+
+def _publish_failure(item, exc):
+    """Report a file path or a batch of paths whose processing raised."""
+    for path in (item if isinstance(item, tuple) else (item,)):
+        events.publish(events.FAILED, path, message=f"error processing file: {exc}")
\ No newline at end of file